@@ -2,100 +2,158 @@ import streamlit as st
 import sys
 import os
 import random
-import sqlite3
-import pandas as pd
 from datetime import datetime, timedelta
 
 #adding root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.db_helper import DatabaseHelper
-from src.risk_engine import calculate_risk, rule_trigger_log, get_rule_trigger_stats
-from src.adopter_profile import create_adopter_profile
+from src.risk_engine import (
+    get_rule_trigger_stats, get_rule_trigger_counts, get_recent_rule_trigger_counts,
+    LOW_RISK_MAX_SCORE
+)
+from src.risk_lookup import get_risk_summary
+from src.matching import get_ranked_pets, expand_match
+from src.adopter_profile import create_adopter_profile, profile_fingerprint
 from src.welcome_page import show_welcome_page
 from src.minimal_styling import inject_custom_css
+from src.init_db_helper import ensure_database_exists
+from src.inventory_metrics import get_inventory_summary
+from src.inventory_version import current_inventory_version
+from src.card_prefetcher import CardPrefetcher, PREFETCH_CARDS, card_photo
+from src.geo import geocode_zip, normalize_zip, RADIUS_CHOICES_MILES
+from src.animal_search import build_match_query, search_animal_ids
+from src.profiling import (
+    profile_stage, profiling_enabled, begin_run, finish_run,
+    cprofile_requested, start_cprofile, stop_cprofile
+)
+from src.query_stats import query_stats_enabled, get_query_stats, get_slow_queries
+
+# Dashboard numbers that are still computed live are reused for this long
+METRICS_CACHE_TTL_SECONDS = 300
+# Distinct profiles whose ranked queue and insights are kept for all sessions of this server process
+RANKED_QUEUE_CACHE_ENTRIES = 64
+
+@st.cache_resource
+def prepare_database():
+    """Create the database or apply pending migrations once per server process"""
+    ensure_database_exists()
+
+prepare_database()
 
 # Initialize database helper
 
 db_helper = DatabaseHelper()
-count = db_helper.get_animal_count()
+# Bumped by triggers on every inventory write; one single-row read per rerun tells every cache below whether it is stale
+inventory_version = current_inventory_version()
 
 # Initialize session state for Tinder-style interface
+# Sessions keep only pet IDs; pet details live once per process in the ranked-queue cache
 if 'current_pet_index' not in st.session_state:
     st.session_state.current_pet_index = 0
 if 'liked_pets' not in st.session_state:
-    st.session_state.liked_pets = []
+    st.session_state.liked_pets = {}  # Ordered set of pet IDs (values unused)
 if 'passed_pets' not in st.session_state:
-    st.session_state.passed_pets = []
+    st.session_state.passed_pets = {}  # Ordered set of pet IDs (values unused)
 if 'pet_queue' not in st.session_state:
-    st.session_state.pet_queue = []
+    st.session_state.pet_queue = ()  # Ranked pet IDs
+if 'queue_version' not in st.session_state:
+    st.session_state.queue_version = inventory_version  # Inventory version pet_queue was ranked at
+if 'search_area' not in st.session_state:
+    st.session_state.search_area = None  # (zip code, miles) or None for pets anywhere
+if 'search_text' not in st.session_state:
+    st.session_state.search_text = ''  # Free text the queue is narrowed to, or '' for every pet
 if 'last_action' not in st.session_state:
     st.session_state.last_action = None
 if 'tutorial_completed' not in st.session_state:
     st.session_state.tutorial_completed = False
 
-def get_pets_with_risk_scores(adopter_profile, limit=None):
-    """Get pets sorted by risk level (low to high) with risk scores calculated"""
+@st.cache_resource(max_entries=RANKED_QUEUE_CACHE_ENTRIES, show_spinner=False)
+def load_ranked_queue(fingerprint, inventory_version, search_area, _adopter_profile):
+    """
+    Rank the inventory once per profile and search area; sessions with the same answers share the result
+    
+    Returns a tuple of ranked pet IDs and a dict of pet ID -> pet with risk_score
+    and rule_mask; explanations and photos are loaded per card. The objects are
+    shared by every session, so callers must not modify them.
+    """
+    pets = get_ranked_pets(_adopter_profile, expand=False, near=search_area)
+    return tuple(pet['id'] for pet in pets), {pet['id']: pet for pet in pets}
+
+@profile_stage('get_pets_with_risk_scores')
+def get_pets_with_risk_scores(adopter_profile, inventory_version):
+    """Get pet IDs sorted by risk level (low to high) and their details with risk scores calculated"""
     try:
-        conn = db_helper.get_connection()
-        cursor = conn.cursor()
-        
-        # Get all adoptable pets including URL
-        query = "SELECT id, name, type, species, breed, age, size, gender, description, url FROM animals WHERE status = 'adoptable'"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        pets_with_risk = []
-        for row in rows:
-            pet = {
-                'id': row[0],
-                'name': row[1],
-                'type': row[2],
-                'species': row[3],
-                'breed': row[4],
-                'age': row[5],
-                'size': row[6],
-                'gender': row[7],
-                'description': row[8],
-                'url': row[9]
-            }
-            
-            # Get photo URL for this pet
-            cursor.execute('SELECT photo_url FROM photos WHERE animal_id = ? LIMIT 1', (pet['id'],))
-            photo_result = cursor.fetchone()
-            pet['photo_url'] = photo_result[0] if photo_result else None
-            
-            # Calculate risk for this pet
-            risk_result = calculate_risk(adopter_profile, pet)
-            pet['risk_result'] = risk_result
-            
-            pets_with_risk.append(pet)
-        
-        conn.close()
-        
-        # Sort by risk score (low to high)
-        pets_with_risk.sort(key=lambda x: x['risk_result']['risk_score'])
-        
-        # Return all pets if no limit, otherwise limited
-        if limit:
-            return pets_with_risk[:limit]
-        return pets_with_risk
+        return load_ranked_queue(
+            profile_fingerprint(adopter_profile), inventory_version,
+            st.session_state.search_area, adopter_profile
+        )
     except Exception as e:
         st.error(f"Error loading pets: {str(e)}")
-        return []
+        return (), {}
 
+@profile_stage('load_pet_queue')
 def load_pet_queue(adopter_profile):
-    """Load ALL pets into the queue"""
+    """Load the IDs of ALL pets into the queue, keeping only search matches when searching"""
     if not st.session_state.pet_queue:
-        st.session_state.pet_queue = get_pets_with_risk_scores(adopter_profile)  # No limit = all pets
+        st.session_state.queue_version = inventory_version
+        queue, _ = get_pets_with_risk_scores(adopter_profile, inventory_version)
+        # Text without any words (e.g. "!!!") does not filter
+        matches = search_animal_ids(st.session_state.search_text)
+        if matches is not None:
+            queue = tuple(pet_id for pet_id in queue if pet_id in matches)
+        st.session_state.pet_queue = queue
     return st.session_state.pet_queue
 
+def get_session_pets():
+    """Pet ID -> pet details for this session's profile and queue (shared; do not modify)"""
+    _, pets = get_pets_with_risk_scores(st.session_state.adopter_profile, st.session_state.queue_version)
+    return pets
+
+def get_liked_pets():
+    """Details of liked pets in the order they were liked, skipping pets no longer listed"""
+    pets = get_session_pets()
+    return [expand_match(pets[pet_id]) for pet_id in st.session_state.liked_pets if pet_id in pets]
+
 def get_current_pet():
     """Get the current pet being displayed"""
-    if st.session_state.pet_queue and st.session_state.current_pet_index < len(st.session_state.pet_queue):
-        return st.session_state.pet_queue[st.session_state.current_pet_index]
+    queue = st.session_state.pet_queue
+    if not queue:
+        return None
+    pets = get_session_pets()
+    # Pets missing from the cache were ranked at an inventory version that has since been rebuilt
+    while st.session_state.current_pet_index < len(queue):
+        pet = pets.get(queue[st.session_state.current_pet_index])
+        if pet is not None:
+            return pet
+        st.session_state.current_pet_index += 1
     return None
 
+def get_card_prefetcher():
+    """This session's background loader for upcoming cards"""
+    if 'card_prefetcher' not in st.session_state:
+        st.session_state.card_prefetcher = CardPrefetcher()
+    return st.session_state.card_prefetcher
+
+def reset_card_prefetcher():
+    """Drop prefetched cards, whose risk explanations belong to the previous profile"""
+    prefetcher = st.session_state.pop('card_prefetcher', None)
+    if prefetcher is not None:
+        prefetcher.shutdown()
+
+def get_current_card(pet):
+    """Photo and risk explanation for the pet on screen, prefetching the cards after it"""
+    prefetcher = get_card_prefetcher()
+    card = prefetcher.get(pet)
+    
+    start = st.session_state.current_pet_index + 1
+    pets = get_session_pets()
+    prefetcher.prefetch([
+        pets[pet_id] for pet_id in st.session_state.pet_queue[start:start + PREFETCH_CARDS]
+        if pet_id in pets
+    ])
+    return card
+
 def next_pet():
     """Move to the next pet in the queue"""
     st.session_state.current_pet_index += 1
@@ -103,28 +161,39 @@ def next_pet():
 
 def like_pet(pet):
     """Add pet to liked pets and move to next"""
-    if pet and pet['id'] not in [p['id'] for p in st.session_state.liked_pets]:
-        st.session_state.liked_pets.append(pet)
+    if pet:
+        st.session_state.liked_pets.setdefault(pet['id'])
     st.session_state.last_action = 'liked'
     next_pet()
 
 def pass_pet(pet):
     """Add pet to passed pets and move to next"""
-    if pet and pet['id'] not in [p['id'] for p in st.session_state.passed_pets]:
-        st.session_state.passed_pets.append(pet)
+    if pet:
+        st.session_state.passed_pets.setdefault(pet['id'])
     st.session_state.last_action = 'passed'
     next_pet()
 
 def undo_last_action():
     """Undo the last action"""
     if st.session_state.last_action == 'liked' and st.session_state.liked_pets:
-        st.session_state.liked_pets.pop()
+        st.session_state.liked_pets.popitem()
         st.session_state.current_pet_index -= 1
     elif st.session_state.last_action == 'passed' and st.session_state.passed_pets:
-        st.session_state.passed_pets.pop()
+        st.session_state.passed_pets.popitem()
         st.session_state.current_pet_index -= 1
     st.session_state.last_action = None
 
+def clear_favorites():
+    """Forget every liked pet"""
+    st.session_state.liked_pets = {}
+
+def start_over():
+    """Reload the queue and forget all likes and passes"""
+    st.session_state.current_pet_index = 0
+    st.session_state.pet_queue = ()
+    st.session_state.liked_pets = {}
+    st.session_state.passed_pets = {}
+
 def get_filtered_pets(species=None, age=None, size=None, gender=None):
     """Fetch pets from database with filters"""
     conn = db_helper.get_connection()
@@ -181,6 +250,7 @@ def get_risk_badge_color(risk_level):
     }
     return colors.get(risk_level, '#6b7280')  # Default gray
 
+@profile_stage('display_pet_card')
 def display_pet_card(pet):
     """Display a compact pet card with photo and action buttons at top"""
     if not pet:
@@ -190,12 +260,13 @@ def display_pet_card(pet):
     badge_color = get_risk_badge_color(risk_result['risk_level'])
     
     # Display photo with error handling
-    if pet.get('photo_url'):
+    photo = card_photo(pet)
+    if photo:
         try:
             # Center the image and make it square
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
-                st.image(pet['photo_url'], width=400)
+                st.image(photo, width=400)
         except:
             # Show placeholder if image fails
             col1, col2, col3 = st.columns([1, 2, 1])
@@ -272,17 +343,17 @@ def display_pet_card(pet):
     st.markdown("")
     
     # ACTION BUTTONS AT TOP
+    # Callbacks run before the card fragment reruns, so the stats and favorites
+    # drawn below it already include the click
     col1, col2, col3 = st.columns([1, 1, 1])
     
     with col1:
-        if st.button("Like", key=f"like_{pet['id']}", use_container_width=True):
-            like_pet(pet)
-            st.rerun()
+        st.button("Like", key=f"like_{pet['id']}", on_click=like_pet, args=(pet,),
+                  use_container_width=True)
     
     with col2:
-        if st.button("Pass", key=f"pass_{pet['id']}", type="secondary", use_container_width=True):
-            pass_pet(pet)
-            st.rerun()
+        st.button("Pass", key=f"pass_{pet['id']}", on_click=pass_pet, args=(pet,),
+                  type="secondary", use_container_width=True)
     
     with col3:
         if pet.get('url'):
@@ -331,28 +402,26 @@ def display_pet_card(pet):
         else:
             st.success("✓ Great match! No major concerns identified.")
 
-def load_metrics_data():
-    """Load data for metrics dashboard"""
-    conn = sqlite3.connect('db/app.db')
-    
-    # Get animals data
-    query = """
-        SELECT 
-            id, name, species, age, size, distance,
-            DATE(created_at) as date_added
-        FROM animals 
-        WHERE status = 'adoptable'
-    """
-    df = pd.read_sql_query(query, conn)
-    
-    # Get saved searches count
-    searches_query = "SELECT COUNT(*) as count FROM saved_searches"
-    searches_count = pd.read_sql_query(searches_query, conn)['count'][0]
-    
-    conn.close()
-    return df, searches_count
+# The TTL only remains for the saved-search count, which the inventory version does not track
+@st.cache_data(ttl=METRICS_CACHE_TTL_SECONDS)
+def load_metrics_data(today, inventory_version):
+    """Load pre-aggregated inventory metrics for the dashboard"""
+    return get_inventory_summary(today=today)
+
+@st.cache_data(max_entries=RANKED_QUEUE_CACHE_ENTRIES)
+def load_personalized_insights(fingerprint, inventory_version, _adopter_profile):
+    """Score the adoptable inventory for one profile by feature signature and aggregate by species"""
+    summary = get_risk_summary(_adopter_profile, low_risk_below=LOW_RISK_MAX_SCORE)
+    by_species = summary['low_risk_by_species']
+    
+    return {
+        'total': summary['total'],
+        'low_risk_count': summary['low_risk_count'],
+        'best_match_species': by_species[0][0] if by_species else None
+    }
 
-def show_metrics_dashboard(df, searches_count, adopter_profile=None):
+@profile_stage('show_metrics_dashboard')
+def show_metrics_dashboard(metrics, adopter_profile=None):
     """Display metrics dashboard"""
     st.markdown("---")
     st.subheader("Adoption Inventory Insights")
@@ -360,33 +429,27 @@ def show_metrics_dashboard(df, searches_count, adopter_profile=None):
     col1, col2, col3, col4 = st.columns(4)
     
     # Metric 1: Total available
+    total = metrics['total']
     with col1:
-        total = len(df)
         st.metric("Available Pets", f"{total:,}")
     
     # Metric 2: New today
     with col2:
-        today = datetime.now().date()
-        if 'date_added' in df.columns and df['date_added'].notna().any():
-            new_today = len(df[pd.to_datetime(df['date_added']).dt.date == today])
-        else:
-            new_today = 0
-        st.metric("New Today", new_today)
+        st.metric("New Today", metrics['new_today'])
     
     # Metric 3: Median distance
     with col3:
-        if 'distance' in df.columns and df['distance'].notna().any():
-            median_dist = df['distance'].median()
-            st.metric("Median Distance", f"{median_dist:.0f} mi")
+        if metrics['median_distance'] is not None:
+            st.metric("Median Distance", f"{metrics['median_distance']:.0f} mi")
         else:
             st.metric("Median Distance", "N/A")
     
     # Metric 4: Active searches
     with col4:
-        st.metric("Active Searches", searches_count)
+        st.metric("Active Searches", metrics['searches_count'])
     
     # Additional insights
-    if len(df) > 0:
+    if total > 0:
         st.markdown("---")
         
         # Species breakdown
@@ -394,85 +457,58 @@ def show_metrics_dashboard(df, searches_count, adopter_profile=None):
         
         with col1:
             st.subheader("By Species")
-            species_counts = df['species'].value_counts()
-            for species, count in species_counts.items():
+            for species, count in metrics['by_species']:
                 pct = (count / total * 100)
                 st.write(f"**{species}:** {count} ({pct:.1f}%)")
         
         with col2:
             st.subheader("By Age")
-            age_counts = df['age'].value_counts()
-            for age, count in age_counts.items():
+            for age, count in metrics['by_age']:
                 pct = (count / total * 100)
                 st.write(f"**{age}:** {count} ({pct:.1f}%)")
         
         # Size distribution
-        if 'size' in df.columns:
-            st.subheader("By Size")
-            size_counts = df['size'].value_counts()
-            for size, count in size_counts.items():
-                pct = (count / total * 100)
-                st.write(f"**{size}:** {count} ({pct:.1f}%)")
+        st.subheader("By Size")
+        for size, count in metrics['by_size']:
+            pct = (count / total * 100)
+            st.write(f"**{size}:** {count} ({pct:.1f}%)")
     
     # Personalized insights based on adopter profile
     if adopter_profile:
         st.markdown("---")
         st.subheader("Personalized Insights")
         
-        # Calculate compatibility for all pets
-        compatible_pets = []
-        for _, pet_row in df.iterrows():
-            pet_data = {
-                'id': pet_row['id'],
-                'name': pet_row['name'],
-                'species': pet_row['species'],
-                'breed': 'Mixed',  # Default since we don't have breed in metrics
-                'age': pet_row['age'],
-                'size': pet_row['size'],
-                'gender': 'Unknown',  # Default since we don't have gender in metrics
-                'description': ''
-            }
-            
-            risk_result = calculate_risk(adopter_profile, pet_data)
-            if risk_result['risk_level'] == 'Low':
-                compatible_pets.append(pet_data)
+        insights = load_personalized_insights(profile_fingerprint(adopter_profile), inventory_version, adopter_profile)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Low Risk Matches", len(compatible_pets))
+            st.metric("Low Risk Matches", insights['low_risk_count'])
         
         with col2:
-            if total > 0:
-                compatibility_rate = (len(compatible_pets) / total * 100)
+            if insights['total'] > 0:
+                compatibility_rate = (insights['low_risk_count'] / insights['total'] * 100)
                 st.metric("Compatibility Rate", f"{compatibility_rate:.1f}%")
             else:
                 st.metric("Compatibility Rate", "N/A")
         
         with col3:
             # Most common compatible species
-            if compatible_pets:
-                compatible_species = [pet['species'] for pet in compatible_pets]
-                most_common = max(set(compatible_species), key=compatible_species.count)
-                st.metric("Best Match Species", most_common)
+            if insights['best_match_species']:
+                st.metric("Best Match Species", insights['best_match_species'])
             else:
                 st.metric("Best Match Species", "N/A")
 
 def show_rule_analytics():
     """Show which risk rules trigger most often"""
-    if not rule_trigger_log:
+    rule_counts = get_rule_trigger_counts()
+    if not rule_counts:
         st.info("No risk assessments logged yet")
         return
     
     st.markdown("---")
     st.subheader("Most Common Risk Factors")
     
-    # Count rule triggers
-    rule_counts = {}
-    for entry in rule_trigger_log:
-        rule = entry['rule']
-        rule_counts[rule] = rule_counts.get(rule, 0) + 1
-    
     # Sort and display
     sorted_rules = sorted(rule_counts.items(), key=lambda x: x[1], reverse=True)
     
@@ -481,6 +517,15 @@ def show_rule_analytics():
         readable = rule.replace('_', ' ').title()
         st.write(f"**{readable}**: {count} times")
     
+    # Recent triggers come from this process's per-minute ring buffer
+    recent_counts = get_recent_rule_trigger_counts()
+    if recent_counts:
+        st.caption("Last hour")
+        recent_rules = sorted(recent_counts.items(), key=lambda x: x[1], reverse=True)
+        for rule, count in recent_rules[:5]:
+            readable = rule.replace('_', ' ').title()
+            st.write(f"**{readable}**: {count} times")
+    
     # Additional analytics
     stats = get_rule_trigger_stats()
     if stats:
@@ -529,11 +574,71 @@ def show_data_confidence_badge(confidence):
     else:
         st.info("Limited Data - Visit shelter for details")
 
+def start_rerun_profiling():
+    """Reset stage records and start cProfile if this rerun should be profiled"""
+    begin_run()
+    
+    # A profiled rerun cut short by st.stop() or st.rerun() is closed out here
+    if 'rerun_profiler' in st.session_state:
+        st.session_state.last_cprofile = stop_cprofile(st.session_state.pop('rerun_profiler'))
+    
+    # FURFINDR_CPROFILE=1 profiles the first rerun of each session; the debug panel can ask again
+    wants_cprofile = cprofile_requested() and 'cprofile_done' not in st.session_state
+    if wants_cprofile or st.session_state.get('profile_next_rerun'):
+        st.session_state.cprofile_done = True
+        st.session_state.profile_next_rerun = False
+        st.session_state.rerun_profiler = start_cprofile()
+
+def show_debug_panel():
+    """Opt-in sidebar panel with this rerun's stage timings (FURFINDR_PROFILE=1)"""
+    if 'rerun_profiler' in st.session_state:
+        st.session_state.last_cprofile = stop_cprofile(st.session_state.pop('rerun_profiler'))
+    
+    records = finish_run(context={'page': 'main'})
+    
+    with st.sidebar.expander("⏱️ Performance (debug)"):
+        total = sum(record.seconds for record in records if record.depth == 0)
+        st.caption(f"Profiled stages: {total * 1000:.0f} ms")
+        st.table([
+            {
+                'stage': '  ' * record.depth + record.name,
+                'ms': round(record.seconds * 1000, 1),
+                'queries': record.queries,
+                'rows': record.rows,
+                'sql ms': round(record.query_seconds * 1000, 1)
+            }
+            for record in records
+        ])
+        
+        if query_stats_enabled():
+            st.caption("Top SQL statements (process lifetime)")
+            st.table([
+                {'statement': sql[:80], 'calls': entry['calls'], 'rows': entry['rows'],
+                 'total ms': entry['total_ms'], 'max ms': entry['max_ms']}
+                for sql, entry in list(get_query_stats().items())[:10]
+            ])
+            slow = get_slow_queries()
+            if slow:
+                st.caption(f"Slow queries: {len(slow)} (latest plan below)")
+                st.code(slow[-1]['sql'] + '\n' + '\n'.join(slow[-1]['plan'] or []))
+        
+        if st.button("Profile next rerun with cProfile"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        
+        if 'last_cprofile' in st.session_state:
+            path, summary = st.session_state.last_cprofile
+            st.caption(f"cProfile stats saved to {path}")
+            st.code(summary)
+
 st.set_page_config(page_title="FurFindr - Smart Pet Adoption Matching", layout="wide")
 
 # Inject minimal CSS for consistent styling
 inject_custom_css()
 
+if profiling_enabled() or cprofile_requested():
+    start_rerun_profiling()
+
 # Check if user needs tutorial
 if not st.session_state.tutorial_completed:
     show_welcome_page()
@@ -543,7 +648,7 @@ if not st.session_state.tutorial_completed:
 st.title("FurFindr")
 st.subheader("Find compatible pets based on your lifestyle")
 
-# Sidebar for adopter profile and favorites
+# Sidebar for adopter profile
 st.sidebar.header("Your Household Profile")
 st.sidebar.write("Help us find the best pet match for you!")
 
@@ -630,10 +735,30 @@ with st.sidebar.form("adopter_profile_form"):
         }[x]
     )
     
+    st.subheader("Location")
+    
+    zip_code = st.text_input("Your zip code", max_chars=10, help="Leave empty to see pets from every shelter")
+    max_distance = st.selectbox(
+        "Maximum distance",
+        RADIUS_CHOICES_MILES,
+        index=1,
+        format_func=lambda miles: f"Within {miles} miles"
+    )
+    
+    search_text = st.text_input(
+        "Looking for something specific?",
+        placeholder="e.g. lab puppy",
+        help="Only show pets whose name, breed or description mention these words"
+    )
+    
     submit = st.form_submit_button("Save your Profile")
 
 # Store profile in session state
-if submit:
+if submit and zip_code.strip() and geocode_zip(zip_code) is None:
+    st.sidebar.error(f"Unknown zip code: {zip_code}")
+elif submit:
+    st.session_state.search_area = (normalize_zip(zip_code), max_distance) if zip_code.strip() else None
+    st.session_state.search_text = search_text.strip() if build_match_query(search_text) else ''
     st.session_state.adopter_profile = create_adopter_profile(
         experience_level=experience,
         has_kids=has_kids,
@@ -649,158 +774,135 @@ if submit:
         training_commitment=training_commitment
     )
     st.session_state.profile_created = True  # Mark profile as created
-    st.session_state.pet_queue = []  # Reset pet queue to recalculate with new profile
+    st.session_state.pet_queue = ()  # Reset pet queue to recalculate with new profile
+    st.session_state.queue_version = inventory_version
+    reset_card_prefetcher()
     st.sidebar.success("✓ Profile saved!")
     st.rerun()  # Reload to show pets
 
-# Favorites section in sidebar
-st.sidebar.markdown("---")
-st.sidebar.header("Your Favorites")
-
-if st.session_state.liked_pets:
-    st.sidebar.write(f"You've liked {len(st.session_state.liked_pets)} pets:")
-
-    for i, pet in enumerate(st.session_state.liked_pets[-5:]):  # Show last 5
-        # Expander label does not support raw HTML, so use a generic label and render styled name inside
-        with st.sidebar.expander("Favorite pet"):
-            st.markdown(f"<div style='font-size:16px; font-weight:700; color:#0b84ff'>{pet['name']}</div>", unsafe_allow_html=True)
-            st.write(f"({pet['breed']})")
-            st.write(f"**Risk Level:** {pet['risk_result']['risk_level']}")
-            st.write(f"**Compatibility:** {100 - pet['risk_result']['risk_score']}/100")
-            st.write(f"**Age:** {pet['age']} • **Size:** {pet['size']}")
-
-            if pet['risk_result']['triggered_rules']:
-                st.write(f"**Concerns:** {len(pet['risk_result']['triggered_rules'])}")
-            else:
-                st.success("Great match!")
-    
-    if len(st.session_state.liked_pets) > 5:
-        st.sidebar.caption(f"... and {len(st.session_state.liked_pets) - 5} more")
-    
-    if st.sidebar.button("Clear All Favorites"):
-        st.session_state.liked_pets = []
-        st.rerun()
-    
-    # Download options
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("Download Options")
-    
-    # Download comprehensive report
-    if st.sidebar.button("Download Complete Report", use_container_width=True, type="primary"):
-        comprehensive_data = {
-            "furfindr_report": {
-                "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "session_stats": {
-                    "total_pets_reviewed": len(st.session_state.liked_pets) + len(st.session_state.passed_pets),
-                    "pets_liked": len(st.session_state.liked_pets),
-                    "pets_passed": len(st.session_state.passed_pets),
-                    "current_pet_index": st.session_state.current_pet_index
-                },
-                "adopter_profile": st.session_state.adopter_profile,
-                "favorites": [
+# Favorites section below the card
+def show_favorites():
+    """Favorites list and downloads, drawn inside the card fragment so every swipe refreshes them"""
+    st.markdown("---")
+    st.header("Your Favorites")
+
+    if st.session_state.liked_pets:
+        st.write(f"You've liked {len(st.session_state.liked_pets)} pets:")
+        liked_pets = get_liked_pets()
+
+        for i, pet in enumerate(liked_pets[-5:]):  # Show last 5
+            # Expander label does not support raw HTML, so use a generic label and render styled name inside
+            with st.expander("Favorite pet"):
+                st.markdown(f"<div style='font-size:16px; font-weight:700; color:#0b84ff'>{pet['name']}</div>", unsafe_allow_html=True)
+                st.write(f"({pet['breed']})")
+                st.write(f"**Risk Level:** {pet['risk_result']['risk_level']}")
+                st.write(f"**Compatibility:** {100 - pet['risk_result']['risk_score']}/100")
+                st.write(f"**Age:** {pet['age']} • **Size:** {pet['size']}")
+
+                if pet['risk_result']['triggered_rules']:
+                    st.write(f"**Concerns:** {len(pet['risk_result']['triggered_rules'])}")
+                else:
+                    st.success("Great match!")
+        
+        if len(st.session_state.liked_pets) > 5:
+            st.caption(f"... and {len(st.session_state.liked_pets) - 5} more")
+        
+        st.button("Clear All Favorites", on_click=clear_favorites)
+        
+        # Download options
+        st.markdown("---")
+        st.subheader("Download Options")
+        
+        # Rendered directly so the links stay up; clicking one does not rerun the app
+        import json
+        generated_at = datetime.now()
+        session_stats = {
+            "total_pets_reviewed": len(st.session_state.liked_pets) + len(st.session_state.passed_pets),
+            "pets_liked": len(st.session_state.liked_pets),
+            "pets_passed": len(st.session_state.passed_pets)
+        }
+        favorites = [
+            {
+                "name": pet["name"],
+                "breed": pet["breed"],
+                "age": pet["age"],
+                "size": pet["size"],
+                "gender": pet["gender"],
+                "species": pet["species"],
+                "risk_level": pet["risk_result"]["risk_level"],
+                "compatibility_score": 100 - pet["risk_result"]["risk_score"],
+                "risk_score": pet["risk_result"]["risk_score"],
+                "summary": pet["risk_result"]["summary"],
+                "concerns": len(pet["risk_result"]["triggered_rules"]),
+                "triggered_rules": [
                     {
-                        "name": pet["name"],
-                        "breed": pet["breed"],
-                        "age": pet["age"],
-                        "size": pet["size"],
-                        "gender": pet["gender"],
-                        "species": pet["species"],
-                        "risk_level": pet["risk_result"]["risk_level"],
-                        "compatibility_score": 100 - pet["risk_result"]["risk_score"],
-                        "risk_score": pet["risk_result"]["risk_score"],
-                        "summary": pet["risk_result"]["summary"],
-                        "concerns": len(pet["risk_result"]["triggered_rules"]),
-                        "triggered_rules": [
-                            {
-                                "rule_name": rule["rule_name"],
-                                "concern": rule["concern"],
-                                "guidance": rule["guidance"]
-                            } for rule in pet["risk_result"]["triggered_rules"]
-                        ]
-                    } for pet in st.session_state.liked_pets
+                        "rule_name": rule["rule_name"],
+                        "concern": rule["concern"],
+                        "guidance": rule["guidance"]
+                    } for rule in pet["risk_result"]["triggered_rules"]
                 ]
+            } for pet in liked_pets
+        ]
+        
+        # Download comprehensive report
+        with profile_stage('favorites_report'):
+            comprehensive_data = {
+                "furfindr_report": {
+                    "generated_at": generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    "session_stats": dict(session_stats, current_pet_index=st.session_state.current_pet_index),
+                    "adopter_profile": st.session_state.adopter_profile,
+                    "favorites": favorites
+                }
             }
-        }
+            
+            st.download_button(
+                label="Download Complete Report",
+                data=json.dumps(comprehensive_data, indent=2),
+                file_name=f"furfindr_complete_report_{generated_at.strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                on_click="ignore",
+                use_container_width=True,
+                type="primary"
+            )
         
-        import json
-        report_json = json.dumps(comprehensive_data, indent=2)
+        # Individual download options
+        col1, col2 = st.columns(2)
         
-        st.sidebar.download_button(
-            label="Download Report",
-            data=report_json,
-            file_name=f"furfindr_complete_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
-        )
-    
-    # Individual download options
-    col1, col2 = st.sidebar.columns(2)
-    
-    with col1:
-        if st.button("Profile", use_container_width=True):
+        with col1:
             profile_data = {
                 "adopter_profile": st.session_state.adopter_profile,
-                "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "session_stats": {
-                    "total_pets_reviewed": len(st.session_state.liked_pets) + len(st.session_state.passed_pets),
-                    "pets_liked": len(st.session_state.liked_pets),
-                    "pets_passed": len(st.session_state.passed_pets)
-                }
+                "generated_at": generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "session_stats": session_stats
             }
             
-            import json
-            profile_json = json.dumps(profile_data, indent=2)
+            st.download_button(
+                label="Profile",
+                data=json.dumps(profile_data, indent=2),
+                file_name=f"furfindr_profile_{generated_at.strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                on_click="ignore",
+                use_container_width=True
+            )
+        
+        with col2:
+            favorites_data = {
+                "favorites": favorites,
+                "generated_at": generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "total_favorites": len(st.session_state.liked_pets)
+            }
             
             st.download_button(
-                label="Download Profile",
-                data=profile_json,
-                file_name=f"furfindr_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
+                label="Favorites",
+                data=json.dumps(favorites_data, indent=2),
+                file_name=f"furfindr_favorites_{generated_at.strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                on_click="ignore",
+                use_container_width=True
             )
-    
-    with col2:
-        if st.button("Favorites", use_container_width=True):
-            if st.session_state.liked_pets:
-                favorites_data = {
-                    "favorites": [
-                        {
-                            "name": pet["name"],
-                            "breed": pet["breed"],
-                            "age": pet["age"],
-                            "size": pet["size"],
-                            "gender": pet["gender"],
-                            "species": pet["species"],
-                            "risk_level": pet["risk_result"]["risk_level"],
-                            "compatibility_score": 100 - pet["risk_result"]["risk_score"],
-                            "risk_score": pet["risk_result"]["risk_score"],
-                            "summary": pet["risk_result"]["summary"],
-                            "concerns": len(pet["risk_result"]["triggered_rules"]),
-                            "triggered_rules": [
-                                {
-                                    "rule_name": rule["rule_name"],
-                                    "concern": rule["concern"],
-                                    "guidance": rule["guidance"]
-                                } for rule in pet["risk_result"]["triggered_rules"]
-                            ]
-                        } for pet in st.session_state.liked_pets
-                    ],
-                    "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "total_favorites": len(st.session_state.liked_pets)
-                }
-                
-                import json
-                favorites_json = json.dumps(favorites_data, indent=2)
-                
-                st.download_button(
-                    label="Download Favorites",
-                    data=favorites_json,
-                    file_name=f"furfindr_favorites_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
-            else:
-                st.warning("No favorites to download yet!")
 
-else:
-    st.sidebar.info("No pets liked yet. Start browsing to find your favorites!")
+    else:
+        st.info("No pets liked yet. Start browsing to find your favorites!")
+
 
 # Initialize default profile if none exists
 if 'adopter_profile' not in st.session_state:
@@ -816,63 +918,72 @@ if not st.session_state.profile_created:
     st.stop()
 
 # Main Tinder-style interface
-# Load pet queue if needed
-load_pet_queue(st.session_state.adopter_profile)
-
-# Get current pet
-current_pet = get_current_pet()
-
-# Progress indicator
-total_pets = len(st.session_state.pet_queue)
-current_index = st.session_state.current_pet_index
-remaining_pets = total_pets - current_index
-
-if current_pet:
-    # Progress bar
-    progress = current_index / total_pets if total_pets > 0 else 0
-    st.progress(progress)
-    st.caption(f"Pet {current_index + 1} of {total_pets} • {remaining_pets} remaining")
-    
-    # Main pet card
-    display_pet_card(current_pet)
-    
-    # Show disclaimers and resources
-    show_disclaimers_and_resources()
-    
-    # Undo button (only show if there was a recent action)
-    if st.session_state.last_action:
+@st.fragment
+def show_swipe_card():
+    """Card region and favorites; its buttons rerun only this fragment, not the sidebar or dashboard"""
+    # Load pet queue if needed
+    load_pet_queue(st.session_state.adopter_profile)
+
+    # Get current pet
+    current_pet = get_current_pet()
+
+    # Progress indicator
+    total_pets = len(st.session_state.pet_queue)
+    current_index = st.session_state.current_pet_index
+    remaining_pets = total_pets - current_index
+
+    if current_pet:
+        # Progress bar
+        progress = current_index / total_pets if total_pets > 0 else 0
+        st.progress(progress)
+        st.caption(f"Pet {current_index + 1} of {total_pets} • {remaining_pets} remaining")
+        
+        # Main pet card
+        display_pet_card(get_current_card(current_pet))
+        
+        # Show disclaimers and resources
+        show_disclaimers_and_resources()
+        
+        # Undo button (only show if there was a recent action)
+        if st.session_state.last_action:
+            st.markdown("---")
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col2:
+                st.button("Undo Last Action", type="secondary", on_click=undo_last_action)
+        
+        # Stats
         st.markdown("---")
-        col1, col2, col3 = st.columns([1, 1, 1])
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Pets Liked", len(st.session_state.liked_pets))
         with col2:
-            if st.button("Undo Last Action", type="secondary"):
-                undo_last_action()
-                st.rerun()
-    
-    # Stats
-    st.markdown("---")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Pets Liked", len(st.session_state.liked_pets))
-    with col2:
-        st.metric("Pets Passed", len(st.session_state.passed_pets))
-    with col3:
-        st.metric("Remaining", remaining_pets)
+            st.metric("Pets Passed", len(st.session_state.passed_pets))
+        with col3:
+            st.metric("Remaining", remaining_pets)
 
-else:
-    # End of queue or no pets
-    if total_pets == 0:
-        st.info("No pets available. Please check back later!")
     else:
-        st.success("You've reviewed all available pets!")
-        st.write(f"You liked {len(st.session_state.liked_pets)} pets and passed on {len(st.session_state.passed_pets)} pets.")
-        
-        if st.button("Start Over", type="primary"):
-            st.session_state.current_pet_index = 0
-            st.session_state.pet_queue = []
-            st.session_state.liked_pets = []
-            st.session_state.passed_pets = []
-            st.rerun()
+        # End of queue or no pets
+        if total_pets == 0 and st.session_state.search_text:
+            st.info(f"No pets match \"{st.session_state.search_text}\". Try other words in your profile.")
+        elif total_pets == 0:
+            st.info("No pets available. Please check back later!")
+        else:
+            st.success("You've reviewed all available pets!")
+            st.write(f"You liked {len(st.session_state.liked_pets)} pets and passed on {len(st.session_state.passed_pets)} pets.")
+            
+            st.button("Start Over", type="primary", on_click=start_over)
+
+    show_favorites()
+
+show_swipe_card()
 
 # Load and show metrics at the bottom
-df_metrics, searches_count = load_metrics_data()
-show_metrics_dashboard(df_metrics, searches_count, st.session_state.adopter_profile)
+with profile_stage('load_metrics_data'):
+    metrics = load_metrics_data(datetime.now().date().isoformat(), inventory_version)
+show_metrics_dashboard(metrics, st.session_state.adopter_profile)
+
+if profiling_enabled():
+    show_debug_panel()
+elif 'rerun_profiler' in st.session_state:
+    path, summary = stop_cprofile(st.session_state.pop('rerun_profiler'))
+    print(f"⏱️  cProfile stats for this rerun saved to {path}")
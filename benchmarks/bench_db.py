@@ -0,0 +1,27 @@
+"""
+Database Benchmarks
+Dashboard metrics, ETL upserts and saved search loading
+"""
+
+import itertools
+
+from src.db_helper import DatabaseHelper
+from src.inventory_metrics import get_inventory_summary
+from src.saved_search_helper import get_all_active_searches
+
+
+def setup(env):
+    # Re-upserting existing animals exercises the replace path the daily ETL hits
+    return {'db': DatabaseHelper(env.db_path), 'animals': itertools.cycle(env.animals[:100])}
+
+
+def time_load_metrics_data(state):
+    get_inventory_summary()
+
+
+def time_upsert_animal(state):
+    state['db'].upsert_animal(next(state['animals']))
+
+
+def time_get_all_active_searches(state):
+    get_all_active_searches()
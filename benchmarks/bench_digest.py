@@ -0,0 +1,23 @@
+"""
+Email Digest Benchmarks
+Selecting new pets for a saved search and rendering the digest email
+"""
+
+from etl.email_digest import get_new_pets_since, generate_email_html
+from src.saved_search_helper import get_saved_search
+
+
+def setup(env):
+    search = get_saved_search(1)
+    # Every synthetic animal is newer than this, so all of them are candidates
+    search['last_notified'] = '2000-01-01 00:00:00'
+    search['filters'] = {'species': 'All', 'age': 'All', 'size': 'All', 'gender': 'All'}
+    return {'search': search, 'pets': get_new_pets_since(search)}
+
+
+def time_get_new_pets_since(state):
+    get_new_pets_since(state['search'])
+
+
+def time_generate_email_html(state):
+    generate_email_html(state['search'], state['pets'])
@@ -0,0 +1,41 @@
+"""
+Risk Engine Benchmarks
+Single and batch risk scoring and the ranked pet queue
+"""
+
+from src.risk_engine import calculate_risk
+from src.matching import rank_matches, get_ranked_pets
+
+
+def setup(env):
+    pets = [
+        {
+            'id': animal['id'],
+            'name': animal['name'],
+            'breed': animal['breeds']['primary'],
+            'age': animal['age'],
+            'size': animal['size'],
+            'description': animal['description'],
+            'distance': animal['distance']
+        }
+        for animal in env.animals if animal['status'] == 'adoptable'
+    ]
+    return {'pets': pets, 'pet': pets[0], 'profile': env.searches[0][2]}
+
+
+def time_calculate_risk_single(state):
+    calculate_risk(state['profile'], state['pet'], log_triggers=False)
+
+
+def time_calculate_risk_batch(state):
+    profile = state['profile']
+    for pet in state['pets']:
+        calculate_risk(profile, pet, log_triggers=False)
+
+
+def time_rank_matches_top10(state):
+    rank_matches(state['pets'], state['profile'], k=10, log_triggers=False)
+
+
+def time_get_pets_with_risk_scores(state):
+    get_ranked_pets(state['profile'])
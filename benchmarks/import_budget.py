@@ -0,0 +1,112 @@
+"""
+Import Budget
+Measures how long each entry point takes to import in a fresh interpreter and fails when it exceeds its budget
+
+Every entry point is imported in a new subprocess (so nothing is cached from
+earlier imports) several times, and the fastest run is compared to its budget.
+Modules an entry point must never load, such as streamlit for cron jobs, are
+checked as well.
+
+Usage:
+    python benchmarks/import_budget.py [--repeat 5] [--output FILE]
+"""
+
+import sys
+import os
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import json
+import subprocess
+from collections import namedtuple
+
+
+EntryPoint = namedtuple('EntryPoint', ['module', 'budget_ms', 'forbidden'])
+
+# Budgets (ms) are about 3x the import time measured when they were set, to leave
+# room for slower machines; tighten them when imports get faster
+ENTRY_POINTS = [
+    EntryPoint('etl.run_daily', 300, ('streamlit', 'pandas')),
+    EntryPoint('etl.email_digest', 150, ('streamlit', 'pandas')),
+    EntryPoint('src.risk_pool', 100, ('streamlit', 'pandas', 'requests')),
+    EntryPoint('src.migrations', 50, ('streamlit', 'pandas', 'requests')),
+]
+
+REPEAT = 5
+
+# Run in the child interpreter: time the import and list which heavy modules it loaded
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+'''
+
+
+def measure_import(entry_point):
+    """Import time in seconds of one entry point in a fresh interpreter, and forbidden modules it loaded"""
+    code = _PROBE.format(module=entry_point.module, forbidden=list(entry_point.forbidden))
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    return measurement['seconds'], measurement['loaded']
+
+
+def check_budgets(entry_points=ENTRY_POINTS, repeat=REPEAT):
+    """
+    Measure every entry point and compare it to its budget
+
+    Returns:
+        Dictionary of module -> {'ms', 'budget_ms', 'loaded', 'ok'} (or {'error'})
+    """
+    results = {}
+    for entry_point in entry_points:
+        try:
+            runs = [measure_import(entry_point) for _ in range(repeat)]
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else str(e)
+            results[entry_point.module] = {'error': error, 'ok': False}
+            continue
+
+        ms = min(seconds for seconds, _ in runs) * 1000
+        loaded = runs[0][1]
+        results[entry_point.module] = {
+            'ms': round(ms, 1),
+            'budget_ms': entry_point.budget_ms,
+            'loaded': loaded,
+            'ok': ms <= entry_point.budget_ms and not loaded
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check import time budgets of FurFindr entry points")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Imports per entry point (fastest counts)")
+    parser.add_argument('--output', default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = check_budgets(repeat=args.repeat)
+
+    print(f"\n{'Entry point':<24} {'Import':>10} {'Budget':>10}")
+    for module, result in results.items():
+        if 'error' in result:
+            print(f"{module:<24} ❌ {result['error']}")
+            continue
+        marker = '✅' if result['ok'] else '⚠️'
+        print(f"{module:<24} {result['ms']:>8.1f}ms {result['budget_ms']:>8}ms {marker}")
+        if result['loaded']:
+            print(f"{'':<24} loads {', '.join(result['loaded'])}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = [module for module, result in results.items() if not result['ok']]
+    if failed:
+        print(f"\n⚠️  {len(failed)} entry point(s) over budget or loading forbidden modules")
+        sys.exit(1)
+    print("\n✅ All entry points within budget")
@@ -0,0 +1,233 @@
+"""
+Benchmark Runner
+Times the benchmarks/bench_*.py suites on synthetic data and stores the results as JSON
+
+Each suite module defines setup(env) returning a state object and any number
+of time_*(state) functions. Every scale gets a fresh database in a temporary
+directory that also becomes the working directory, so code using the default
+db/app.db path runs against the synthetic data.
+
+Usage:
+    python benchmarks/run.py [--scale 1000 --scale 10000] [--match risk] [--output FILE] [--sql-stats]
+    python benchmarks/run.py --compare baseline.json latest.json [--threshold 1.2]
+"""
+
+import sys
+import os
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import glob
+import importlib
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import timeit
+from collections import namedtuple
+from datetime import datetime
+
+from benchmarks.synthetic import make_animals, make_saved_searches, build_database
+from src.query_stats import enable_query_stats, disable_query_stats, get_query_stats, reset_query_stats
+
+
+BenchmarkEnv = namedtuple('BenchmarkEnv', ['scale', 'db_path', 'animals', 'searches'])
+
+DEFAULT_SCALES = (1000, 10000)
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+REPEAT = 5
+MAX_SECONDS_PER_BENCHMARK = 20.0
+
+
+def discover_suites():
+    """Names of all benchmarks/bench_*.py modules"""
+    pattern = os.path.join(ROOT, 'benchmarks', 'bench_*.py')
+    return sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(pattern))
+
+
+def time_function(func, state, repeat=REPEAT, max_seconds=MAX_SECONDS_PER_BENCHMARK):
+    """
+    Time func(state) like timeit: calibrate a loop count taking >= 0.2s, then repeat
+
+    Returns:
+        Dictionary with per-call min and median seconds, loop count and repeats
+    """
+    timer = timeit.Timer(lambda: func(state))
+    number, calibration_seconds = timer.autorange()
+    # Slow benchmarks get fewer repeats so one suite cannot run for minutes
+    repeat = max(1, min(repeat, int(max_seconds // max(calibration_seconds, 1e-9))))
+    samples = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'number': number,
+        'repeat': len(samples)
+    }
+
+
+def statement_stats(func, state):
+    """Per-statement SQL statistics for one untimed call of func(state)"""
+    reset_query_stats()
+    enable_query_stats()
+    try:
+        func(state)
+    finally:
+        disable_query_stats()
+    return get_query_stats()
+
+
+def build_env(scale, workdir, searches=None):
+    """Generate and load synthetic data for one scale"""
+    animals = make_animals(scale)
+    saved_searches = make_saved_searches(searches if searches is not None else max(1, scale // 10))
+    db_path = os.path.join(workdir, 'db', 'app.db')
+    build_database(db_path, animals, saved_searches)
+    return BenchmarkEnv(scale, db_path, animals, saved_searches)
+
+
+def run_suites(scales, match=None, searches=None, sql_stats=False):
+    """Run every benchmark at every scale; failures are recorded instead of raised"""
+    results = {}
+    start_dir = os.getcwd()
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix='furfindr-bench-') as workdir:
+            print(f"\n📦 Building synthetic database with {scale} animals...")
+            env = build_env(scale, workdir, searches)
+            os.chdir(workdir)
+            try:
+                for suite in discover_suites():
+                    try:
+                        module = importlib.import_module(f'benchmarks.{suite}')
+                    except ImportError as e:
+                        print(f"  ⚠️  Skipping {suite}: {e}")
+                        continue
+
+                    names = [
+                        name for name in dir(module)
+                        if name.startswith('time_') and (match is None or match in f'{suite}.{name}')
+                    ]
+                    if not names:
+                        continue
+
+                    state = module.setup(env) if hasattr(module, 'setup') else None
+                    for name in names:
+                        key = f'{suite}.{name}[{scale}]'
+                        try:
+                            results[key] = time_function(getattr(module, name), state)
+                            print(f"  {key}: {format_seconds(results[key]['median'])}")
+                            if sql_stats:
+                                results[key]['sql'] = statement_stats(getattr(module, name), state)
+                        except Exception as e:
+                            results[key] = {'error': f'{type(e).__name__}: {e}'}
+                            print(f"  ❌ {key}: {results[key]['error']}")
+            finally:
+                os.chdir(start_dir)
+
+    return results
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_seconds(seconds):
+    for unit, factor in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= factor:
+            return f'{seconds / factor:.2f}{unit}'
+    return f'{seconds / 1e-9:.0f}ns'
+
+
+def save_results(results, scales, output=None):
+    """Write results with run metadata; returns the file path"""
+    commit = git_commit()
+    created_at = datetime.now()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR, f"{created_at.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+        )
+
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': created_at.isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scales': list(scales),
+            'results': results
+        }, f, indent=2, sort_keys=True)
+    return output
+
+
+def compare_results(baseline_path, latest_path, threshold=1.2):
+    """
+    Print median time ratios between two result files
+
+    Returns:
+        List of benchmark keys that got slower than `threshold` times the baseline
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    with open(latest_path) as f:
+        latest = json.load(f)['results']
+
+    regressions = []
+    print(f"\n{'Benchmark':<60} {'Before':>10} {'After':>10} {'Ratio':>7}")
+    for key in sorted(set(baseline) & set(latest)):
+        before = baseline[key].get('median')
+        after = latest[key].get('median')
+        if before is None or after is None:
+            print(f"{key:<60} {'failed':>10}")
+            continue
+
+        ratio = after / before
+        marker = ''
+        if ratio > threshold:
+            marker = ' ⚠️ slower'
+            regressions.append(key)
+        elif ratio < 1 / threshold:
+            marker = ' ✅ faster'
+        print(f"{key:<60} {format_seconds(before):>10} {format_seconds(after):>10} {ratio:>6.2f}x{marker}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run FurFindr benchmarks")
+    parser.add_argument('--scale', type=int, action='append',
+                        help="Number of synthetic animals (repeatable, default: 1000 and 10000)")
+    parser.add_argument('--searches', type=int, default=None,
+                        help="Number of saved searches (default: scale / 10)")
+    parser.add_argument('--match', default=None, help="Only run benchmarks whose name contains this")
+    parser.add_argument('--output', default=None, help="Results file (default: benchmarks/results/)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'LATEST'),
+                        help="Compare two results files instead of running")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Slowdown ratio reported as a regression (default: 1.2)")
+    parser.add_argument('--sql-stats', action='store_true',
+                        help="Also record per-statement SQL statistics for one call of each benchmark")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare_results(*args.compare, threshold=args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} benchmark(s) slower than {args.threshold}x baseline")
+            sys.exit(1)
+        print("\n✅ No regressions")
+    else:
+        scales = args.scale or DEFAULT_SCALES
+        results = run_suites(scales, args.match, args.searches, args.sql_stats)
+        path = save_results(results, scales, args.output)
+        print(f"\n✅ Results saved to {path}")
@@ -0,0 +1,126 @@
+"""
+Synthetic Data
+Deterministic animals, organizations and saved searches for benchmarking at any scale
+"""
+
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime
+
+from src.fake_petfinder import FakePetfinderData, AGES, SIZES
+from src.migrations import migrate
+from src.risk_engine import pet_trait_flags
+
+
+PROFILE_OPTIONS = {
+    'experience_level': ['first_time', 'some_experience', 'experienced'],
+    'has_kids': [True, False],
+    'kid_ages': [['toddler'], ['school_age'], ['teen'], ['toddler', 'school_age']],
+    'has_other_pets': [True, False],
+    'other_pet_types': [['dog'], ['cat'], ['small_animal'], ['bird']],
+    'home_type': ['apartment', 'townhouse', 'house'],
+    'yard_size': ['none', 'small', 'medium', 'large'],
+    'daily_exercise_minutes': [15, 30, 60, 120],
+    'work_schedule': ['full_time_office', 'full_time_home', 'part_time', 'flexible', 'retired'],
+    'allergies': ['none', 'mild', 'moderate', 'severe'],
+    'noise_tolerance': ['low', 'medium', 'high'],
+    'training_commitment': ['willing', 'somewhat', 'limited'],
+}
+
+
+def make_animals(count, seed=0):
+    """
+    `count` deterministic animals in the /animals response shape (see src/fake_petfinder.py)
+
+    Each also carries the created_at the ETL would have stamped, taken from published_at.
+    """
+    data = FakePetfinderData(seed=seed, animal_count=count)
+    animals = []
+    for index in range(count):
+        animal = data.animal(index, location='00000')
+        published_at = datetime.strptime(animal['published_at'], '%Y-%m-%dT%H:%M:%S+0000')
+        animal['created_at'] = published_at.strftime('%Y-%m-%d %H:%M:%S')
+        animals.append(animal)
+    return animals
+
+
+def make_profile(rng):
+    """A random adopter profile using the values documented in create_adopter_profile"""
+    profile = {key: rng.choice(values) for key, values in PROFILE_OPTIONS.items()}
+    if not profile['has_kids']:
+        profile['kid_ages'] = []
+    if not profile['has_other_pets']:
+        profile['other_pet_types'] = []
+    return profile
+
+
+def make_saved_searches(count, seed=0):
+    """`count` deterministic saved searches as (email, name, adopter_profile, filters)"""
+    rng = random.Random(seed + 1)
+    searches = []
+    for index in range(count):
+        filters = {
+            'species': rng.choice(['All', 'Dog', 'Cat']),
+            'age': rng.choice(['All'] + AGES),
+            'size': rng.choice(['All'] + SIZES),
+            'gender': 'All',
+            'max_distance': rng.choice([10, 25, 50, 100])
+        }
+        searches.append((f'user{index}@example.com', f'Search {index}', make_profile(rng), filters))
+    return searches
+
+
+def build_database(db_path, animals, searches):
+    """
+    Create a migrated database at db_path filled with the given data
+
+    Rows are bulk inserted (the per-row helpers open a connection per call),
+    but with the same columns and derived values the helpers write.
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+
+    conn.executemany('''
+        INSERT INTO animals
+        (id, name, type, species, breed, age, size, gender, status,
+         distance, description, organization_id, url, created_at, trait_flags)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (a['id'], a['name'], a['type'], a['species'], a['breeds']['primary'], a['age'],
+         a['size'], a['gender'], a['status'], a['distance'], a['description'],
+         a['organization_id'], a['url'], a['created_at'],
+         pet_trait_flags({'breed': a['breeds']['primary'], 'age': a['age'],
+                          'size': a['size'], 'description': a['description']}))
+        for a in animals
+    ])
+
+    conn.executemany('INSERT OR REPLACE INTO organizations (id, name, city, state) VALUES (?, ?, ?, ?)', [
+        (org_id, f'Animal Rescue {org_id}', 'Springfield', 'IL')
+        for org_id in sorted({a['organization_id'] for a in animals})
+    ])
+
+    conn.executemany('INSERT INTO photos (animal_id, photo_url) VALUES (?, ?)', [
+        (a['id'], photo['medium']) for a in animals for photo in a['photos']
+    ])
+
+    conn.executemany('''
+        INSERT INTO saved_searches
+        (email, name, experience_level, has_kids, kid_ages, has_other_pets,
+         other_pet_types, home_type, yard_size, daily_exercise_minutes,
+         work_schedule, allergies, noise_tolerance, training_commitment,
+         species, age, size, gender, max_distance)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (email, name, p['experience_level'], int(p['has_kids']), json.dumps(p['kid_ages']),
+         int(p['has_other_pets']), json.dumps(p['other_pet_types']), p['home_type'],
+         p['yard_size'], p['daily_exercise_minutes'], p['work_schedule'], p['allergies'],
+         p['noise_tolerance'], p['training_commitment'], f['species'], f['age'],
+         f['size'], f['gender'], f['max_distance'])
+        for email, name, p, f in searches
+    ])
+
+    conn.commit()
+    conn.close()
@@ -9,29 +9,38 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 from src.saved_search_helper import get_all_active_searches, update_last_notified, get_saved_search
-from src.risk_engine import calculate_risk
+from src.risk_engine import calculate_risk, compile_profile
 from src.db_helper import DatabaseHelper
+from src.matching import rank_matches
+from src.geo import geocode_zip, register_distance_function, radius_from
+from src.job_metrics import (
+    EMAILS, EMAIL_RENDER_LATENCY, time_stage, start_job_metrics, finish_job_metrics
+)
 
 
 load_dotenv()
 
+MAX_PETS_PER_EMAIL = 10
 
-def get_new_pets_since(saved_search, hours=24):
+
+def get_new_pets_since(saved_search, hours=24, limit=MAX_PETS_PER_EMAIL):
     """
-    Get pets matching search criteria that were added since last notification
+    Get the best-matching pets that were added since last notification
     
     Args:
-        saved_search: Dict with search criteria
+        saved_search: Dict with search criteria and adopter profile
         hours: Look back this many hours (default 24)
+        limit: Return at most this many pets, lowest risk first
     
     Returns:
-        List of matching pets
+        List of matching pets, each with its 'risk_result'
     """
     db = DatabaseHelper()
     conn = db.get_connection()
@@ -45,32 +54,47 @@ def get_new_pets_since(saved_search, hours=24):
     
     # Build query
     query = '''
-        SELECT id, name, type, species, breed, age, size, gender, description, url
-        FROM animals 
-        WHERE created_at > ? AND status = 'adoptable'
+        SELECT a.id, a.name, a.type, a.species, a.breed, a.age, a.size, a.gender,
+               a.description, a.url, a.created_at
     '''
-    params = [cutoff]
+    params = []
     
-    # Add filters
+    # Distance is an R*Tree probe around the search's zip code, done in SQL
     filters = saved_search['filters']
+    origin = None
+    if filters.get('zip_code') and filters.get('max_distance'):
+        origin = geocode_zip(filters['zip_code'], conn)
+        if origin is None:
+            print(f"⚠️  Unknown zip code {filters['zip_code']}, ignoring max distance")
+    
+    if origin:
+        register_distance_function(conn)
+        from_sql, from_params = radius_from(origin, filters['max_distance'])
+        query += from_sql
+        params.extend(from_params)
+    else:
+        query += ' FROM animals a'
+    
+    query += " WHERE a.created_at > ? AND a.status = 'adoptable'"
+    params.append(cutoff)
+    
+    # Add filters
     if filters.get('species') and filters['species'] != 'All':
-        query += ' AND type = ?'
+        query += ' AND a.type = ?'
         params.append(filters['species'])
     
     if filters.get('age') and filters['age'] != 'All':
-        query += ' AND age = ?'
+        query += ' AND a.age = ?'
         params.append(filters['age'])
     
     if filters.get('size') and filters['size'] != 'All':
-        query += ' AND size = ?'
+        query += ' AND a.size = ?'
         params.append(filters['size'])
     
     if filters.get('gender') and filters['gender'] != 'All':
-        query += ' AND gender = ?'
+        query += ' AND a.gender = ?'
         params.append(filters['gender'])
     
-    query += ' LIMIT 10'  # Max 10 pets per email
-    
     cursor.execute(query, params)
     rows = cursor.fetchall()
     conn.close()
@@ -87,10 +111,12 @@ def get_new_pets_since(saved_search, hours=24):
             'size': row[6],
             'gender': row[7],
             'description': row[8],
-            'url': row[9]
+            'url': row[9],
+            'created_at': row[10]
         })
     
-    return pets
+    # Score every new pet and keep the best, newest first on ties
+    return rank_matches(pets, saved_search['adopter_profile'], k=limit, tie_break='recency')
 
 
 def generate_email_html(saved_search, pets):
@@ -120,7 +146,7 @@ def generate_email_html(saved_search, pets):
         <div style="padding: 20px;">
     """
     
-    adopter_profile = saved_search['adopter_profile']
+    adopter_profile = compile_profile(saved_search['adopter_profile'])
     
     if not pets:
         html += """
@@ -128,8 +154,8 @@ def generate_email_html(saved_search, pets):
         """
     else:
         for pet in pets:
-            # Calculate risk
-            risk_result = calculate_risk(adopter_profile, pet)
+            # Pets from get_new_pets_since come already scored
+            risk_result = pet.get('risk_result') or calculate_risk(adopter_profile, pet)
             
             risk_class = f"risk-{risk_result['risk_level'].lower()}"
             
@@ -240,22 +266,30 @@ def process_all_saved_searches():
         print(f"Processing: {search['name']} ({search['email']})")
         
         # Get new pets
-        pets = get_new_pets_since(search, hours=24)
+        start = time.perf_counter()
+        with time_stage('digest', 'select_pets'):
+            pets = get_new_pets_since(search, hours=24)
         print(f"  Found {len(pets)} new matching pet(s)")
         
         if pets or True:  # Send even if no pets (for testing; remove "or True" in production)
             # Generate email
-            html = generate_email_html(search, pets)
+            with time_stage('digest', 'render'):
+                html = generate_email_html(search, pets)
             subject = f"🐾 {len(pets)} New Pet(s) Match Your Search: {search['name']}"
+            EMAIL_RENDER_LATENCY.observe(time.perf_counter() - start)
+            EMAILS.inc(outcome='rendered')
             
             # Send email
-            success = send_email(search['email'], subject, html)
+            with time_stage('digest', 'send'):
+                success = send_email(search['email'], subject, html)
             
             if success:
+                EMAILS.inc(outcome='sent')
                 # Update last notified time
                 update_last_notified(search['id'])
                 print(f"  ✅ Email sent and timestamp updated\n")
             else:
+                EMAILS.inc(outcome='failed')
                 print(f"  ⚠️  Email not sent (check credentials)\n")
         else:
             print(f"  No new pets to report\n")
@@ -266,4 +300,11 @@ def process_all_saved_searches():
 
 
 if __name__ == "__main__":
-    process_all_saved_searches()
+    start_job_metrics('digest')
+    succeeded = False
+    try:
+        with time_stage('digest', 'total'):
+            process_all_saved_searches()
+        succeeded = True
+    finally:
+        finish_job_metrics('digest', succeeded)
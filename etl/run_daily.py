@@ -7,10 +7,29 @@ load_dotenv()  # Load .env file before importing PetfinderClient
 
 from src.api_client import PetfinderClient
 from src.db_helper import DatabaseHelper
+from src.init_db_helper import ensure_database_exists
+from src.photo_cache import prefetch_thumbnails, evict_thumbnails
+from src.stale_listings import mark_unseen_animals, archive_animals
+from src.job_metrics import (
+    ANIMALS_INGESTED, ANIMALS_ARCHIVED, DB_WRITE_LATENCY, time_stage, start_job_metrics, finish_job_metrics
+)
 
 import time
 
-def fetch_and_store_animals(zip_codes, species_list=None, limit_per_query=100):
+# Pages fetched per zip code and species; queries with more pages are left
+# truncated, and a run with truncated queries does not count missed runs
+MAX_PAGES_PER_QUERY = int(os.getenv('FURFINDR_MAX_PAGES_PER_QUERY', '10'))
+
+def _nearest(distance, other):
+    """The smaller of two distances, ignoring unknown (None) ones"""
+    if distance is None:
+        return other
+    if other is None:
+        return distance
+    return min(distance, other)
+
+def fetch_and_store_animals(zip_codes, species_list=None, limit_per_query=100,
+                            max_pages=MAX_PAGES_PER_QUERY):
     """
     Fetch animals from Petfinder and store in database
     
@@ -18,11 +37,22 @@ def fetch_and_store_animals(zip_codes, species_list=None, limit_per_query=100):
         zip_codes: List of zip codes to search
         species_list: List of species to fetch (e.g., ['dog', 'cat'])
         limit_per_query: Animals per API call (max 100)
+        max_pages: Result pages fetched per zip code and species
     """
+    # Schema (including the triggers that keep inventory metrics current) must be up to date
+    with time_stage('etl', 'ensure_database'):
+        ensure_database_exists()
+    
     client = PetfinderClient()
     db = DatabaseHelper()
     
-    total_saved = 0
+    # Overlapping zip codes return the same animals, so every animal is stored
+    # once per run with its distance from each zip code it was found near
+    animals_by_id = {}  # animal ID -> first listing seen
+    distances = {}  # animal ID -> {zip code: distance}
+    listings = 0
+    failed_queries = 0
+    truncated_queries = 0
     
     for zip_code in zip_codes:
         print(f"\n{'='*60}")
@@ -33,43 +63,111 @@ def fetch_and_store_animals(zip_codes, species_list=None, limit_per_query=100):
         
         for species in species_to_fetch:
             try:
-                # Fetch animals
-                result = client.get_animals(
-                    location=zip_code,
-                    animal_type=species,
-                    limit=limit_per_query
-                )
-                
-                animals = result.get('animals', [])
-                print(f"✅ Found {len(animals)} {species or 'animals'}")
-                
-                # Process each animal
-                for animal in animals:
-                    # Save animal
-                    db.upsert_animal(animal)
+                found = 0
+                page = 1
+                while True:
+                    # Fetch animals
+                    with time_stage('etl', 'fetch_animals'):
+                        result = client.get_animals(
+                            location=zip_code,
+                            animal_type=species,
+                            limit=limit_per_query,
+                            page=page
+                        )
                     
-                    # Save photos
-                    photos = animal.get('photos', [])
-                    if photos:
-                        db.upsert_photos(animal['id'], photos)
+                    animals = result.get('animals', [])
+                    found += len(animals)
                     
-                    # Save organization
-                    org_id = animal.get('organization_id')
-                    if org_id:
-                        try:
-                            org_result = client.get_organization(org_id)
-                            org = org_result.get('organization', {})
-                            db.upsert_organization(org)
-                        except:
-                            pass  # Skip if org fetch fails
+                    for animal in animals:
+                        listings += 1
+                        animals_by_id.setdefault(animal['id'], animal)
+                        by_zip = distances.setdefault(animal['id'], {})
+                        by_zip[zip_code] = _nearest(by_zip.get(zip_code), animal.get('distance'))
+                    
+                    # Be nice to the API - small delay between requests
+                    time.sleep(1)
                     
-                    total_saved += 1
+                    total_pages = result.get('pagination', {}).get('total_pages', page)
+                    if page >= total_pages or not animals:
+                        break
+                    if page >= max_pages:
+                        truncated_queries += 1
+                        print(f"⚠️  Stopped after {page} of {total_pages} pages")
+                        break
+                    page += 1
                 
-                # Be nice to the API - small delay between requests
-                time.sleep(1)
+                print(f"✅ Found {found} {species or 'animals'}")
                 
             except Exception as e:
                 print(f"❌ Error fetching {species} in {zip_code}: {e}")
+                failed_queries += 1
+    
+    print(f"\n💾 Saving {len(animals_by_id)} animals ({listings - len(animals_by_id)} duplicate listings skipped)")
+    
+    total_saved = 0
+    first_photo_urls = []
+    fetched_org_ids = set()  # Organizations are fetched at most once per run, even if that fails
+    
+    with time_stage('etl', 'store_animals'):
+        for animal_id, animal in animals_by_id.items():
+            try:
+                # animals.distance is the distance from the nearest searched zip code
+                nearest = None
+                for distance in distances[animal_id].values():
+                    nearest = _nearest(nearest, distance)
+                
+                # Save animal
+                with DB_WRITE_LATENCY.time(operation='upsert_animal'):
+                    db.upsert_animal(dict(animal, distance=nearest))
+                with DB_WRITE_LATENCY.time(operation='upsert_animal_distances'):
+                    db.upsert_animal_distances(animal_id, distances[animal_id])
+                
+                # Save photos
+                photos = animal.get('photos', [])
+                if photos:
+                    with DB_WRITE_LATENCY.time(operation='upsert_photos'):
+                        db.upsert_photos(animal_id, photos)
+                    # The first stored photo is the one shown on the card
+                    first_photo_urls.extend(
+                        [photo['medium'] for photo in photos if photo.get('medium')][:1]
+                    )
+                
+                # Save organization
+                org_id = animal.get('organization_id')
+                if org_id and org_id not in fetched_org_ids:
+                    fetched_org_ids.add(org_id)
+                    try:
+                        org_result = client.get_organization(org_id)
+                        org = org_result.get('organization', {})
+                        with DB_WRITE_LATENCY.time(operation='upsert_organization'):
+                            db.upsert_organization(org)
+                    except:
+                        pass  # Skip if org fetch fails
+                
+                total_saved += 1
+                ANIMALS_INGESTED.inc(species=animal.get('species') or 'unknown')
+            
+            except Exception as e:
+                print(f"❌ Error saving animal {animal_id}: {e}")
+    
+    # Listings that stopped coming back are archived so animals only holds live inventory
+    with time_stage('etl', 'reconcile_listings'):
+        if failed_queries or truncated_queries or not animals_by_id:
+            # Animals of failed, truncated (or suspiciously empty) queries were not seen but may well still be listed
+            print(f"⚠️  Not counting missed runs: {failed_queries} queries failed, "
+                  f"{truncated_queries} truncated, {len(animals_by_id)} animals seen")
+        else:
+            mark_unseen_animals(animals_by_id)
+        archived = archive_animals()
+    for reason, count in archived.items():
+        ANIMALS_ARCHIVED.inc(count, reason=reason)
+    print(f"🗄️  Archived {archived['stale']} stale and {archived['not_adoptable']} non-adoptable animals")
+    
+    # Card thumbnails are cached now so the app does not download full photos
+    with time_stage('etl', 'photo_thumbnails'):
+        cached, fetched, failed = prefetch_thumbnails(first_photo_urls)
+        evicted = evict_thumbnails()
+    print(f"📷 Thumbnails: {fetched} fetched, {cached} already cached, {failed} failed, {evicted} evicted")
     
     print(f"\n{'='*60}")
     print(f"✅ ETL Complete! Saved {total_saved} animals")
@@ -81,4 +179,11 @@ if __name__ == "__main__":
     ZIP_CODES = ["02790", "02703", "02139"] 
     SPECIES = ["dog"]  # Focus on dogs for demo - more breed variety
     
-    fetch_and_store_animals(ZIP_CODES, SPECIES, limit_per_query=50)
+    start_job_metrics('etl')
+    succeeded = False
+    try:
+        with time_stage('etl', 'total'):
+            fetch_and_store_animals(ZIP_CODES, SPECIES, limit_per_query=50)
+        succeeded = True
+    finally:
+        finish_job_metrics('etl', succeeded)
@@ -3,6 +3,9 @@ Adopter Profile Schema
 Defines the structure for capturing adopter information
 """
 
+import hashlib
+import json
+
 def create_adopter_profile(
     experience_level='first_time',
     has_kids=False,
@@ -58,6 +61,21 @@ def create_adopter_profile(
     }
 
 
+def profile_fingerprint(adopter_profile):
+    """
+    Stable short hash of an adopter profile, for use as a cache key
+    
+    List answers are sorted first so the same choices picked in a
+    different order share a fingerprint.
+    """
+    canonical = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in adopter_profile.items()
+    }
+    payload = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
 # Example profiles for testing
 SAMPLE_PROFILES = {
     'ideal_match': create_adopter_profile(
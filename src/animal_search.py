@@ -0,0 +1,59 @@
+"""
+Animal Search
+Full-text search over animal names, breeds and descriptions backed by the animals_fts index
+"""
+
+import re
+
+from .db_helper import DatabaseHelper
+
+
+def _quote_phrase(text):
+    """Quote text as an FTS5 phrase, escaping embedded double quotes"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def build_match_query(text):
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression
+
+    Every word becomes a quoted prefix term and all terms must match,
+    so 'lab pupp' finds "Labrador Retriever puppy".
+    """
+    words = re.findall(r"\w+", text.lower())
+    return ' '.join(_quote_phrase(word) + '*' for word in words)
+
+
+def search_animal_ids(text, status='adoptable', db_path='db/app.db'):
+    """
+    IDs of animals whose name, breed or description match free text
+
+    Args:
+        text: Free text typed by the user
+        status: Only return animals with this status (None for all)
+
+    Returns:
+        Set of animal IDs, or None when the text has no words to search for
+    """
+    match = build_match_query(text)
+    if not match:
+        return None
+
+    query = '''
+        SELECT a.id
+        FROM animals_fts
+        JOIN animals a ON a.rowid = animals_fts.rowid
+        WHERE animals_fts MATCH ?
+    '''
+    params = [match]
+
+    if status:
+        query += ' AND a.status = ?'
+        params.append(status)
+
+    db = DatabaseHelper(db_path)
+    conn = db.get_connection()
+    try:
+        return {row[0] for row in conn.execute(query, params).fetchall()}
+    finally:
+        conn.close()
@@ -1,13 +1,24 @@
 import os
+import sys
 import time
 import requests
 from datetime import datetime, timedelta
 
-try:
-    # Prefer Streamlit secrets when available (deployed environment)
-    import streamlit as st
-except Exception:
-    st = None
+from .job_metrics import API_REQUESTS, API_RATE_LIMITED, API_LATENCY
+
+
+def _streamlit_secrets():
+    """st.secrets when running inside a Streamlit app, otherwise None"""
+    # A running app has always imported streamlit already; ETL and cron jobs
+    # must not pay for importing it just to find out there are no secrets.
+    st = sys.modules.get('streamlit')
+    if st is None:
+        return None
+    try:
+        from streamlit import runtime
+        return st.secrets if runtime.exists() else None
+    except Exception:
+        return None
 
 
 def get_api_credentials():
@@ -15,10 +26,11 @@ def get_api_credentials():
     api_key = None
     api_secret = None
 
-    if st is not None:
+    secrets = _streamlit_secrets()
+    if secrets is not None:
         try:
-            api_key = st.secrets['petfinder']['api_key']
-            api_secret = st.secrets['petfinder']['api_secret']
+            api_key = secrets['petfinder']['api_key']
+            api_secret = secrets['petfinder']['api_secret']
         except Exception:
             api_key = None
             api_secret = None
@@ -31,13 +43,33 @@ def get_api_credentials():
     return api_key, api_secret
 
 
+DEFAULT_BASE_URL = "https://api.petfinder.com/v2"
+
+
 class PetfinderClient:
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.api_key, self.api_secret = get_api_credentials()
-        self.base_url = "https://api.petfinder.com/v2"
+        # PETFINDER_BASE_URL points the client at another server, e.g. src/fake_petfinder.py
+        self.base_url = base_url or os.getenv('PETFINDER_BASE_URL') or DEFAULT_BASE_URL
         self.token = None
         self.token_expires_at = None
 
+    def _send(self, endpoint, method, url, **kwargs):
+        """Make an HTTP request, recording its latency and status under `endpoint`"""
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException:
+            API_REQUESTS.inc(endpoint=endpoint, status='error')
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+
+        API_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+        if response.status_code == 429:
+            API_RATE_LIMITED.inc(endpoint=endpoint)
+        return response
+
     def _request_token(self):
         """Request a new OAuth token from Petfinder."""
         auth_url = f"{self.base_url}/oauth2/token"
@@ -46,7 +78,7 @@ class PetfinderClient:
             'client_id': self.api_key,
             'client_secret': self.api_secret
         }
-        resp = requests.post(auth_url, data=data)
+        resp = self._send('token', 'POST', auth_url, data=data)
         resp.raise_for_status()
         body = resp.json()
         self.token = body.get('access_token')
@@ -67,12 +99,12 @@ class PetfinderClient:
         return {'Authorization': f'Bearer {self.token}'}
 
     def get_types(self):
-        response = requests.get(f"{self.base_url}/types", headers=self._get_headers())
+        response = self._send('types', 'GET', f"{self.base_url}/types", headers=self._get_headers())
         response.raise_for_status()
         return response.json()
 
     def get_breeds(self, animal_type):
-        response = requests.get(f"{self.base_url}/types/{animal_type}/breeds", headers=self._get_headers())
+        response = self._send('breeds', 'GET', f"{self.base_url}/types/{animal_type}/breeds", headers=self._get_headers())
         response.raise_for_status()
         return response.json()
 
@@ -84,16 +116,16 @@ class PetfinderClient:
         # Small spacing to respect rate limits
         time.sleep(0.02)
 
-        response = requests.get(f"{self.base_url}/animals", headers=self._get_headers(), params=params)
+        response = self._send('animals', 'GET', f"{self.base_url}/animals", headers=self._get_headers(), params=params)
         if response.status_code == 401:
             # Token may have expired - refresh and retry once
             self.token = None
-            response = requests.get(f"{self.base_url}/animals", headers=self._get_headers(), params=params)
+            response = self._send('animals', 'GET', f"{self.base_url}/animals", headers=self._get_headers(), params=params)
 
         response.raise_for_status()
         return response.json()
 
     def get_organization(self, org_id):
-        response = requests.get(f"{self.base_url}/organizations/{org_id}", headers=self._get_headers())
+        response = self._send('organization', 'GET', f"{self.base_url}/organizations/{org_id}", headers=self._get_headers())
         response.raise_for_status()
         return response.json()
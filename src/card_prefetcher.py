@@ -0,0 +1,119 @@
+"""
+Card Prefetcher
+Loads the photo and risk explanation of upcoming swipe cards on a small per-session thread pool
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .matching import expand_match
+from .photo_cache import get_cached_thumbnail, get_first_photo_url, get_thumbnail, read_thumbnail
+
+
+PREFETCH_WORKERS = 2
+# Upcoming cards whose photo and explanation are loaded in the background while the current card is shown
+PREFETCH_CARDS = 5
+MAX_PREFETCHED_CARDS = 20
+
+
+def load_card(pet, fetch_photo=True, db_path='db/app.db'):
+    """
+    Everything display_pet_card needs for one pet ranked with expand=False
+
+    Args:
+        fetch_photo: Download the photo if its thumbnail is not cached; with
+                     False the card falls back to the remote photo URL
+
+    Returns:
+        Copy of the pet with risk_result, photo_url and 'photo_path' (local
+        thumbnail path, or None); see card_photo()
+    """
+    card = expand_match(pet)
+    card['photo_url'] = get_first_photo_url(pet['id'], db_path)
+    card['photo_path'] = None
+
+    if card['photo_url']:
+        if fetch_photo:
+            card['photo_path'] = get_thumbnail(card['photo_url'], db_path)
+        else:
+            card['photo_path'] = get_cached_thumbnail(card['photo_url'], db_path)
+    return card
+
+
+def card_photo(card):
+    """
+    What to show for a card's photo: thumbnail bytes, the remote URL, or None
+
+    Thumbnails are read from the photo cache when the card is shown, so cards
+    kept in session state hold only a path.
+    """
+    photo = read_thumbnail(card['photo_path']) if card.get('photo_path') else None
+    return photo or card.get('photo_url')
+
+
+class CardPrefetcher:
+    """
+    Warms cards for the pets after the one on screen
+
+    Meant to live in st.session_state, one per session. Workers never call
+    Streamlit; they only read the database and photo cache. Idle worker
+    threads exit once the session (and with it the executor) is discarded.
+    """
+
+    def __init__(self, workers=PREFETCH_WORKERS, max_in_flight=PREFETCH_CARDS,
+                 max_cards=MAX_PREFETCHED_CARDS, db_path='db/app.db'):
+        self.db_path = db_path
+        self.max_in_flight = max_in_flight
+        self.max_cards = max_cards
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='card-prefetch')
+        self._futures = OrderedDict()  # pet ID -> Future of load_card()
+        self._shown_id = None  # Pet of the last get(), whose load is never cancelled
+
+    def _submit(self, pet):
+        self._futures[pet['id']] = self._pool.submit(load_card, pet, True, self.db_path)
+
+    def prefetch(self, pets):
+        """
+        Start loading cards for pets that are not loaded or loading yet
+
+        Queued loads of pets no longer in `pets` are cancelled, and at most
+        max_in_flight cards are queued or loading at a time.
+        """
+        wanted = {pet['id'] for pet in pets}
+        wanted.add(self._shown_id)
+        for pet_id, future in list(self._futures.items()):
+            if pet_id not in wanted and future.cancel():
+                del self._futures[pet_id]
+
+        in_flight = sum(not future.done() for future in self._futures.values())
+        for pet in pets:
+            if pet['id'] in self._futures:
+                self._futures.move_to_end(pet['id'])
+            elif in_flight < self.max_in_flight:
+                self._submit(pet)
+                in_flight += 1
+
+        # Forget the oldest cards; a future that is still running just finishes unused
+        while len(self._futures) > self.max_cards:
+            _, future = self._futures.popitem(last=False)
+            future.cancel()
+
+    def get(self, pet):
+        """
+        The card for a pet without waiting on the network
+
+        A prefetched card is returned as is. Otherwise the card is built from
+        what is cached locally, and the full card is loaded in the background.
+        """
+        self._shown_id = pet['id']
+        future = self._futures.get(pet['id'])
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()
+
+        if future is None or future.cancelled():
+            self._submit(pet)
+        return load_card(pet, fetch_photo=False, db_path=self.db_path)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
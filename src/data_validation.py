@@ -1,4 +1,3 @@
-import pandas as pd
 from typing import Dict, Any
 
 def validate_animal_data(animal: Dict[str, Any]) -> Dict[str, Any]:
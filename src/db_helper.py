@@ -1,30 +1,145 @@
 import sqlite3
-from datetime import datetime
+import time
+
+# Objects with on_execute(cursor, sql, seconds, rowcount) and on_fetch(cursor, sql, rows, seconds)
+# methods, notified about every statement on connections opened while registered
+_query_listeners = []
+
+
+def add_query_listener(listener):
+    """Start notifying `listener` about statements run through DatabaseHelper connections"""
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+
+
+def remove_query_listener(listener):
+    """Stop notifying `listener`"""
+    if listener in _query_listeners:
+        _query_listeners.remove(listener)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement latency and fetched rows to the query listeners"""
+    
+    _sql = None
+    parameters = None  # parameters of the last execute(); None after executemany()
+    
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        self.parameters = parameters
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in _query_listeners:
+                listener.on_execute(self, sql, elapsed, self.rowcount)
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        self.parameters = None
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in _query_listeners:
+                listener.on_execute(self, sql, elapsed, self.rowcount)
+    
+    def _fetched(self, rows, start):
+        # SQLite does most of a SELECT's work while rows are stepped, so fetches are timed too
+        elapsed = time.perf_counter() - start
+        for listener in _query_listeners:
+            listener.on_fetch(self, self._sql, rows, elapsed)
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, start)
+        return row
+    
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start)
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(1, start)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute) are InstrumentedCursors"""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    # The built-in shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Columns upsert_animal takes from the API; created_at and missed_runs are kept
+ANIMAL_UPSERT_COLUMNS = (
+    'name', 'type', 'species', 'breed', 'age', 'size', 'gender', 'status',
+    'distance', 'description', 'organization_id', 'url', 'trait_flags',
+)
+
 
 class DatabaseHelper:
     def __init__(self, db_path='db/app.db'):
         self.db_path = db_path
     
     def get_connection(self):
-        """Get database connection"""
+        """Get database connection (instrumented while query listeners are registered)"""
+        if _query_listeners:
+            return sqlite3.connect(self.db_path, factory=InstrumentedConnection)
         return sqlite3.connect(self.db_path)
     
     def upsert_animal(self, animal_data):
         """Insert or update an animal record"""
+        # Imported here because risk_engine itself imports db_helper
+        from .risk_engine import pet_trait_flags
+        
+        breed = animal_data.get('breeds', {}).get('primary')
+        trait_flags = pet_trait_flags({
+            'breed': breed,
+            'age': animal_data.get('age'),
+            'size': animal_data.get('size'),
+            'description': animal_data.get('description')
+        })
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO animals 
+        # Update in place so created_at and the row survive, and skip unchanged
+        # rows entirely so update triggers (and the inventory version) stay put
+        cursor.execute(f'''
+            INSERT INTO animals 
             (id, name, type, species, breed, age, size, gender, status, 
-             distance, description, organization_id, url)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             distance, description, organization_id, url, trait_flags)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in ANIMAL_UPSERT_COLUMNS)}
+            WHERE {' OR '.join(f'animals.{column} IS NOT excluded.{column}' for column in ANIMAL_UPSERT_COLUMNS)}
         ''', (
             animal_data.get('id'),
             animal_data.get('name'),
             animal_data.get('type'),
             animal_data.get('species'),
-            animal_data.get('breeds', {}).get('primary'),
+            breed,
             animal_data.get('age'),
             animal_data.get('size'),
             animal_data.get('gender'),
@@ -32,9 +147,16 @@ class DatabaseHelper:
             animal_data.get('distance'),
             animal_data.get('description'),
             animal_data.get('organization_id'),
-            animal_data.get('url')
+            animal_data.get('url'),
+            trait_flags
         ))
         
+        # Seen again, so no longer missing (no trigger watches missed_runs)
+        cursor.execute(
+            'UPDATE animals SET missed_runs = 0 WHERE id = ? AND missed_runs != 0',
+            (animal_data.get('id'),)
+        )
+        
         conn.commit()
         conn.close()
     
@@ -46,10 +168,13 @@ class DatabaseHelper:
         address = org_data.get('address', {})
         contact = org_data.get('contact', {})
         
+        # Geocoded from the zip centroid of its postcode for radius searches
         cursor.execute('''
             INSERT OR REPLACE INTO organizations 
-            (id, name, email, phone, address, city, state, postcode, url)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (id, name, email, phone, address, city, state, postcode, url, latitude, longitude)
+            SELECT ?, ?, ?, ?, ?, ?, ?, p.postcode, ?, z.latitude, z.longitude
+            FROM (SELECT ? AS postcode) p
+            LEFT JOIN zip_centroids z ON z.zip = substr(p.postcode, 1, 5)
         ''', (
             org_data.get('id'),
             org_data.get('name'),
@@ -58,8 +183,8 @@ class DatabaseHelper:
             f"{address.get('address1', '')} {address.get('address2', '')}".strip(),
             address.get('city'),
             address.get('state'),
-            address.get('postcode'),
-            org_data.get('url')
+            org_data.get('url'),
+            address.get('postcode')
         ))
         
         conn.commit()
@@ -84,6 +209,19 @@ class DatabaseHelper:
         conn.commit()
         conn.close()
     
+    def upsert_animal_distances(self, animal_id, distances):
+        """Store an animal's distance from each searched zip code (dict of zip -> miles)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO animal_distances (animal_id, zip, distance) VALUES (?, ?, ?)
+            ON CONFLICT (animal_id, zip) DO UPDATE SET distance = excluded.distance
+        ''', [(animal_id, zip_code, distance) for zip_code, distance in distances.items()])
+        
+        conn.commit()
+        conn.close()
+    
     def get_animal_count(self):
         """Get total number of animals in database"""
         conn = self.get_connection()
@@ -92,3 +230,18 @@ class DatabaseHelper:
         count = cursor.fetchone()[0]
         conn.close()
         return count
+    
+    def bump_inventory_version(self):
+        """Mark the inventory as changed so caches keyed on the version are rebuilt
+        
+        Triggers already bump the version on every inventory write; this is for
+        changes they cannot see, such as edits to how pets are scored.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO meta (key, value) VALUES ('inventory_version', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+        ''')
+        conn.commit()
+        conn.close()
@@ -0,0 +1,445 @@
+"""
+Fake Petfinder
+Deterministic Petfinder v2 payloads and a local HTTP stub of the API for offline ETL runs and load tests
+
+Every animal is generated from (seed, index) alone, so any page of a 100k animal
+inventory can be served without holding the inventory in memory, and two runs
+with the same seed see identical data.
+
+Usage:
+    python src/fake_petfinder.py [--port 8765] [--animals 10000] [--latency 0.05] [--rate-limit 50]
+    PETFINDER_BASE_URL=http://127.0.0.1:8765/v2 python etl/run_daily.py
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from src.risk_engine import SHEDDING_KEYWORDS, ONLY_PET_KEYWORDS, SEPARATION_ANXIETY_KEYWORDS
+
+
+# Breeds that hit every breed keyword list in the risk engine, plus plain ones
+DOG_BREEDS = [
+    'Siberian Husky', 'Border Collie', 'Australian Shepherd', 'Jack Russell Terrier',
+    'Australian Cattle Dog', 'Belgian Malinois', 'German Shepherd Dog', 'Labrador Retriever',
+    'Golden Retriever', 'Beagle', 'Chihuahua', 'Dachshund', 'Basset Hound', 'Pembroke Welsh Corgi',
+    'Chow Chow', 'Akita', 'Alaskan Malamute', 'Shiba Inu', 'Basenji', 'American Bulldog',
+    'Boxer', 'Poodle', 'Shih Tzu', 'Maltese', 'Mixed Breed'
+]
+CAT_BREEDS = ['Domestic Short Hair', 'Domestic Medium Hair', 'Siamese', 'Maine Coon', 'Tabby']
+
+TYPES = {
+    'Dog': {'breeds': DOG_BREEDS, 'coats': ['Short', 'Medium', 'Long', 'Wire', 'Curly'],
+            'colors': ['Black', 'Brown / Chocolate', 'Golden', 'White / Cream', 'Tricolor']},
+    'Cat': {'breeds': CAT_BREEDS, 'coats': ['Short', 'Medium', 'Long'],
+            'colors': ['Black', 'Gray / Blue / Silver', 'Orange / Red', 'Tabby (Brown / Chocolate)']},
+}
+DOG_SHARE = 0.7
+
+AGES = ['Baby', 'Young', 'Adult', 'Senior']
+SIZES = ['Small', 'Medium', 'Large', 'Extra Large']
+GENDERS = ['Male', 'Female']
+NAMES = ['Buddy', 'Luna', 'Max', 'Bella', 'Charlie', 'Daisy', 'Rocky', 'Molly', 'Milo', 'Coco']
+STATES = [('Springfield', 'IL', '62701'), ('Boston', 'MA', '02139'), ('Austin', 'TX', '78701'),
+          ('Portland', 'OR', '97201'), ('Denver', 'CO', '80202')]
+
+# Every description keyword list in the risk engine is represented
+DESCRIPTION_PHRASES = (
+    ['Loves walks and belly rubs.', 'Great with kids.', 'House trained and crate trained.', '']
+    + [f'A bit {keyword} at first.' for keyword in SEPARATION_ANXIETY_KEYWORDS]
+    + [f'Note: {keyword} seasonally.' for keyword in SHEDDING_KEYWORDS]
+    + [f'Must be placed as {keyword}.' if keyword == 'only pet' else f'{keyword.capitalize()}.'
+       for keyword in ONLY_PET_KEYWORDS]
+)
+
+ADOPTABLE_SHARE = 0.9
+MAX_PAGE_SIZE = 100
+PUBLISHED_DAYS = 7
+
+
+class FakePetfinderData:
+    """Deterministic Petfinder v2 payloads for `animal_count` animals and `organization_count` orgs"""
+
+    def __init__(self, seed=0, animal_count=1000, organization_count=50, now=None):
+        self.seed = seed
+        self.animal_count = animal_count
+        self.organization_count = organization_count
+        self.now = now or datetime(2025, 1, 8)
+        self._ids_by_type = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, *key):
+        return random.Random(zlib.crc32(repr((self.seed,) + key).encode()))
+
+    def _animal_type(self, index):
+        return 'Dog' if self._rng('type', index).random() < DOG_SHARE else 'Cat'
+
+    def _animal_status(self, index):
+        return 'adoptable' if self._rng('status', index).random() < ADOPTABLE_SHARE else 'adopted'
+
+    def animal(self, index, location=None):
+        """Animal `index` in the /animals response shape"""
+        rng = self._rng('animal', index)
+        animal_type = self._animal_type(index)
+        breed = rng.choice(TYPES[animal_type]['breeds'])
+        animal_id = 100000 + index
+        published_at = self.now - timedelta(days=PUBLISHED_DAYS) * (index / max(self.animal_count, 1))
+        photos = [
+            {size: f'https://photos.example.org/{animal_id}/{n}?width={width}'
+             for size, width in (('small', 100), ('medium', 300), ('large', 600), ('full', 1200))}
+            for n in range(1, rng.randint(0, 3) + 1)
+        ]
+
+        return {
+            'id': animal_id,
+            'organization_id': f'ORG{index % self.organization_count}',
+            'url': f'https://www.petfinder.example/{animal_type.lower()}/{animal_id}',
+            'type': animal_type,
+            'species': animal_type,
+            'breeds': {
+                'primary': breed,
+                'secondary': None,
+                'mixed': breed == 'Mixed Breed',
+                'unknown': False
+            },
+            'colors': {'primary': rng.choice(TYPES[animal_type]['colors']), 'secondary': None, 'tertiary': None},
+            'age': rng.choice(AGES),
+            'gender': rng.choice(GENDERS),
+            'size': rng.choice(SIZES),
+            'coat': rng.choice(TYPES[animal_type]['coats']),
+            'attributes': {
+                'spayed_neutered': rng.random() < 0.8,
+                'house_trained': rng.random() < 0.6,
+                'special_needs': rng.random() < 0.05,
+                'shots_current': rng.random() < 0.9
+            },
+            'environment': {
+                'children': rng.choice([True, False, None]),
+                'dogs': rng.choice([True, False, None]),
+                'cats': rng.choice([True, False, None])
+            },
+            'tags': [],
+            'name': f'{rng.choice(NAMES)} {index}',
+            'description': ' '.join(rng.sample(DESCRIPTION_PHRASES, 2)).strip(),
+            'photos': photos,
+            'primary_photo_cropped': photos[0] if photos else None,
+            'status': self._animal_status(index),
+            'published_at': published_at.strftime('%Y-%m-%dT%H:%M:%S+0000'),
+            'distance': self.distance(index, location),
+            'contact': {'email': f'adopt@org{index % self.organization_count}.example.org'},
+            '_links': {
+                'self': {'href': f'/v2/animals/{animal_id}'},
+                'type': {'href': f'/v2/types/{animal_type.lower()}'},
+                'organization': {'href': f'/v2/organizations/ORG{index % self.organization_count}'}
+            }
+        }
+
+    def distance(self, index, location):
+        """Stable distance in miles between animal `index` and a search location"""
+        if location is None:
+            return None
+        return round(self._rng('distance', index, str(location)).uniform(0, 100), 4)
+
+    def _matching_indexes(self, animal_type, status):
+        key = (animal_type, status)
+        with self._lock:
+            if key not in self._ids_by_type:
+                self._ids_by_type[key] = [
+                    index for index in range(self.animal_count)
+                    if (animal_type is None or self._animal_type(index) == animal_type)
+                    and (status is None or self._animal_status(index) == status)
+                ]
+            return self._ids_by_type[key]
+
+    def animals_page(self, animal_type=None, location=None, page=1, limit=20, status='adoptable'):
+        """One page of /animals, newest first, with Petfinder-style pagination"""
+        if animal_type:
+            animal_type = animal_type.capitalize()
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+
+        indexes = self._matching_indexes(animal_type, status)
+        total_pages = (len(indexes) + limit - 1) // limit
+        page_indexes = indexes[(page - 1) * limit:page * limit]
+
+        pagination = {
+            'count_per_page': limit,
+            'total_count': len(indexes),
+            'current_page': page,
+            'total_pages': total_pages,
+            '_links': {}
+        }
+        query = {'limit': limit}
+        if animal_type:
+            query['type'] = animal_type.lower()
+        if location:
+            query['location'] = location
+        if page < total_pages:
+            pagination['_links']['next'] = {'href': '/v2/animals?' + urlencode({**query, 'page': page + 1})}
+        if page > 1:
+            pagination['_links']['previous'] = {'href': '/v2/animals?' + urlencode({**query, 'page': page - 1})}
+
+        return {
+            'animals': [self.animal(index, location) for index in page_indexes],
+            'pagination': pagination
+        }
+
+    def organization(self, org_id):
+        """The /organizations/{id} payload, or None for unknown IDs"""
+        if not org_id.startswith('ORG') or not org_id[3:].isdigit():
+            return None
+        number = int(org_id[3:])
+        if number >= self.organization_count:
+            return None
+
+        rng = self._rng('organization', number)
+        city, state, postcode = rng.choice(STATES)
+        return {
+            'organization': {
+                'id': org_id,
+                'name': f'{city} Animal Rescue {number}',
+                'email': f'adopt@org{number}.example.org',
+                'phone': f'555-{number:04d}',
+                'address': {
+                    'address1': f'{rng.randint(1, 999)} Main St',
+                    'address2': None,
+                    'city': city,
+                    'state': state,
+                    'postcode': postcode,
+                    'country': 'US'
+                },
+                'url': f'https://www.petfinder.example/member/{org_id}',
+                '_links': {'self': {'href': f'/v2/organizations/{org_id}'}}
+            }
+        }
+
+    def types(self):
+        """The /types payload"""
+        return {
+            'types': [
+                {
+                    'name': name,
+                    'coats': spec['coats'],
+                    'colors': spec['colors'],
+                    'genders': GENDERS,
+                    '_links': {
+                        'self': {'href': f'/v2/types/{name.lower()}'},
+                        'breeds': {'href': f'/v2/types/{name.lower()}/breeds'}
+                    }
+                }
+                for name, spec in TYPES.items()
+            ]
+        }
+
+    def breeds(self, animal_type):
+        """The /types/{type}/breeds payload, or None for unknown types"""
+        spec = TYPES.get(animal_type.capitalize())
+        if spec is None:
+            return None
+        return {'breeds': [{'name': breed} for breed in spec['breeds']]}
+
+
+class _RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of the same size"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FakePetfinderHandler(BaseHTTPRequestHandler):
+    """Serves FakePetfinderData with Petfinder's auth, paging and error behaviour"""
+
+    server_version = 'FakePetfinder/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status, title, detail, headers=None):
+        self._send_json(status, {
+            'type': f'https://www.petfinder.com/developers/v2/docs/errors/ERR-{status}/',
+            'status': status,
+            'title': title,
+            'detail': detail
+        }, headers)
+
+    def _admit(self):
+        """Apply latency and rate limiting; returns False once a 429 was sent"""
+        self.server.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.rate_limiter and not self.server.rate_limiter.allow():
+            self.server.rejected_count += 1
+            self._send_error(429, 'Too Many Requests', 'Rate limit exceeded', {'Retry-After': '1'})
+            return False
+        return True
+
+    def _path(self):
+        path = urlparse(self.path).path.rstrip('/')
+        return path[len('/v2'):] if path.startswith('/v2') else path
+
+    def do_POST(self):
+        if not self._admit():
+            return
+        if self._path() != '/oauth2/token':
+            self._send_error(404, 'Not Found', 'Unknown endpoint')
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        if form.get('grant_type') != ['client_credentials'] or not form.get('client_id'):
+            self._send_error(401, 'Unauthorized', 'Invalid client credentials')
+            return
+
+        token = secrets.token_hex(16)
+        with self.server.lock:
+            self.server.tokens[token] = time.monotonic() + self.server.token_expires_in
+        self._send_json(200, {
+            'token_type': 'Bearer',
+            'expires_in': self.server.token_expires_in,
+            'access_token': token
+        })
+
+    def do_GET(self):
+        if not self._admit():
+            return
+
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        with self.server.lock:
+            expires_at = self.server.tokens.get(token)
+        if expires_at is None or expires_at < time.monotonic():
+            self._send_error(401, 'Unauthorized', 'Access token invalid or expired')
+            return
+
+        data = self.server.data
+        path = self._path()
+        query = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+
+        try:
+            if path == '/animals':
+                body = data.animals_page(
+                    animal_type=query.get('type'),
+                    location=query.get('location'),
+                    page=query.get('page', 1),
+                    limit=query.get('limit', 20),
+                    status=query.get('status', 'adoptable')
+                )
+            elif path == '/types':
+                body = data.types()
+            elif path.startswith('/types/') and path.endswith('/breeds'):
+                body = data.breeds(path.split('/')[2])
+            elif path.startswith('/organizations/'):
+                body = data.organization(path.split('/')[2])
+            else:
+                body = None
+        except ValueError:
+            self._send_error(400, 'Invalid Request', 'Invalid query parameter')
+            return
+
+        if body is None:
+            self._send_error(404, 'Not Found', 'Unable to find resource')
+            return
+        self._send_json(200, body)
+
+
+class FakePetfinderServer(ThreadingHTTPServer):
+    """
+    Local Petfinder API stub
+
+    Args:
+        data: FakePetfinderData to serve
+        latency: Seconds added to every response
+        rate_limit: Requests per second before answering 429 (None for unlimited)
+        token_expires_in: Lifetime of issued access tokens in seconds
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), data=None, latency=0.0, rate_limit=None,
+                 token_expires_in=3600, verbose=False):
+        super().__init__(address, FakePetfinderHandler)
+        self.data = data or FakePetfinderData()
+        self.latency = latency
+        self.rate_limiter = _RateLimiter(rate_limit) if rate_limit else None
+        self.token_expires_in = token_expires_in
+        self.verbose = verbose
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.rejected_count = 0
+
+    @property
+    def base_url(self):
+        """Value for PETFINDER_BASE_URL / PetfinderClient(base_url=...)"""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v2'
+
+
+def start_fake_server(**kwargs):
+    """Start a FakePetfinderServer on a free port in a background thread; call .shutdown() to stop"""
+    server = FakePetfinderServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Petfinder v2 API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--animals', type=int, default=10000, help="Number of animals")
+    parser.add_argument('--organizations', type=int, default=50, help="Number of organizations")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Requests per second before 429s")
+    parser.add_argument('--token-expires-in', type=int, default=3600)
+    args = parser.parse_args()
+
+    server = FakePetfinderServer(
+        (args.host, args.port),
+        data=FakePetfinderData(args.seed, args.animals, args.organizations),
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        token_expires_in=args.token_expires_in,
+        verbose=True
+    )
+    print(f"🐾 Fake Petfinder API with {args.animals} animals at {server.base_url}")
+    print(f"   export PETFINDER_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
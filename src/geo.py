@@ -0,0 +1,207 @@
+"""
+Geo Search
+Geocodes zip codes from the bundled centroid table and finds organizations and animals within a radius
+
+Organizations are geocoded from their postcode when stored and indexed in the
+organization_locations R*Tree, so a radius query is an index probe on the
+bounding box of the circle followed by an exact great-circle check of the few
+candidates, both inside SQLite.
+
+Usage:
+    python src/geo.py 02139 25     # organizations within 25 miles of 02139
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import gzip
+import math
+
+from src.db_helper import DatabaseHelper
+
+
+# zip,lat,lon for every US zip code, from GeoNames (CC BY 4.0, geonames.org)
+ZIP_CENTROIDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'zip_centroids.csv.gz'
+)
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# Distances offered by the app filters and accepted for saved searches
+RADIUS_CHOICES_MILES = (10, 25, 50, 100)
+
+# Great-circle distance from an origin to the organization joined as `o`
+DISTANCE_SQL = 'distance_miles(?, ?, o.latitude, o.longitude)'
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles, or None if either point is unknown"""
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def register_distance_function(conn):
+    """Expose haversine_miles to SQL as distance_miles(lat1, lon1, lat2, lon2)"""
+    conn.create_function('distance_miles', 4, haversine_miles, deterministic=True)
+
+
+def bounding_box(lat, lon, miles):
+    """(min_lat, max_lat, min_lon, max_lon) of a box containing the circle of `miles` around a point"""
+    lat_delta = miles / MILES_PER_DEGREE_LAT
+    # Degrees of longitude shrink toward the poles; use the widest latitude in the box
+    widest = min(89.0, abs(lat) + lat_delta)
+    lon_delta = miles / (MILES_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def normalize_zip(zip_code):
+    """First five digits of a US postcode ('02139-4307' -> '02139'), or None"""
+    if not zip_code:
+        return None
+    digits = str(zip_code).strip()[:5]
+    return digits if len(digits) == 5 and digits.isdigit() else None
+
+
+def load_zip_centroids(conn, path=ZIP_CENTROIDS_PATH):
+    """
+    Replace the zip_centroids table with the bundled centroid file
+
+    Returns:
+        Number of zip codes loaded
+    """
+    with gzip.open(path, 'rt', newline='') as f:
+        rows = [(row['zip'], float(row['lat']), float(row['lon'])) for row in csv.DictReader(f)]
+
+    conn.execute('DELETE FROM zip_centroids')
+    conn.executemany(
+        'INSERT INTO zip_centroids (zip, latitude, longitude) VALUES (?, ?, ?)', rows
+    )
+    return len(rows)
+
+
+def geocode_zip(zip_code, conn=None, db_path='db/app.db'):
+    """(latitude, longitude) of a zip code's centroid, or None if it is unknown"""
+    zip_code = normalize_zip(zip_code)
+    if zip_code is None:
+        return None
+
+    own_conn = conn is None
+    if own_conn:
+        conn = DatabaseHelper(db_path).get_connection()
+    try:
+        row = conn.execute(
+            'SELECT latitude, longitude FROM zip_centroids WHERE zip = ?', (zip_code,)
+        ).fetchone()
+        return tuple(row) if row else None
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def radius_from(origin, miles):
+    """
+    FROM clause of adoptable-animal queries limited to organizations within `miles` of origin
+
+    Replaces "FROM animals a": animals are `a` and their organization `o`, so
+    DISTANCE_SQL can be selected too. The joins are written as CROSS JOINs,
+    which SQLite never reorders, so the R*Tree is probed first and animals are
+    reached through idx_animals_organization instead of being scanned. The
+    connection must have register_distance_function() applied.
+
+    Args:
+        origin: (latitude, longitude), e.g. from geocode_zip()
+
+    Returns:
+        Tuple of (SQL, parameters)
+    """
+    lat, lon = origin
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, miles)
+    sql = f'''
+        FROM organization_locations loc
+        CROSS JOIN organizations o
+          ON o.rowid = loc.id
+         AND loc.min_lat <= ? AND loc.max_lat >= ? AND loc.min_lon <= ? AND loc.max_lon >= ?
+         AND {DISTANCE_SQL} <= ?
+        CROSS JOIN animals a ON a.organization_id = o.id
+    '''
+    return sql, [max_lat, min_lat, max_lon, min_lon, lat, lon, miles]
+
+
+def find_organizations_within(zip_code, miles, db_path='db/app.db'):
+    """
+    Organizations within `miles` of a zip code, nearest first
+
+    Returns:
+        List of (organization ID, name, distance in miles); empty for an unknown zip
+    """
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        origin = geocode_zip(zip_code, conn)
+        if origin is None:
+            return []
+        register_distance_function(conn)
+
+        lat, lon = origin
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, miles)
+        rows = conn.execute(f'''
+            SELECT o.id, o.name, {DISTANCE_SQL} AS miles
+            FROM organization_locations loc
+            JOIN organizations o ON o.rowid = loc.id
+            WHERE loc.min_lat <= ? AND loc.max_lat >= ? AND loc.min_lon <= ? AND loc.max_lon >= ?
+              AND miles <= ?
+            ORDER BY miles
+        ''', (lat, lon, max_lat, min_lat, max_lon, min_lon, miles)).fetchall()
+        return [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def find_animals_within(zip_code, miles, db_path='db/app.db'):
+    """
+    IDs and distances of adoptable animals within `miles` of a zip code, nearest first
+
+    Returns:
+        List of (animal ID, distance in miles); empty for an unknown zip
+    """
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        origin = geocode_zip(zip_code, conn)
+        if origin is None:
+            return []
+        register_distance_function(conn)
+
+        from_sql, from_params = radius_from(origin, miles)
+        rows = conn.execute(f'''
+            SELECT a.id, {DISTANCE_SQL} AS miles
+            {from_sql}
+            WHERE a.status = 'adoptable'
+            ORDER BY miles
+        ''', [*origin, *from_params]).fetchall()
+        return [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python src/geo.py ZIP MILES")
+        sys.exit(1)
+
+    zip_code, miles = sys.argv[1], float(sys.argv[2])
+    if geocode_zip(zip_code) is None:
+        print(f"❌ Unknown zip code {zip_code}")
+        sys.exit(1)
+
+    organizations = find_organizations_within(zip_code, miles)
+    animals = find_animals_within(zip_code, miles)
+    print(f"📍 {len(organizations)} organization(s) and {len(animals)} adoptable animal(s) within {miles:g} miles of {zip_code}")
+    for org_id, name, distance in organizations:
+        print(f"   {distance:6.1f} mi  {org_id}  {name}")
@@ -0,0 +1,83 @@
+"""
+Inventory Metrics
+Reads the pre-aggregated inventory_metrics and distance_histogram tables that triggers keep current on every ingest
+"""
+
+from datetime import datetime
+
+from .db_helper import DatabaseHelper
+
+
+def get_median_distance(conn):
+    """
+    Median distance of adoptable animals from the trigger-maintained distance_histogram
+
+    Walks one row per distinct distance (about one per organization), not per animal.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT distance, count FROM distance_histogram WHERE count > 0 ORDER BY distance')
+    histogram = cursor.fetchall()
+    n = sum(count for _, count in histogram)
+    if n == 0:
+        return None
+
+    # Even counts average the two middle values, matching pandas' median()
+    positions = [(n - 1) // 2, n // 2]
+    middle = []
+    seen = 0
+    for distance, count in histogram:
+        seen += count
+        while positions and positions[0] < seen:
+            middle.append(distance)
+            positions.pop(0)
+        if not positions:
+            break
+    return sum(middle) / len(middle)
+
+
+def get_inventory_summary(today=None, db_path='db/app.db'):
+    """
+    Get dashboard metrics for adoptable animals without scanning the animals table
+
+    Args:
+        today: ISO date used for "new today" (default: local date)
+
+    Returns:
+        Dictionary with total, new_today, median_distance, searches_count and
+        by_species / by_age / by_size lists of (value, count), largest first
+    """
+    if today is None:
+        today = datetime.now().date().isoformat()
+
+    db = DatabaseHelper(db_path)
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT dimension, value, count FROM inventory_metrics WHERE count > 0 ORDER BY count DESC, value')
+    breakdowns = {'species': [], 'age': [], 'size': []}
+    total = 0
+    new_today = 0
+    for dimension, value, count in cursor.fetchall():
+        if dimension == 'total':
+            total = count
+        elif dimension == 'date_added':
+            if value == today:
+                new_today = count
+        elif value:  # unknown values are left out, like pandas value_counts()
+            breakdowns[dimension].append((value, count))
+
+    cursor.execute('SELECT COUNT(*) FROM saved_searches')
+    searches_count = cursor.fetchone()[0]
+
+    median_distance = get_median_distance(conn)
+    conn.close()
+
+    return {
+        'total': total,
+        'new_today': new_today,
+        'median_distance': median_distance,
+        'searches_count': searches_count,
+        'by_species': breakdowns['species'],
+        'by_age': breakdowns['age'],
+        'by_size': breakdowns['size']
+    }
@@ -0,0 +1,134 @@
+"""
+Inventory Version
+Cheap change detection for the adoptable inventory, for caches that should invalidate exactly when data changes
+
+Triggers on animals, photos and organizations bump meta.inventory_version on
+every insert, delete and update of the columns caches read, so equal versions
+mean nothing a cache was built from has changed.
+
+Usage:
+    python src/inventory_version.py            # print the current version
+    python src/inventory_version.py --watch    # print every change until Ctrl+C
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlite3
+import threading
+import time
+
+from src.db_helper import DatabaseHelper
+from src.migrations import INVENTORY_VERSION_KEY
+
+
+POLL_INTERVAL_SECONDS = 2.0
+
+
+def current_inventory_version(conn=None, db_path='db/app.db'):
+    """
+    Read the inventory version (a single primary-key lookup)
+
+    Args:
+        conn: Open connection to reuse (default: open and close one)
+
+    Returns:
+        Integer that changes whenever inventory rows change; 0 before migration 6
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = DatabaseHelper(db_path).get_connection()
+    try:
+        row = conn.execute(
+            'SELECT value FROM meta WHERE key = ?', (INVENTORY_VERSION_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError:  # No meta table yet
+        row = None
+    finally:
+        if own_conn:
+            conn.close()
+    return row[0] if row else 0
+
+
+class InventoryWatcher:
+    """
+    Polls for inventory changes over one long-lived connection
+
+    PRAGMA data_version only changes when another connection commits, so most
+    polls do not read the meta table at all.
+    """
+
+    def __init__(self, db_path='db/app.db'):
+        # Plain connection: it is used from watch_inventory()'s thread, and polls
+        # every few seconds would only clutter query statistics
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._data_version = self._read_data_version()
+        self.version = current_inventory_version(self.conn)
+
+    def _read_data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def poll(self):
+        """Return the new inventory version if it changed since the last poll, else None"""
+        data_version = self._read_data_version()
+        if data_version == self._data_version:
+            return None
+        self._data_version = data_version
+
+        version = current_inventory_version(self.conn)
+        if version == self.version:
+            return None  # Another table was written
+        self.version = version
+        return version
+
+    def wait_for_change(self, timeout=None, interval=POLL_INTERVAL_SECONDS):
+        """Block until the inventory changes; returns the new version, or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            version = self.poll()
+            if version is not None:
+                return version
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(interval if deadline is None else max(0, min(interval, deadline - time.monotonic())))
+
+    def close(self):
+        self.conn.close()
+
+
+def watch_inventory(callback, interval=POLL_INTERVAL_SECONDS, db_path='db/app.db'):
+    """
+    Call callback(version) from a daemon thread whenever the inventory changes
+
+    Returns:
+        threading.Event; set it to stop watching
+    """
+    stop = threading.Event()
+    watcher = InventoryWatcher(db_path)
+
+    def run():
+        try:
+            while not stop.wait(interval):
+                version = watcher.poll()
+                if version is not None:
+                    callback(version)
+        finally:
+            watcher.close()
+
+    threading.Thread(target=run, name='inventory-watcher', daemon=True).start()
+    return stop
+
+
+if __name__ == "__main__":
+    if '--watch' in sys.argv:
+        watcher = InventoryWatcher()
+        print(f"👀 Inventory version {watcher.version}; waiting for changes (Ctrl+C to stop)")
+        try:
+            while True:
+                print(f"🔄 Inventory changed: version {watcher.wait_for_change()}")
+        except KeyboardInterrupt:
+            watcher.close()
+    else:
+        print(f"📦 Inventory version: {current_inventory_version()}")
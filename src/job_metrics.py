@@ -0,0 +1,263 @@
+"""
+Job Metrics
+Prometheus counters, gauges and histograms for the ETL and email digest jobs
+
+Metrics are exported in the Prometheus text format, either as a file for the
+node_exporter textfile collector (FURFINDR_METRICS_DIR) or from a local HTTP
+port (FURFINDR_METRICS_PORT) while the job runs. Without either setting they
+are only kept in memory.
+
+Usage:
+    python src/job_metrics.py [port]   # serve this process' metrics, for trying out scrapes
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+METRICS_DIR = os.getenv('FURFINDR_METRICS_DIR')
+METRICS_PORT = os.getenv('FURFINDR_METRICS_PORT')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers a fast local SQLite write up to a slow API page
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A metric family: one value per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def _render_sample(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{labels} {total!r}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the metric families of this process and renders them"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+ANIMALS_INGESTED = registry.register(Counter(
+    'furfindr_animals_ingested_total', 'Animals upserted by the ETL', ['species']))
+ANIMALS_ARCHIVED = registry.register(Counter(
+    'furfindr_animals_archived_total', 'Animals moved to animals_archive by reason (stale, not_adoptable)', ['reason']))
+API_REQUESTS = registry.register(Counter(
+    'furfindr_api_requests_total', 'Petfinder API requests by endpoint and HTTP status', ['endpoint', 'status']))
+API_RATE_LIMITED = registry.register(Counter(
+    'furfindr_api_rate_limited_total', 'Petfinder API responses with status 429', ['endpoint']))
+API_LATENCY = registry.register(Histogram(
+    'furfindr_api_request_seconds', 'Petfinder API request latency', ['endpoint']))
+DB_WRITE_LATENCY = registry.register(Histogram(
+    'furfindr_db_write_seconds', 'Latency of ETL database writes', ['operation']))
+EMAILS = registry.register(Counter(
+    'furfindr_digest_emails_total', 'Digest emails by outcome (rendered, sent, failed)', ['outcome']))
+EMAIL_RENDER_LATENCY = registry.register(Histogram(
+    'furfindr_digest_render_seconds', 'Time to select pets for and render one digest email'))
+STAGE_DURATION = registry.register(Gauge(
+    'furfindr_job_stage_duration_seconds', 'Time the job spent in each stage during this run', ['job', 'stage']))
+LAST_SUCCESS = registry.register(Gauge(
+    'furfindr_job_last_success_timestamp_seconds', 'Unix time the job last finished', ['job']))
+
+
+@contextmanager
+def time_stage(job, stage):
+    """Add the duration of a with-block to the stage's total, also when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.inc(time.perf_counter() - start, job=job, stage=stage)
+
+
+def write_textfile(path):
+    """
+    Write all metrics for the node_exporter textfile collector
+
+    The file is written next to its final name and renamed into place, so the
+    collector never reads a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would drown out the job's own output
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    """Serve /metrics from a daemon thread; returns the server so callers can shut it down"""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_job_metrics(job):
+    """Start the HTTP endpoint if FURFINDR_METRICS_PORT is set"""
+    if METRICS_PORT:
+        server = serve_metrics(METRICS_PORT)
+        print(f"📈 Serving {job} metrics on http://127.0.0.1:{server.server_address[1]}/metrics")
+        return server
+    return None
+
+
+def finish_job_metrics(job, succeeded=True):
+    """Mark the job finished and write furfindr_<job>.prom if FURFINDR_METRICS_DIR is set"""
+    if succeeded:
+        LAST_SUCCESS.set(time.time(), job=job)
+    if METRICS_DIR:
+        path = write_textfile(os.path.join(METRICS_DIR, f'furfindr_{job}.prom'))
+        print(f"📈 Metrics written to {path}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    server = serve_metrics(sys.argv[1] if len(sys.argv) > 1 else 9464)
+    print(f"📈 Serving metrics on http://127.0.0.1:{server.server_address[1]}/metrics (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
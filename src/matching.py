@@ -0,0 +1,201 @@
+"""
+Pet Matching
+Ranks pets for an adopter: the k lowest-risk matches, or every match under a risk threshold
+"""
+
+import heapq
+from datetime import datetime
+
+from .db_helper import DatabaseHelper
+from .geo import DISTANCE_SQL, geocode_zip, radius_from, register_distance_function
+from .risk_engine import compile_profile, score_risk, build_risk_result, record_rule_mask
+from .risk_lookup import LOOKUP_JOIN_SQL, build_risk_lookup
+
+
+# Secondary sort keys for pets with the same risk score
+TIE_BREAKS = ('distance', 'recency')
+
+
+def _distance_key(pet):
+    """Nearest first; pets without a distance go last"""
+    distance = pet.get('distance')
+    return (distance is None, distance or 0)
+
+
+def _recency_key(pet):
+    """Newest first; pets without a usable created_at go last"""
+    created_at = pet.get('created_at')
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            created_at = None
+    if not isinstance(created_at, datetime):
+        return (True, 0)
+    return (False, -created_at.timestamp())
+
+
+_TIE_BREAK_KEYS = {
+    'distance': _distance_key,
+    'recency': _recency_key,
+}
+
+
+def rank_matches(pets, adopter_profile, k=None, max_score=None, tie_break='distance',
+                 log_triggers=True, expand=True):
+    """
+    Score pets for one adopter and return the best matches, lowest risk first
+
+    Only the returned pets get a full risk_result with explanations; pets that
+    cannot make the cut are scored without building one, and with max_score
+    their evaluation stops as soon as the threshold is exceeded.
+
+    Args:
+        pets: Iterable of pet dictionaries
+        adopter_profile: Adopter dictionary or CompiledProfile
+        k: Return at most this many pets (None for all)
+        max_score: Only return pets with a risk score at or below this value
+        tie_break: 'distance' (nearest first) or 'recency' (newest first) for equal scores;
+                   remaining ties keep the input order
+        log_triggers: Count triggered rules of the returned pets for rule analytics
+        expand: Add the full risk_result; with False only 'risk_score' and 'rule_mask'
+                are added and expand_match() builds the result when a pet is shown
+
+    Returns:
+        List of pet dictionaries with 'risk_result' (or 'risk_score' and 'rule_mask') added
+    """
+    if tie_break not in _TIE_BREAK_KEYS:
+        raise ValueError(f"Unknown tie_break {tie_break!r}, expected one of {TIE_BREAKS}")
+    if k is not None and k <= 0:
+        return []
+
+    tie_break_key = _TIE_BREAK_KEYS[tie_break]
+    profile = compile_profile(adopter_profile)
+
+    scored = []
+    for pet in pets:
+        score, mask = score_risk(profile, pet, stop_above=max_score)
+        if max_score is not None and score > max_score:
+            continue
+        scored.append((score, tie_break_key(pet), mask, pet))
+
+    def sort_key(entry):
+        return entry[0], entry[1]
+
+    # Both are stable, so equal keys keep the input order
+    if k is None or k >= len(scored):
+        best = sorted(scored, key=sort_key)
+    else:
+        best = heapq.nsmallest(k, scored, key=sort_key)
+
+    ranked = []
+    for score, _, mask, pet in best:
+        if log_triggers and mask:
+            record_rule_mask(mask)
+        if expand:
+            pet['risk_result'] = build_risk_result(pet, score, mask)
+        else:
+            pet['risk_score'] = score
+            pet['rule_mask'] = mask
+        ranked.append(pet)
+
+    return ranked
+
+
+def expand_match(pet):
+    """Copy of a pet ranked with expand=False, with its full risk_result"""
+    return dict(pet, risk_result=build_risk_result(pet, pet['risk_score'], pet['rule_mask']))
+
+
+def get_ranked_pets(adopter_profile, limit=None, db_path='db/app.db', expand=True, near=None,
+                    log_triggers=True):
+    """
+    Get adoptable pets ranked from lowest to highest risk, nearest first on ties
+
+    Pets are scored through the risk lookup table, once per distinct trait
+    signature, and ranked in SQL.
+
+    Args:
+        adopter_profile: Adopter dictionary or CompiledProfile
+        limit: Return at most this many pets (None for all)
+        expand: Add risk_result and photo_url; with False pets only get 'risk_score'
+                and 'rule_mask', for callers that load card details on demand
+        near: Optional (zip code, miles); only pets of organizations within that
+              radius are returned, with 'distance' measured from the zip code
+        log_triggers: Count triggered rules of the returned pets for rule analytics
+
+    Returns:
+        List of pet dictionaries with 'risk_result' and 'photo_url'
+    """
+    db = DatabaseHelper(db_path)
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    if near:
+        zip_code, miles = near
+        origin = geocode_zip(zip_code, conn)
+        if origin is None:
+            conn.close()
+            raise ValueError(f"Unknown zip code: {zip_code}")
+        register_distance_function(conn)
+        from_sql, from_params = radius_from(origin, miles)
+        distance_sql = DISTANCE_SQL
+        params = [*origin, *from_params]
+    else:
+        from_sql = 'FROM animals a'
+        distance_sql = 'a.distance'
+        params = []
+
+    build_risk_lookup(adopter_profile, conn)
+
+    query = f'''
+        SELECT a.id, a.name, a.type, a.species, a.breed, a.age, a.size, a.gender,
+               a.description, a.url, {distance_sql} AS miles, l.risk_score, l.rule_mask
+        {from_sql}
+        {LOOKUP_JOIN_SQL}
+        WHERE a.status = 'adoptable'
+        ORDER BY l.risk_score, miles IS NULL, miles, a.id
+    '''
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+
+    ranked = []
+    for row in rows:
+        pet = {
+            'id': row[0],
+            'name': row[1],
+            'type': row[2],
+            'species': row[3],
+            'breed': row[4],
+            'age': row[5],
+            'size': row[6],
+            'gender': row[7],
+            'description': row[8],
+            'url': row[9],
+            'distance': row[10]
+        }
+        score, mask = row[11], row[12]
+        if log_triggers and mask:
+            record_rule_mask(mask, db_path)
+        if expand:
+            pet['risk_result'] = build_risk_result(pet, score, mask)
+        else:
+            pet['risk_score'] = score
+            pet['rule_mask'] = mask
+        ranked.append(pet)
+
+    if not expand:
+        conn.close()
+        return ranked
+
+    # Photos only for the pets actually returned
+    for pet in ranked:
+        cursor.execute('SELECT photo_url FROM photos WHERE animal_id = ? LIMIT 1', (pet['id'],))
+        photo_result = cursor.fetchone()
+        pet['photo_url'] = photo_result[0] if photo_result else None
+
+    conn.close()
+    return ranked
@@ -0,0 +1,795 @@
+"""
+Schema Migrations
+Versioned, transactional upgrades for db/app.db tracked with PRAGMA user_version
+
+Each migration runs inside its own BEGIN IMMEDIATE transaction together with the
+user_version bump, so a failed upgrade leaves the database at the previous
+version. Data backfills run afterwards in small batches (one short transaction
+per batch) so readers such as the Streamlit app are never blocked for long.
+"""
+
+import os
+import sys
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# version: schema version after this migration is applied
+# upgrade: callable(conn) issuing the DDL/DML (use conn.execute, never executescript)
+# backfill: optional callable(conn, batch_size) -> rows changed, run until exhausted
+Migration = namedtuple('Migration', ['version', 'name', 'upgrade', 'backfill'])
+
+BACKFILL_BATCH_SIZE = 500
+BACKFILL_PAUSE_SECONDS = 0.05
+
+
+def batched_update(table, assignments, pending):
+    """
+    Build a backfill step that updates up to `batch_size` pending rows per call
+
+    Args:
+        table: Table to update
+        assignments: SQL SET clause, e.g. "trait_flags = compute_flags(breed)"
+        pending: SQL predicate selecting rows that still need the backfill.
+                 The assignments must make it false, otherwise the backfill never ends.
+    """
+    sql = (
+        f'UPDATE {table} SET {assignments} '
+        f'WHERE rowid IN (SELECT rowid FROM {table} WHERE {pending} LIMIT ?)'
+    )
+
+    def step(conn, batch_size):
+        return conn.execute(sql, (batch_size,)).rowcount
+
+    return step
+
+
+def _baseline_schema(conn):
+    """Version 1: the original FurFindr tables and indexes"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS animals (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            type TEXT,
+            species TEXT,
+            breed TEXT,
+            age TEXT,
+            size TEXT,
+            gender TEXT,
+            status TEXT,
+            distance REAL,
+            description TEXT,
+            organization_id TEXT,
+            url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS organizations (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            city TEXT,
+            state TEXT,
+            postcode TEXT,
+            url TEXT
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS photos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            animal_id TEXT,
+            photo_url TEXT,
+            FOREIGN KEY (animal_id) REFERENCES animals(id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            name TEXT,
+            experience_level TEXT,
+            has_kids INTEGER,
+            kid_ages TEXT,
+            has_other_pets INTEGER,
+            other_pet_types TEXT,
+            home_type TEXT,
+            yard_size TEXT,
+            daily_exercise_minutes INTEGER,
+            work_schedule TEXT,
+            allergies TEXT,
+            noise_tolerance TEXT,
+            training_commitment TEXT,
+            species TEXT,
+            age TEXT,
+            size TEXT,
+            gender TEXT,
+            max_distance INTEGER,
+            last_notified TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            active INTEGER DEFAULT 1
+        )
+    ''')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_type ON animals(type)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_age ON animals(age)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_size ON animals(size)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_status ON animals(status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_created ON animals(created_at)')
+
+    # Bookkeeping for batched backfills that outlive their schema transaction
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            version INTEGER PRIMARY KEY,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _animals_fts(conn):
+    """Version 2: FTS5 index over animal name, breed and description, kept in sync by triggers"""
+    # Stores its own copy of the text keyed by animals.rowid so that every sync
+    # statement is an idempotent delete/insert by rowid.
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS animals_fts USING fts5(
+            name, breed, description
+        )
+    ''')
+
+    # INSERT OR REPLACE on animals removes the old row without firing DELETE
+    # triggers, so drop its index entry before the insert happens.
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS animals_fts_before_insert
+        BEFORE INSERT ON animals
+        BEGIN
+            DELETE FROM animals_fts
+            WHERE rowid = (SELECT rowid FROM animals WHERE id = new.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS animals_fts_after_insert
+        AFTER INSERT ON animals
+        BEGIN
+            INSERT OR REPLACE INTO animals_fts (rowid, name, breed, description)
+            VALUES (new.rowid, new.name, new.breed, new.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS animals_fts_after_update
+        AFTER UPDATE OF name, breed, description ON animals
+        BEGIN
+            DELETE FROM animals_fts WHERE rowid = old.rowid;
+            INSERT OR REPLACE INTO animals_fts (rowid, name, breed, description)
+            VALUES (new.rowid, new.name, new.breed, new.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS animals_fts_after_delete
+        AFTER DELETE ON animals
+        BEGIN
+            DELETE FROM animals_fts WHERE rowid = old.rowid;
+        END
+    ''')
+
+
+def _backfill_animals_fts(conn, batch_size):
+    """Index existing animals that the triggers have not seen yet"""
+    return conn.execute('''
+        INSERT INTO animals_fts (rowid, name, breed, description)
+        SELECT a.rowid, a.name, a.breed, a.description
+        FROM animals a
+        WHERE NOT EXISTS (SELECT 1 FROM animals_fts f WHERE f.rowid = a.rowid)
+        LIMIT ?
+    ''', (batch_size,)).rowcount
+
+
+# (dimension, value expression) pairs counted in inventory_metrics; {row} is the row alias
+INVENTORY_METRIC_DIMENSIONS = (
+    ('total', "''"),
+    ('species', "COALESCE({row}.species, '')"),
+    ('age', "COALESCE({row}.age, '')"),
+    ('size', "COALESCE({row}.size, '')"),
+    ('date_added', "COALESCE(DATE({row}.created_at), '')"),
+)
+
+
+def _metric_keys(row):
+    """SQL VALUES list of (dimension, value) pairs for one animals row alias"""
+    return ', '.join(
+        f"('{dimension}', {expression.format(row=row)})"
+        for dimension, expression in INVENTORY_METRIC_DIMENSIONS
+    )
+
+
+def _inventory_metrics(conn):
+    """Version 3: incrementally maintained counts of adoptable animals per dimension"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_metrics (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        )
+    ''')
+
+    # Lets the dashboard find the median distance with an index probe
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_status_distance ON animals(status, distance)')
+
+    add_sql = f'''
+        INSERT INTO inventory_metrics (dimension, value, count)
+        SELECT column1, column2, 1 FROM (VALUES {_metric_keys('new')})
+        WHERE new.status = 'adoptable'
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+    '''
+    remove_old_sql = f'''
+        UPDATE inventory_metrics SET count = count - 1
+        WHERE old.status = 'adoptable'
+          AND (dimension, value) IN (VALUES {_metric_keys('old')});
+    '''
+    # Same as remove_old_sql for the row an INSERT OR REPLACE is about to overwrite
+    remove_replaced_sql = '''
+        UPDATE inventory_metrics SET count = count - 1
+        WHERE (dimension, value) IN (
+    ''' + '\n            UNION ALL\n'.join(
+        f"            SELECT '{dimension}', {expression.format(row='a')} "
+        f"FROM animals a WHERE a.id = new.id AND a.status = 'adoptable'"
+        for dimension, expression in INVENTORY_METRIC_DIMENSIONS
+    ) + '\n        );'
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS inventory_metrics_before_insert
+        BEFORE INSERT ON animals
+        BEGIN
+            {remove_replaced_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS inventory_metrics_after_insert
+        AFTER INSERT ON animals
+        BEGIN
+            {add_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS inventory_metrics_after_update
+        AFTER UPDATE OF status, species, age, size, created_at ON animals
+        BEGIN
+            {remove_old_sql}
+            {add_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS inventory_metrics_after_delete
+        AFTER DELETE ON animals
+        BEGIN
+            {remove_old_sql}
+        END
+    ''')
+
+    # Seed from current data inside the same transaction so no write is counted twice
+    rebuild_inventory_metrics(conn)
+
+
+def rebuild_inventory_metrics(conn):
+    """Recompute inventory_metrics from scratch (also repairs drift after manual edits)"""
+    conn.execute('DELETE FROM inventory_metrics')
+    for dimension, expression in INVENTORY_METRIC_DIMENSIONS:
+        conn.execute(f'''
+            INSERT INTO inventory_metrics (dimension, value, count)
+            SELECT '{dimension}', {expression.format(row='animals')}, COUNT(*)
+            FROM animals
+            WHERE status = 'adoptable'
+            GROUP BY 2
+        ''')
+
+
+def _rule_trigger_counts(conn):
+    """Version 4: hourly rule trigger counts flushed by src/rule_telemetry.py"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rule_trigger_counts (
+            rule TEXT NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (rule, bucket_start)
+        )
+    ''')
+
+
+def _animal_trait_flags(conn):
+    """Version 5: per-animal risk trait bitmask so animals can be scored by feature signature"""
+    conn.execute('ALTER TABLE animals ADD COLUMN trait_flags INTEGER')
+
+    # Covers the GROUP BY over (trait_flags, age, size) in src/risk_lookup.py
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_status_traits
+        ON animals(status, trait_flags, age, size)
+    ''')
+
+
+def register_trait_flags_function(conn):
+    """Expose risk_engine.pet_trait_flags to SQL as pet_trait_flags(breed, age, size, description)"""
+    # Imported lazily: the engine is only needed while computing trait flags
+    from src.risk_engine import pet_trait_flags
+
+    def trait_flags(breed, age, size, description):
+        return pet_trait_flags({
+            'breed': breed, 'age': age, 'size': size, 'description': description
+        })
+
+    conn.create_function('pet_trait_flags', 4, trait_flags, deterministic=True)
+
+
+def _backfill_animal_trait_flags(conn, batch_size):
+    """Compute trait_flags for animals stored without them"""
+    register_trait_flags_function(conn)
+    step = batched_update(
+        'animals',
+        'trait_flags = pet_trait_flags(breed, age, size, description)',
+        'trait_flags IS NULL'
+    )
+    return step(conn, batch_size)
+
+
+INVENTORY_VERSION_KEY = 'inventory_version'
+
+
+def _meta_table(conn):
+    """Version 6: key/value meta table holding the inventory version that app caches are keyed on"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(
+        'INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)', (INVENTORY_VERSION_KEY,)
+    )
+
+
+# Tables whose changes invalidate anything derived from the adoptable inventory
+INVENTORY_TABLES = ('animals', 'photos', 'organizations')
+
+
+def _inventory_version_triggers(conn):
+    """Version 7: bump meta.inventory_version on every insert, update or delete of inventory rows"""
+    # Row-level, so one ETL transaction bumps the version many times; readers only
+    # compare versions for equality, so any change is enough to invalidate.
+    for table in INVENTORY_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_inventory_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE meta SET value = value + 1 WHERE key = '{INVENTORY_VERSION_KEY}';
+                END
+            ''')
+
+
+def _photo_thumbnails(conn):
+    """Version 8: photo URL -> content hash of its cached thumbnail (see src/photo_cache.py)"""
+    # Not an inventory table, so writing it does not bump the inventory version
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS photo_thumbnails (
+            photo_url TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            last_access TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbnail_hash ON photo_thumbnails(content_hash)')
+
+
+def _organization_locations(conn):
+    """Version 9: zip centroids, geocoded organizations and an R*Tree over their locations (see src/geo.py)"""
+    # Imported lazily: only needed to load the bundled centroid file
+    from src.geo import load_zip_centroids
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS zip_centroids (
+            zip TEXT PRIMARY KEY,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    load_zip_centroids(conn)
+
+    conn.execute('ALTER TABLE organizations ADD COLUMN latitude REAL')
+    conn.execute('ALTER TABLE organizations ADD COLUMN longitude REAL')
+    conn.execute('ALTER TABLE saved_searches ADD COLUMN zip_code TEXT')
+
+    # Points stored as zero-size boxes keyed by organizations.rowid
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS organization_locations USING rtree(
+            id, min_lat, max_lat, min_lon, max_lon
+        )
+    ''')
+
+    # Radius queries reach animals from the organizations found in the R*Tree
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_animals_organization
+        ON animals(organization_id, status)
+    ''')
+
+    add_location_sql = '''
+        INSERT OR REPLACE INTO organization_locations (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT new.rowid, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    '''
+    # Same as for animals_fts: INSERT OR REPLACE does not fire DELETE triggers
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS organization_locations_before_insert
+        BEFORE INSERT ON organizations
+        BEGIN
+            DELETE FROM organization_locations
+            WHERE id = (SELECT rowid FROM organizations WHERE id = new.id);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS organization_locations_after_insert
+        AFTER INSERT ON organizations
+        BEGIN
+            {add_location_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS organization_locations_after_update
+        AFTER UPDATE OF latitude, longitude ON organizations
+        BEGIN
+            DELETE FROM organization_locations WHERE id = old.rowid;
+            {add_location_sql}
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS organization_locations_after_delete
+        AFTER DELETE ON organizations
+        BEGIN
+            DELETE FROM organization_locations WHERE id = old.rowid;
+        END
+    ''')
+
+
+# Geocodes stored organizations; the update trigger indexes them in organization_locations
+_backfill_organization_locations = batched_update(
+    'organizations',
+    'latitude = (SELECT latitude FROM zip_centroids WHERE zip = substr(postcode, 1, 5)), '
+    'longitude = (SELECT longitude FROM zip_centroids WHERE zip = substr(postcode, 1, 5))',
+    'latitude IS NULL AND substr(postcode, 1, 5) IN (SELECT zip FROM zip_centroids)'
+)
+
+
+def _animal_distances(conn):
+    """Version 10: distance of each animal from every zip code the ETL searched around"""
+    # animals.distance keeps the nearest of these; not an inventory table since
+    # nothing the app caches is derived from it
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS animal_distances (
+            animal_id TEXT NOT NULL,
+            zip TEXT NOT NULL,
+            distance REAL,
+            PRIMARY KEY (animal_id, zip)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _animals_archive(conn):
+    """Version 11: missed-run counter for stale listings and the archive they are moved to (see src/stale_listings.py)"""
+    # upsert_animal resets the counter for every animal an ETL run sees
+    conn.execute('ALTER TABLE animals ADD COLUMN missed_runs INTEGER NOT NULL DEFAULT 0')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS animals_archive (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            type TEXT,
+            species TEXT,
+            breed TEXT,
+            age TEXT,
+            size TEXT,
+            gender TEXT,
+            status TEXT,
+            distance REAL,
+            description TEXT,
+            organization_id TEXT,
+            url TEXT,
+            trait_flags INTEGER,
+            created_at TIMESTAMP,
+            archive_reason TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Photos are deleted per animal by upsert_photos and when animals are archived
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_photos_animal ON photos(animal_id)')
+
+
+# Columns that app caches are built from; updates of other inventory columns
+# (missed_runs, trait_flags backfills) do not change the inventory version
+INVENTORY_COLUMNS = {
+    'animals': (
+        'id', 'name', 'type', 'species', 'breed', 'age', 'size', 'gender', 'status',
+        'distance', 'description', 'organization_id', 'url', 'created_at'
+    ),
+    'photos': ('animal_id', 'photo_url'),
+    'organizations': (
+        'id', 'name', 'email', 'phone', 'address', 'city', 'state', 'postcode', 'url',
+        'latitude', 'longitude'
+    ),
+}
+
+
+def _inventory_version_update_columns(conn):
+    """Version 12: bump the inventory version only on updates of INVENTORY_COLUMNS"""
+    for table in INVENTORY_TABLES:
+        conn.execute(f'DROP TRIGGER IF EXISTS {table}_inventory_version_update')
+        conn.execute(f'''
+            CREATE TRIGGER {table}_inventory_version_update
+            AFTER UPDATE OF {', '.join(INVENTORY_COLUMNS[table])} ON {table}
+            BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = '{INVENTORY_VERSION_KEY}';
+            END
+        ''')
+
+
+def _distance_histogram(conn):
+    """Version 13: count of adoptable animals per distance, so the median is found without scanning animals"""
+    # Animals share their organization's distance, so there are about as many
+    # rows as organizations
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS distance_histogram (
+            distance REAL PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    add_sql = '''
+        INSERT INTO distance_histogram (distance, count)
+        SELECT new.distance, 1 WHERE new.status = 'adoptable' AND new.distance IS NOT NULL
+        ON CONFLICT (distance) DO UPDATE SET count = count + 1;
+    '''
+    remove_old_sql = '''
+        UPDATE distance_histogram SET count = count - 1
+        WHERE old.status = 'adoptable' AND distance = old.distance;
+    '''
+    # Same as for inventory_metrics: INSERT OR REPLACE does not fire DELETE triggers
+    remove_replaced_sql = '''
+        UPDATE distance_histogram SET count = count - 1
+        WHERE distance = (
+            SELECT a.distance FROM animals a WHERE a.id = new.id AND a.status = 'adoptable'
+        );
+    '''
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS distance_histogram_before_insert
+        BEFORE INSERT ON animals
+        BEGIN
+            {remove_replaced_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS distance_histogram_after_insert
+        AFTER INSERT ON animals
+        BEGIN
+            {add_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS distance_histogram_after_update
+        AFTER UPDATE OF status, distance ON animals
+        BEGIN
+            {remove_old_sql}
+            {add_sql}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS distance_histogram_after_delete
+        AFTER DELETE ON animals
+        BEGIN
+            {remove_old_sql}
+        END
+    ''')
+
+    # Only served the median query that this histogram replaces
+    conn.execute('DROP INDEX IF EXISTS idx_status_distance')
+
+    rebuild_distance_histogram(conn)
+
+
+def rebuild_distance_histogram(conn):
+    """Recompute distance_histogram from scratch"""
+    conn.execute('DELETE FROM distance_histogram')
+    conn.execute('''
+        INSERT INTO distance_histogram (distance, count)
+        SELECT distance, COUNT(*)
+        FROM animals
+        WHERE status = 'adoptable' AND distance IS NOT NULL
+        GROUP BY distance
+    ''')
+
+
+def _animals_upsert_triggers(conn):
+    """Version 14: drop the INSERT OR REPLACE compensation triggers on animals"""
+    # upsert_animal now updates existing rows in place with INSERT ... ON CONFLICT
+    # DO UPDATE, which fires BEFORE INSERT triggers even when it ends up updating,
+    # so these would remove a row's index entry and counts without re-adding them.
+    # The AFTER UPDATE triggers keep everything in sync instead.
+    for trigger in ('animals_fts_before_insert', 'inventory_metrics_before_insert',
+                    'distance_histogram_before_insert'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+# Ordered list of all migrations. Append new entries; never edit or reorder applied ones.
+MIGRATIONS = [
+    Migration(1, 'baseline schema', _baseline_schema, None),
+    Migration(2, 'animals full-text search', _animals_fts, _backfill_animals_fts),
+    Migration(3, 'inventory metrics summary', _inventory_metrics, None),
+    Migration(4, 'rule trigger counts', _rule_trigger_counts, None),
+    Migration(5, 'animal trait flags', _animal_trait_flags, _backfill_animal_trait_flags),
+    Migration(6, 'meta table', _meta_table, None),
+    Migration(7, 'inventory version triggers', _inventory_version_triggers, None),
+    Migration(8, 'photo thumbnails', _photo_thumbnails, None),
+    Migration(9, 'organization locations', _organization_locations, _backfill_organization_locations),
+    Migration(10, 'animal distances', _animal_distances, None),
+    Migration(11, 'animals archive', _animals_archive, None),
+    Migration(12, 'inventory version update columns', _inventory_version_update_columns, None),
+    Migration(13, 'distance histogram', _distance_histogram, None),
+    Migration(14, 'animals upsert triggers', _animals_upsert_triggers, None),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@contextmanager
+def _autocommit(conn):
+    """Temporarily disable sqlite3's implicit transactions so we control BEGIN/COMMIT"""
+    previous = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        yield conn
+    finally:
+        conn.isolation_level = previous
+
+
+def get_schema_version(conn):
+    """Return the schema version stored in PRAGMA user_version"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def run_backfill(conn, step, batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE_SECONDS):
+    """
+    Run a backfill step in short transactions until it runs out of rows
+
+    Args:
+        conn: sqlite3 connection
+        step: callable(conn, batch_size) returning the number of rows changed
+        batch_size: Rows per transaction
+        pause: Seconds to sleep between batches so other writers can get in
+
+    Returns:
+        Total number of rows changed
+    """
+    total = 0
+    with _autocommit(conn):
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                changed = step(conn, batch_size)
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+            total += changed
+            if changed < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return total
+
+
+def run_pending_backfills(conn, batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE_SECONDS):
+    """Run backfills of applied migrations that have not completed yet"""
+    current = get_schema_version(conn)
+    if current < 1:
+        return []
+
+    done = {row[0] for row in conn.execute('SELECT version FROM schema_backfills')}
+    completed = []
+
+    for migration in MIGRATIONS:
+        if migration.backfill is None or migration.version in done or migration.version > current:
+            continue
+
+        run_backfill(conn, migration.backfill, batch_size, pause)
+        with _autocommit(conn):
+            conn.execute(
+                'INSERT OR IGNORE INTO schema_backfills (version) VALUES (?)',
+                (migration.version,)
+            )
+        completed.append(migration.version)
+
+    return completed
+
+
+def migrate(conn, target=None, run_backfills=True):
+    """
+    Apply pending migrations in order, each in its own transaction
+
+    Args:
+        conn: sqlite3 connection to upgrade
+        target: Stop after this version (default: latest)
+        run_backfills: Also run pending batched backfills once the schema is current
+
+    Returns:
+        List of migration versions applied
+    """
+    if target is None:
+        target = LATEST_VERSION
+
+    applied = []
+    with _autocommit(conn):
+        current = get_schema_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            if migration.version > target:
+                break
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Re-check under the write lock in case another process migrated first
+                if get_schema_version(conn) >= migration.version:
+                    conn.execute('COMMIT')
+                    continue
+
+                migration.upgrade(conn)
+                conn.execute(f'PRAGMA user_version = {int(migration.version)}')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+            applied.append(migration.version)
+
+    if run_backfills:
+        run_pending_backfills(conn)
+
+    return applied
+
+
+def migrate_database(db_path='db/app.db', target=None):
+    """Open `db_path`, apply pending migrations and close it again"""
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return migrate(conn, target=target)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'db/app.db'
+
+    conn = sqlite3.connect(db_path)
+    before = get_schema_version(conn)
+    applied = migrate(conn)
+    after = get_schema_version(conn)
+    conn.close()
+
+    print(f"📦 Schema version: {before} -> {after} (latest: {LATEST_VERSION})")
+    if applied:
+        for version in applied:
+            name = next(m.name for m in MIGRATIONS if m.version == version)
+            print(f"  ✅ Applied {version}: {name}")
+    else:
+        print("  Database already up to date")
@@ -0,0 +1,220 @@
+"""
+Photo Cache
+Downloads animal photos once, resizes them to the card size and keeps them in a content-addressed disk cache
+
+Thumbnails are stored as <cache dir>/<hash[:2]>/<hash>.jpg where hash is the
+SHA-256 of the resized JPEG, so identical photos (shelters reuse placeholder
+images) are stored once. The photo_thumbnails table maps photo URLs to hashes
+and records last access for least-recently-used eviction once the cache grows
+past its size limit.
+
+Usage:
+    python src/photo_cache.py              # prefetch the first photo of every adoptable animal
+    python src/photo_cache.py --evict      # only trim the cache to its size limit
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+from src.db_helper import DatabaseHelper
+
+
+PHOTO_CACHE_DIR = os.getenv('FURFINDR_PHOTO_CACHE_DIR', 'cache/photos')
+MAX_CACHE_BYTES = int(float(os.getenv('FURFINDR_PHOTO_CACHE_MB', '200')) * 1024 * 1024)
+THUMBNAIL_SIZE = (400, 400)  # display_pet_card shows photos 400px wide
+JPEG_QUALITY = 85
+DOWNLOAD_TIMEOUT_SECONDS = 10
+PREFETCH_WORKERS = 8
+
+# Last access is only rewritten when older than this, so card views rarely write
+ACCESS_UPDATE_INTERVAL = '-1 day'
+
+
+def thumbnail_path(content_hash, cache_dir=PHOTO_CACHE_DIR):
+    return os.path.join(cache_dir, content_hash[:2], f'{content_hash}.jpg')
+
+
+def make_thumbnail(image_bytes, size=THUMBNAIL_SIZE):
+    """Resize an image to fit within `size` and encode it as JPEG"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert('RGB')
+        image.thumbnail(size)
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def get_cached_thumbnail(photo_url, db_path='db/app.db', cache_dir=PHOTO_CACHE_DIR):
+    """Local thumbnail path for a photo URL, or None if it has not been cached"""
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        row = conn.execute(
+            'SELECT content_hash FROM photo_thumbnails WHERE photo_url = ?', (photo_url,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        path = thumbnail_path(row[0], cache_dir)
+        if not os.path.exists(path):
+            return None
+
+        conn.execute(f'''
+            UPDATE photo_thumbnails SET last_access = CURRENT_TIMESTAMP
+            WHERE photo_url = ? AND last_access < DATETIME('now', '{ACCESS_UPDATE_INTERVAL}')
+        ''', (photo_url,))
+        conn.commit()
+        return path
+    finally:
+        conn.close()
+
+
+def fetch_thumbnail(photo_url, db_path='db/app.db', cache_dir=PHOTO_CACHE_DIR):
+    """
+    Download a photo, store its thumbnail and record it for the URL
+
+    Returns:
+        Local thumbnail path, or None if the photo could not be downloaded or decoded
+    """
+    try:
+        response = requests.get(photo_url, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        thumbnail = make_thumbnail(response.content)
+    except (requests.RequestException, OSError, Image.DecompressionBombError) as e:
+        print(f"⚠️  Could not cache photo {photo_url}: {e}")
+        return None
+
+    content_hash = hashlib.sha256(thumbnail).hexdigest()
+    path = thumbnail_path(content_hash, cache_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Concurrent fetches of the same photo each write their own temp file
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(thumbnail)
+        os.replace(tmp_path, path)
+
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO photo_thumbnails (photo_url, content_hash, bytes)
+            VALUES (?, ?, ?)
+        ''', (photo_url, content_hash, len(thumbnail)))
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def get_thumbnail(photo_url, db_path='db/app.db', cache_dir=PHOTO_CACHE_DIR):
+    """Cached thumbnail path for a photo URL, downloading it first if needed"""
+    return (get_cached_thumbnail(photo_url, db_path, cache_dir)
+            or fetch_thumbnail(photo_url, db_path, cache_dir))
+
+
+def read_thumbnail(path):
+    """Bytes of a cached thumbnail, or None if it has been evicted"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def prefetch_thumbnails(photo_urls, db_path='db/app.db', cache_dir=PHOTO_CACHE_DIR,
+                        workers=PREFETCH_WORKERS):
+    """
+    Cache thumbnails for every URL not cached yet, downloading in parallel
+
+    Returns:
+        Tuple of (number already cached, number fetched, number failed)
+    """
+    missing = [url for url in dict.fromkeys(photo_urls)
+               if get_cached_thumbnail(url, db_path, cache_dir) is None]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = list(pool.map(lambda url: fetch_thumbnail(url, db_path, cache_dir), missing))
+
+    fetched = sum(1 for path in paths if path)
+    return len(set(photo_urls)) - len(missing), fetched, len(missing) - fetched
+
+
+def evict_thumbnails(max_bytes=MAX_CACHE_BYTES, db_path='db/app.db', cache_dir=PHOTO_CACHE_DIR):
+    """
+    Delete least recently used thumbnails until the cache fits in max_bytes
+
+    Returns:
+        Number of thumbnail files removed
+    """
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        # One file per hash, however many URLs share it
+        files = conn.execute('''
+            SELECT content_hash, MAX(bytes), MAX(last_access) AS accessed
+            FROM photo_thumbnails
+            GROUP BY content_hash
+            ORDER BY accessed
+        ''').fetchall()
+        total = sum(size for _, size, _ in files)
+
+        removed = 0
+        for content_hash, size, _ in files:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(thumbnail_path(content_hash, cache_dir))
+            except FileNotFoundError:
+                pass
+            conn.execute('DELETE FROM photo_thumbnails WHERE content_hash = ?', (content_hash,))
+            total -= size
+            removed += 1
+
+        conn.commit()
+        return removed
+    finally:
+        conn.close()
+
+
+def get_first_photo_url(animal_id, db_path='db/app.db'):
+    """The photo shown on an animal's card, or None"""
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        row = conn.execute(
+            'SELECT photo_url FROM photos WHERE animal_id = ? LIMIT 1', (animal_id,)
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def get_first_photo_urls(db_path='db/app.db'):
+    """The photo shown on each adoptable animal's card"""
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        return [row[0] for row in conn.execute('''
+            SELECT (SELECT photo_url FROM photos p WHERE p.animal_id = a.id LIMIT 1)
+            FROM animals a
+            WHERE a.status = 'adoptable'
+        ''') if row[0]]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if '--evict' not in sys.argv:
+        urls = get_first_photo_urls()
+        print(f"📷 Caching thumbnails for {len(urls)} photos in {PHOTO_CACHE_DIR}...")
+        cached, fetched, failed = prefetch_thumbnails(urls)
+        print(f"✅ {cached} already cached, {fetched} fetched, {failed} failed")
+
+    removed = evict_thumbnails()
+    print(f"🧹 Evicted {removed} thumbnail(s) to stay under {MAX_CACHE_BYTES // (1024 * 1024)} MB")
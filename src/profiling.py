@@ -0,0 +1,203 @@
+"""
+Stage Profiling
+Wall time, SQL query counts and rows fetched per named stage of a Streamlit rerun or job
+
+Off unless FURFINDR_PROFILE=1 (or enable_profiling() is called), in which case
+profile_stage() is nearly free and database connections are not instrumented.
+FURFINDR_CPROFILE=1 additionally runs cProfile over one rerun per session.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+
+from .db_helper import add_query_listener, remove_query_listener
+
+
+PROFILE_ENV_VAR = 'FURFINDR_PROFILE'
+CPROFILE_ENV_VAR = 'FURFINDR_CPROFILE'
+STAGE_METRICS_FILE = os.getenv('FURFINDR_PROFILE_FILE', 'output/stage_metrics.jsonl')
+CPROFILE_DIR = 'output/profiles'
+
+# Streamlit runs every session's script on its own thread
+_local = threading.local()
+
+
+class StageRecord:
+    """Measurements for one execution of a stage"""
+
+    __slots__ = ('name', 'depth', 'seconds', 'queries', 'rows', 'query_seconds')
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.query_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'seconds': round(self.seconds, 6),
+            'queries': self.queries,
+            'rows': self.rows,
+            'query_seconds': round(self.query_seconds, 6)
+        }
+
+
+def _open_stages():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+        _local.records = []
+    return _local.stack
+
+
+class _StageQueryCounter:
+    """Query listener crediting statements to every stage open on the current thread"""
+
+    def on_execute(self, cursor, sql, seconds, rowcount):
+        for record in _open_stages():
+            record.queries += 1
+            record.query_seconds += seconds
+            if rowcount > 0:
+                record.rows += rowcount
+
+    def on_fetch(self, cursor, sql, rows, seconds):
+        for record in _open_stages():
+            record.rows += rows
+            record.query_seconds += seconds
+
+
+_query_counter = _StageQueryCounter()
+_enabled = False
+
+
+def enable_profiling():
+    """Start recording stages and counting queries on new DatabaseHelper connections"""
+    global _enabled
+    _enabled = True
+    add_query_listener(_query_counter)
+
+
+def disable_profiling():
+    global _enabled
+    _enabled = False
+    remove_query_listener(_query_counter)
+
+
+def profiling_enabled():
+    return _enabled
+
+
+class profile_stage:
+    """
+    Record wall time, queries and rows for a block or function
+
+    Usable as `with profile_stage('load_pet_queue'):` or as a decorator.
+    Nested stages are recorded too; their numbers are included in the parent's.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._record = None
+
+    def __enter__(self):
+        if not _enabled:
+            return self
+        stack = _open_stages()
+        self._record = StageRecord(self.name, len(stack))
+        _local.records.append(self._record)
+        stack.append(self._record)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._record is not None:
+            self._record.seconds = time.perf_counter() - self._start
+            _local.stack.remove(self._record)
+            self._record = None
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh instance per call keeps concurrent sessions apart
+            with profile_stage(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def begin_run():
+    """Forget stages recorded by this thread's previous run"""
+    _open_stages()
+    _local.stack = []
+    _local.records = []
+
+
+def finish_run(export_path=STAGE_METRICS_FILE, context=None):
+    """
+    Collect this thread's stage records and append them to the JSONL metrics file
+
+    Args:
+        export_path: File to append one JSON line to (None to skip exporting)
+        context: Optional extra fields stored with the line
+
+    Returns:
+        List of StageRecord in start order
+    """
+    _open_stages()
+    records = _local.records
+    _local.records = []
+
+    if export_path and records:
+        os.makedirs(os.path.dirname(export_path) or '.', exist_ok=True)
+        line = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'stages': [record.as_dict() for record in records]
+        }
+        if context:
+            line.update(context)
+        with open(export_path, 'a') as f:
+            f.write(json.dumps(line) + '\n')
+
+    return records
+
+
+def cprofile_requested():
+    return os.getenv(CPROFILE_ENV_VAR) == '1'
+
+
+def start_cprofile():
+    """Start a cProfile profiler on the current thread"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_cprofile(profiler, output_dir=CPROFILE_DIR, limit=25):
+    """
+    Stop a profiler, save its stats for snakeviz/pstats and summarize the top functions
+
+    Returns:
+        Tuple of (stats file path, text of the top `limit` functions by cumulative time)
+    """
+    profiler.disable()
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"rerun-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.prof")
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(limit)
+    return path, summary.getvalue()
+
+
+if os.getenv(PROFILE_ENV_VAR) == '1':
+    enable_profiling()
@@ -0,0 +1,243 @@
+"""
+Query Statistics
+Per-statement call counts, rows and latency histograms for SQL run through DatabaseHelper, plus a slow-query log
+
+Off unless FURFINDR_SQL_STATS=1 (or enable_query_stats() is called). Statements
+slower than FURFINDR_SLOW_QUERY_MS are appended with their EXPLAIN QUERY PLAN to
+output/slow_queries.jsonl and kept in memory for the debug panel and benchmarks.
+
+Usage:
+    python src/query_stats.py [output/query_stats.json]   # print a saved snapshot
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import atexit
+import json
+import re
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+from src.db_helper import add_query_listener, remove_query_listener
+
+
+STATS_ENV_VAR = 'FURFINDR_SQL_STATS'
+SLOW_QUERY_MS = float(os.getenv('FURFINDR_SLOW_QUERY_MS', '50'))
+SLOW_QUERY_LOG = os.getenv('FURFINDR_SLOW_QUERY_LOG', 'output/slow_queries.jsonl')
+STATS_SNAPSHOT_FILE = 'output/query_stats.json'
+RECENT_SLOW_QUERIES = 100
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and IN lists of placeholders so one statement maps to one key"""
+    sql = ' '.join(sql.split())
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?, ...)', sql)
+
+
+class StatementStats:
+    """Counters for one normalized statement"""
+
+    __slots__ = ('calls', 'rows', 'execute_seconds', 'fetch_seconds', 'max_ms', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.execute_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': round((self.execute_seconds + self.fetch_seconds) * 1000, 3),
+            'execute_ms': round(self.execute_seconds * 1000, 3),
+            'fetch_ms': round(self.fetch_seconds * 1000, 3),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': dict(zip(
+                [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms'],
+                self.histogram
+            ))
+        }
+
+
+def _bucket(ms):
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def explain_query_plan(cursor, sql, parameters):
+    """EXPLAIN QUERY PLAN lines for a statement, or None if it cannot be explained"""
+    if parameters is None:
+        return None
+    try:
+        # A plain cursor, so explaining is not itself recorded
+        plan_cursor = cursor.connection.cursor(sqlite3.Cursor)
+        plan_cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)
+        return [row[3] for row in plan_cursor.fetchall()]
+    except sqlite3.Error:
+        return None
+
+
+class QueryStats:
+    """
+    Query listener aggregating statement statistics
+
+    The histogram records execute() latency, which for a SELECT is the time until
+    its first row is ready; time spent stepping through later rows is added to
+    fetch_ms. Either part exceeding the slow threshold logs the statement.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_path=SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.recent_slow = deque(maxlen=RECENT_SLOW_QUERIES)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, sql):
+        key = normalize_sql(sql)
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats.setdefault(key, StatementStats())
+        return entry
+
+    def on_execute(self, cursor, sql, seconds, rowcount):
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._entry(sql)
+            entry.calls += 1
+            entry.execute_seconds += seconds
+            entry.max_ms = max(entry.max_ms, ms)
+            entry.histogram[_bucket(ms)] += 1
+            if rowcount > 0:
+                entry.rows += rowcount
+        if ms >= self.slow_ms:
+            self._log_slow(cursor, sql, 'execute', ms, rowcount)
+
+    def on_fetch(self, cursor, sql, rows, seconds):
+        if sql is None:
+            return
+        with self._lock:
+            entry = self._entry(sql)
+            entry.rows += rows
+            entry.fetch_seconds += seconds
+        ms = seconds * 1000
+        if ms >= self.slow_ms:
+            self._log_slow(cursor, sql, 'fetch', ms, rows)
+
+    def _log_slow(self, cursor, sql, phase, ms, rows):
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'phase': phase,
+            'ms': round(ms, 3),
+            'rows': rows,
+            'sql': normalize_sql(sql),
+            'plan': explain_query_plan(cursor, sql, cursor.parameters)
+        }
+        self.recent_slow.append(record)
+
+        if self.slow_log_path:
+            try:
+                os.makedirs(os.path.dirname(self.slow_log_path) or '.', exist_ok=True)
+                with self._lock, open(self.slow_log_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError:
+                pass  # Never let logging break the query
+
+    def snapshot(self):
+        """Statement statistics, slowest total first"""
+        with self._lock:
+            stats = {sql: entry.as_dict() for sql, entry in self._stats.items()}
+        return dict(sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+        self.recent_slow.clear()
+
+
+query_stats = QueryStats()
+_enabled = False
+
+
+def enable_query_stats(slow_ms=None):
+    """Start collecting statistics for new DatabaseHelper connections"""
+    global _enabled
+    if slow_ms is not None:
+        query_stats.slow_ms = slow_ms
+    _enabled = True
+    add_query_listener(query_stats)
+
+
+def disable_query_stats():
+    global _enabled
+    _enabled = False
+    remove_query_listener(query_stats)
+
+
+def query_stats_enabled():
+    return _enabled
+
+
+def get_query_stats():
+    """Per-statement statistics collected by this process"""
+    return query_stats.snapshot()
+
+
+def get_slow_queries():
+    """Most recent slow statements with their query plans"""
+    return list(query_stats.recent_slow)
+
+
+def reset_query_stats():
+    query_stats.reset()
+
+
+def save_query_stats(path=STATS_SNAPSHOT_FILE):
+    """Write the current statistics to a JSON file for later inspection"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'statements': get_query_stats()
+        }, f, indent=2)
+    return path
+
+
+def format_query_stats(stats, limit=15):
+    """Text table of the statements with the most total time"""
+    lines = [f"{'calls':>7} {'rows':>8} {'total ms':>10} {'max ms':>9}  statement"]
+    for sql, entry in list(stats.items())[:limit]:
+        lines.append(
+            f"{entry['calls']:>7} {entry['rows']:>8} {entry['total_ms']:>10.1f} "
+            f"{entry['max_ms']:>9.1f}  {sql[:100]}"
+        )
+    return '\n'.join(lines)
+
+
+if os.getenv(STATS_ENV_VAR) == '1':
+    enable_query_stats()
+    # Leave a snapshot behind for ops when the process exits
+    atexit.register(save_query_stats)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else STATS_SNAPSHOT_FILE
+    with open(path) as f:
+        snapshot = json.load(f)
+
+    print(f"📊 SQL statistics saved {snapshot['saved_at']} (pid {snapshot['pid']})\n")
+    print(format_query_stats(snapshot['statements'], limit=50))
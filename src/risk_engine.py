@@ -1,32 +1,19 @@
 """
 Retention-Risk Engine
 Evaluates adopter-pet compatibility based on research-backed friction patterns
-"""
-import streamlit
-import os
-
-def get_api_credentials():
-    """Get API credentials from secrets or environment"""
-    try:
-        # Try Streamlit secrets first (for deployed app)
-        api_key = st.secrets["petfinder"]["api_key"]
-        api_secret = st.secrets["petfinder"]["api_secret"]
-    except (FileNotFoundError, KeyError):
-        # Fall back to environment variables (for local dev)
-        api_key = os.getenv("PETFINDER_API_KEY")
-        api_secret = os.getenv("PETFINDER_API_SECRET")
-    
-    return api_key, api_secret
 
+Usage:
+    python -m src.risk_engine                   # sample reports for pets in the database
+    python -m src.risk_engine --rule-timings    # calibrate rule order on the inventory and print per-rule timings
+"""
 from .data_validation import validate_animal_data, get_conservative_defaults
 from .db_helper import DatabaseHelper
-from datetime import datetime
+from .rule_telemetry import record_rule_trigger, get_rule_trigger_counts, get_recent_rule_trigger_counts
 import re
-
-
-# Global log of triggered rules for simple analytics
-# Each entry is a dict like: { 'rule': 'first_time_owner_high_energy_pet', 'timestamp': '...' }
-rule_trigger_log = []
+import threading
+import time
+from collections import namedtuple
+from functools import cached_property
 
 
 def _slugify_rule(name: str) -> str:
@@ -64,10 +51,25 @@ STUBBORN_INDEPENDENT_BREEDS = [
     'terrier', 'bulldog', 'beagle', 'dachshund', 'pekingese'
 ]
 
+# Description keyword lists
+SHEDDING_KEYWORDS = ['sheds', 'shedding']
+
+ONLY_PET_KEYWORDS = [
+    'only pet', 'no other animals', 'no other pets',
+    'cat aggressive', 'dog aggressive', 'must be alone'
+]
+
+SEPARATION_ANXIETY_KEYWORDS = ['shy', 'anxious']
+
+# Risk level boundaries: scores below LOW_RISK_MAX_SCORE are Low,
+# scores from HIGH_RISK_MIN_SCORE up are High
+LOW_RISK_MAX_SCORE = 20
+HIGH_RISK_MIN_SCORE = 50
+
 
 def is_high_energy(pet_data):
     """Determine if pet is likely high-energy"""
-    breed = pet_data.get('breed', '').lower()
+    breed = (pet_data.get('breed') or '').lower()
     age = pet_data.get('age', '')
     size = pet_data.get('size', '')
     
@@ -85,7 +87,7 @@ def is_high_energy(pet_data):
 
 def is_working_herding_breed(pet_data):
     """Check if pet is a working or herding breed"""
-    breed = pet_data.get('breed', '').lower()
+    breed = (pet_data.get('breed') or '').lower()
     
     for keyword in WORKING_HERDING_BREEDS:
         if keyword in breed:
@@ -96,7 +98,7 @@ def is_working_herding_breed(pet_data):
 
 def is_vocal_breed(pet_data):
     """Check if pet is prone to being vocal"""
-    breed = pet_data.get('breed', '').lower()
+    breed = (pet_data.get('breed') or '').lower()
     
     for keyword in VOCAL_BREEDS:
         if keyword in breed:
@@ -115,15 +117,16 @@ def is_heavy_shedder(pet_data):
             return True
     
     # Check description mentions
-    if 'sheds' in description or 'shedding' in description:
-        return True
+    for keyword in SHEDDING_KEYWORDS:
+        if keyword in description:
+            return True
     
     return False
 
 
 def is_stubborn_breed(pet_data):
     """Check if pet is known for being stubborn/independent"""
-    breed = pet_data.get('breed', '').lower()
+    breed = (pet_data.get('breed') or '').lower()
     
     for keyword in STUBBORN_INDEPENDENT_BREEDS:
         if keyword in breed:
@@ -135,249 +138,573 @@ def is_stubborn_breed(pet_data):
 def requires_only_pet(pet_data):
     """Check if pet must be only pet in household"""
     description = (pet_data.get('description') or '').lower()
-
-    
-    only_pet_keywords = [
-        'only pet', 'no other animals', 'no other pets',
-        'cat aggressive', 'dog aggressive', 'must be alone'
-    ]
     
-    for keyword in only_pet_keywords:
+    for keyword in ONLY_PET_KEYWORDS:
         if keyword in description:
             return True
     
     return False
 
 
-def calculate_risk(adopter_profile, pet_data):
-    """
-    Calculate adoption retention risk based on adopter profile and pet traits
+def get_risk_level(risk_score):
+    """Map a risk score to 'Low', 'Medium' or 'High'"""
+    if risk_score < LOW_RISK_MAX_SCORE:
+        return "Low"
+    if risk_score < HIGH_RISK_MIN_SCORE:
+        return "Medium"
+    return "High"
+
+
+def shows_anxiety_signs(pet_data):
+    """Check if the description mentions a shy or anxious temperament"""
+    description = (pet_data.get('description') or '').lower()
     
-    Args:
-        adopter_profile: Dictionary with adopter information
-        pet_ Dictionary with pet information from database
+    for keyword in SEPARATION_ANXIETY_KEYWORDS:
+        if keyword in description:
+            return True
     
-    Returns:
-        Dictionary with:
-            - risk_score: Total risk points
-            - risk_level: 'Low', 'Medium', or 'High'
-            - triggered_rules: List of dicts with rule details
-            - summary: Brief text summary
+    return False
+
+
+class PetTraits:
     """
-    triggered_rules = []
-    total_score = 0
-    
+    Pet features the rules look at, each computed at most once and only when a rule asks
+
+    Breed and description keyword scans are the expensive part of an evaluation,
+    so they are deferred until a rule whose adopter condition holds needs them.
+    """
+
+    def __init__(self, pet_data):
+        self.pet_data = pet_data
+        self.age = pet_data.get('age')
+        self.size = pet_data.get('size')
+
+    @classmethod
+    def from_signature(cls, trait_flags, age, size):
+        """Build traits from a stored trait_flags bitmask instead of scanning text"""
+        traits = cls.__new__(cls)
+        traits.pet_data = None
+        traits.age = age
+        traits.size = size
+        for bit, name in enumerate(TRAIT_FLAGS):
+            # Pre-filling the instance dict short-circuits the cached properties
+            traits.__dict__[name] = bool(trait_flags >> bit & 1)
+        return traits
+
+    @cached_property
+    def high_energy(self):
+        return is_high_energy(self.pet_data)
+
+    @cached_property
+    def working_herding(self):
+        return is_working_herding_breed(self.pet_data)
+
+    @cached_property
+    def vocal(self):
+        return is_vocal_breed(self.pet_data)
+
+    @cached_property
+    def heavy_shedder(self):
+        return is_heavy_shedder(self.pet_data)
+
+    @cached_property
+    def stubborn(self):
+        return is_stubborn_breed(self.pet_data)
+
+    @cached_property
+    def only_pet(self):
+        return requires_only_pet(self.pet_data)
+
+    @cached_property
+    def anxious(self):
+        return shows_anxiety_signs(self.pet_data)
+
+
+# Bit positions of PetTraits flags in animals.trait_flags. Append only: stored
+# values depend on this order. After changing how a trait is detected, set
+# animals.trait_flags to NULL; src/risk_lookup.py recomputes NULL flags on the fly.
+TRAIT_FLAGS = (
+    'high_energy', 'working_herding', 'vocal', 'heavy_shedder',
+    'stubborn', 'only_pet', 'anxious'
+)
+
+
+def pet_trait_flags(pet_data):
+    """Pack a pet's trait flags into an integer for storage in animals.trait_flags"""
+    traits = PetTraits(pet_data)
+    flags = 0
+    for bit, name in enumerate(TRAIT_FLAGS):
+        if getattr(traits, name):
+            flags |= 1 << bit
+    return flags
+
+
+# A rule fires when its adopter condition holds for the profile and its pet
+# condition holds for the PetTraits of the pet being evaluated. `cost` is a
+# rough relative cost of the pet condition (1 = age/size comparison), used to
+# order rules until calibrate_rule_order() measures real costs.
+Rule = namedtuple('Rule', [
+    'name', 'weight', 'concern', 'guidance', 'adopter_condition', 'pet_condition', 'cost'
+], defaults=[1])
+
+RISK_RULES = [
     # Rule 1: First-Time Owner + High-Energy Pet
-    if adopter_profile.get('experience_level') == 'first_time' and is_high_energy(pet_data):
-        total_score += 25
-        triggered_rules.append({
-            'rule_name': 'First-Time Owner + High-Energy Pet',
-            'concern': 'First-time owners often underestimate the time, energy, and training required for high-energy breeds. This can lead to behavioral issues and early returns.',
-            'guidance': [
-                'Enroll in puppy/dog training classes within first 2 weeks',
-                'Commit to 60-90 minutes of daily exercise',
-                'Research breed-specific needs and common challenges',
-                'Join local dog owner groups for support'
-                'Start with a less demanding breed if unsure'
-            ],
-            'weight': 25
-        })
-        # record trigger
-        rule_trigger_log.append({'rule': _slugify_rule('First-Time Owner + High-Energy Pet'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='First-Time Owner + High-Energy Pet',
+        weight=25,
+        concern='First-time owners often underestimate the time, energy, and training required for high-energy breeds. This can lead to behavioral issues and early returns.',
+        guidance=[
+            'Enroll in puppy/dog training classes within first 2 weeks',
+            'Commit to 60-90 minutes of daily exercise',
+            'Research breed-specific needs and common challenges',
+            'Join local dog owner groups for support'
+            'Start with a less demanding breed if unsure'
+        ],
+        adopter_condition=lambda profile: profile.get('experience_level') == 'first_time',
+        pet_condition=lambda pet: pet.high_energy,
+        cost=3
+    ),
+
     # Rule 2: Young Children + Large Adolescent Dog
-    if (adopter_profile.get('has_kids') and 
-        'toddler' in adopter_profile.get('kid_ages', []) and
-        pet_data.get('age') in ['Baby', 'Young'] and
-        pet_data.get('size') in ['Large', 'Extra Large']):
-        
-        total_score += 40
-        triggered_rules.append({
-            'rule_name': 'Young Children + Large Adolescent Dog',
-            'concern': 'Young dogs are naturally mouthy and jump. Large breeds can easily knock over small children, leading to injuries and fear.',
-            'guidance': [
-                'Work with certified trainer on gentle behavior from day one',
-                'Supervise ALL interactions between child and pet',
-                'Teach children proper pet handling',
-                'Consider waiting until children are older or choosing smaller/calmer pet'
-            ],
-            'weight': 40
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Young Children + Large Adolescent Dog'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Young Children + Large Adolescent Dog',
+        weight=40,
+        concern='Young dogs are naturally mouthy and jump. Large breeds can easily knock over small children, leading to injuries and fear.',
+        guidance=[
+            'Work with certified trainer on gentle behavior from day one',
+            'Supervise ALL interactions between child and pet',
+            'Teach children proper pet handling',
+            'Consider waiting until children are older or choosing smaller/calmer pet'
+        ],
+        adopter_condition=lambda profile: bool(
+            profile.get('has_kids') and 'toddler' in profile.get('kid_ages', [])
+        ),
+        pet_condition=lambda pet: pet.age in ['Baby', 'Young'] and pet.size in ['Large', 'Extra Large'],
+        cost=1
+    ),
+
     # Rule 3: Limited Exercise Time + Working/Herding Breed
-    if (adopter_profile.get('daily_exercise_minutes', 0) < 30 and 
-        is_working_herding_breed(pet_data)):
-        
-        total_score += 35
-        triggered_rules.append({
-            'rule_name': 'Limited Exercise Time + Working/Herding Breed',
-            'concern': 'Working breeds require significant physical and mental stimulation. Without it, they develop destructive behaviors, anxiety, and can become difficult to manage.',
-            'guidance': [
-                'Increase daily exercise commitment to minimum 60 minutes',
-                'Add mental stimulation: puzzle toys, training sessions, nose work',
-                'Consider doggy daycare 2-3 times per week',
-                'Alternatively, choose a lower-energy breed better suited to lifestyle'
-            ],
-            'weight': 35
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Limited Exercise Time + Working/Herding Breed'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Limited Exercise Time + Working/Herding Breed',
+        weight=35,
+        concern='Working breeds require significant physical and mental stimulation. Without it, they develop destructive behaviors, anxiety, and can become difficult to manage.',
+        guidance=[
+            'Increase daily exercise commitment to minimum 60 minutes',
+            'Add mental stimulation: puzzle toys, training sessions, nose work',
+            'Consider doggy daycare 2-3 times per week',
+            'Alternatively, choose a lower-energy breed better suited to lifestyle'
+        ],
+        adopter_condition=lambda profile: profile.get('daily_exercise_minutes', 0) < 30,
+        pet_condition=lambda pet: pet.working_herding,
+        cost=3
+    ),
+
     # Rule 4: Apartment Living + Very Vocal Breed
-    if (adopter_profile.get('home_type') == 'apartment' and
-        adopter_profile.get('noise_tolerance') == 'low' and
-        is_vocal_breed(pet_data)):
-        
-        total_score += 20
-        triggered_rules.append({
-            'rule_name': 'Apartment Living + Very Vocal Breed',
-            'concern': 'Vocal breeds are prone to barking, howling, and "talking." In apartments with shared walls, this leads to neighbor complaints and potential eviction.',
-            'guidance': [
-                'Budget for professional trainer specializing in quiet commands',
-                'Start training immediately upon adoption',
-                'Discuss with neighbors upfront about training period',
-                'Consider soundproofing measures',
-                'Choose quieter breed if noise is dealbreaker'
-            ],
-            'weight': 20
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Apartment Living + Very Vocal Breed'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Apartment Living + Very Vocal Breed',
+        weight=20,
+        concern='Vocal breeds are prone to barking, howling, and "talking." In apartments with shared walls, this leads to neighbor complaints and potential eviction.',
+        guidance=[
+            'Budget for professional trainer specializing in quiet commands',
+            'Start training immediately upon adoption',
+            'Discuss with neighbors upfront about training period',
+            'Consider soundproofing measures',
+            'Choose quieter breed if noise is dealbreaker'
+        ],
+        adopter_condition=lambda profile: (
+            profile.get('home_type') == 'apartment' and profile.get('noise_tolerance') == 'low'
+        ),
+        pet_condition=lambda pet: pet.vocal,
+        cost=3
+    ),
+
     # Rule 5: Allergies + Heavy Shedding Breed
-    if (adopter_profile.get('allergies') in ['mild', 'moderate', 'severe'] and
-        is_heavy_shedder(pet_data)):
-        
-        total_score += 30
-        triggered_rules.append({
-            'rule_name': 'Allergies + Heavy Shedding Breed',
-            'concern': 'Even mild allergies can worsen with constant exposure to dander and shed fur. Severe cases force returns and can affect household health.',
-            'guidance': [
-                'Consult allergist before adoption',
-                'Commit to weekly professional grooming',
-                'Invest in HEPA air filters for home',
-                'Keep pet out of bedrooms',
-                'Consider hypoallergenic breeds (Poodle, Bichon, Portuguese Water Dog)'
-            ],
-            'weight': 30
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Allergies + Heavy Shedding Breed'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Allergies + Heavy Shedding Breed',
+        weight=30,
+        concern='Even mild allergies can worsen with constant exposure to dander and shed fur. Severe cases force returns and can affect household health.',
+        guidance=[
+            'Consult allergist before adoption',
+            'Commit to weekly professional grooming',
+            'Invest in HEPA air filters for home',
+            'Keep pet out of bedrooms',
+            'Consider hypoallergenic breeds (Poodle, Bichon, Portuguese Water Dog)'
+        ],
+        adopter_condition=lambda profile: profile.get('allergies') in ['mild', 'moderate', 'severe'],
+        pet_condition=lambda pet: pet.heavy_shedder,
+        cost=10
+    ),
+
     # Rule 6: No Yard + Large High-Energy Dog
-    if (adopter_profile.get('yard_size') == 'none' and
-        adopter_profile.get('home_type') == 'apartment' and
-        pet_data.get('size') in ['Large', 'Extra Large'] and
-        pet_data.get('age') in ['Baby', 'Young']):
-        
-        total_score += 20
-        triggered_rules.append({
-            'rule_name': 'No Yard + Large High-Energy Dog',
-            'concern': 'Large dogs without outdoor space require multiple daily walks and dedicated exercise time. Easy to under-exercise, leading to behavior problems.',
-            'guidance': [
-                'Commit to 3+ walks daily (morning, midday, evening)',
-                'Find nearby dog parks or trails',
-                'Budget for dog walker if working full-time',
-                'Consider smaller or lower-energy pet'
-            ],
-            'weight': 20
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('No Yard + Large High-Energy Dog'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='No Yard + Large High-Energy Dog',
+        weight=20,
+        concern='Large dogs without outdoor space require multiple daily walks and dedicated exercise time. Easy to under-exercise, leading to behavior problems.',
+        guidance=[
+            'Commit to 3+ walks daily (morning, midday, evening)',
+            'Find nearby dog parks or trails',
+            'Budget for dog walker if working full-time',
+            'Consider smaller or lower-energy pet'
+        ],
+        adopter_condition=lambda profile: (
+            profile.get('yard_size') == 'none' and profile.get('home_type') == 'apartment'
+        ),
+        pet_condition=lambda pet: pet.size in ['Large', 'Extra Large'] and pet.age in ['Baby', 'Young'],
+        cost=1
+    ),
+
     # Rule 7: Full-Time Office Work + Separation Anxiety Risk
-    if (adopter_profile.get('work_schedule') == 'full_time_office' and
-    (pet_data.get('age') == 'Baby' or 
-     'shy' in (pet_data.get('description') or '').lower() or
-     'anxious' in (pet_data.get('description') or '').lower())):
+    Rule(
+        name='Full-Time Office Work + Separation Anxiety Risk',
+        weight=25,
+        concern='Young puppies and anxious pets can develop separation anxiety when left alone for long periods. Results in destructive behavior and stress.',
+        guidance=[
+            'Arrange for midday dog walker or pet sitter',
+            'Consider doggy daycare 3-5 days per week',
+            'Crate train properly from day one',
+            'Start with shorter absences and gradually increase',
+            'Choose more independent adult pet if schedule inflexible'
+        ],
+        adopter_condition=lambda profile: profile.get('work_schedule') == 'full_time_office',
+        pet_condition=lambda pet: pet.age == 'Baby' or pet.anxious,
+        cost=5
+    ),
 
-        
-        total_score += 25
-        triggered_rules.append({
-            'rule_name': 'Full-Time Office Work + Separation Anxiety Risk',
-            'concern': 'Young puppies and anxious pets can develop separation anxiety when left alone for long periods. Results in destructive behavior and stress.',
-            'guidance': [
-                'Arrange for midday dog walker or pet sitter',
-                'Consider doggy daycare 3-5 days per week',
-                'Crate train properly from day one',
-                'Start with shorter absences and gradually increase',
-                'Choose more independent adult pet if schedule inflexible'
-            ],
-            'weight': 25
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Full-Time Office Work + Separation Anxiety Risk'), 'timestamp': datetime.utcnow().isoformat()})
-    
     # Rule 8: No Other Pets + "Must Be Only Pet"
-    if (adopter_profile.get('has_other_pets') and requires_only_pet(pet_data)):
-        total_score += 50
-        triggered_rules.append({
-            'rule_name': 'Has Other Pets + Must Be Only Pet',
-            'concern': 'Direct incompatibility. This pet\'s behavioral needs conflict with your household situation.',
-            'guidance': [
-                '⚠️ This is a dealbreaker - do not proceed with this match',
-                'Search for pets marked as good with other animals',
-                'Consult shelter staff if you still want to consider this pet'
-            ],
-            'weight': 50
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Has Other Pets + Must Be Only Pet'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Has Other Pets + Must Be Only Pet',
+        weight=50,
+        concern='Direct incompatibility. This pet\'s behavioral needs conflict with your household situation.',
+        guidance=[
+            '⚠️ This is a dealbreaker - do not proceed with this match',
+            'Search for pets marked as good with other animals',
+            'Consult shelter staff if you still want to consider this pet'
+        ],
+        adopter_condition=lambda profile: bool(profile.get('has_other_pets')),
+        pet_condition=lambda pet: pet.only_pet,
+        cost=8
+    ),
+
     # Rule 9: Limited Training Commitment + Strong-Willed Breed
-    if (adopter_profile.get('training_commitment') == 'limited' and
-        is_stubborn_breed(pet_data)):
-        
-        total_score += 20
-        triggered_rules.append({
-            'rule_name': 'Limited Training Commitment + Strong-Willed Breed',
-            'concern': 'Independent breeds require consistent, patient training. Without commitment, they become unmanageable and develop bad habits.',
-            'guidance': [
-                'Reconsider training commitment - these breeds require structure',
-                'Hire professional trainer if unable to commit personal time',
-                'Choose easier-to-train breed (Golden Retriever, Lab, Poodle)',
-                'Read breed-specific training resources before deciding'
-            ],
-            'weight': 20
-        })
-        rule_trigger_log.append({'rule': _slugify_rule('Limited Training Commitment + Strong-Willed Breed'), 'timestamp': datetime.utcnow().isoformat()})
-    
+    Rule(
+        name='Limited Training Commitment + Strong-Willed Breed',
+        weight=20,
+        concern='Independent breeds require consistent, patient training. Without commitment, they become unmanageable and develop bad habits.',
+        guidance=[
+            'Reconsider training commitment - these breeds require structure',
+            'Hire professional trainer if unable to commit personal time',
+            'Choose easier-to-train breed (Golden Retriever, Lab, Poodle)',
+            'Read breed-specific training resources before deciding'
+        ],
+        adopter_condition=lambda profile: profile.get('training_commitment') == 'limited',
+        pet_condition=lambda pet: pet.stubborn,
+        cost=3
+    ),
+
     # Rule 10: Senior Pet + First-Time Owner
-    if (adopter_profile.get('experience_level') == 'first_time' and
-        pet_data.get('age') == 'Senior'):
-        
-        total_score += 15
-        triggered_rules.append({
-            'rule_name': 'Senior Pet + First-Time Owner',
-            'concern': 'Senior pets may have special medical needs, behavioral quirks from past experiences, and shorter lifespan. First-time owners may be unprepared for costs and emotional aspects.',
-            'guidance': [
-                'Research senior pet care and common health issues',
-                'Budget for potential vet expenses (often higher for seniors)',
-                'Understand end-of-life care may come sooner',
-                'Consult with shelter about this specific senior\'s needs',
-                '💙 Senior pets can be wonderful for prepared adopters!'
-            ],
-            'weight': 15
+    Rule(
+        name='Senior Pet + First-Time Owner',
+        weight=15,
+        concern='Senior pets may have special medical needs, behavioral quirks from past experiences, and shorter lifespan. First-time owners may be unprepared for costs and emotional aspects.',
+        guidance=[
+            'Research senior pet care and common health issues',
+            'Budget for potential vet expenses (often higher for seniors)',
+            'Understand end-of-life care may come sooner',
+            'Consult with shelter about this specific senior\'s needs',
+            '💙 Senior pets can be wonderful for prepared adopters!'
+        ],
+        adopter_condition=lambda profile: profile.get('experience_level') == 'first_time',
+        pet_condition=lambda pet: pet.age == 'Senior',
+        cost=1
+    ),
+]
+
+
+def _compile_rules(rules):
+    """
+    Compile the rule table once at import
+
+    Returns the precomputed analytics key of each rule and one shared
+    explanation dict per rule.
+    """
+    keys = tuple(_slugify_rule(rule.name) for rule in rules)
+    explanations = tuple(
+        {
+            'rule_name': rule.name,
+            'concern': rule.concern,
+            'guidance': rule.guidance,
+            'weight': rule.weight
+        }
+        for rule in rules
+    )
+    return keys, explanations
+
+
+RULE_KEYS, _RULE_EXPLANATIONS = _compile_rules(RISK_RULES)
+
+
+class RuleTimings:
+    """Per-rule evaluation counts, fire counts and time spent in pet conditions"""
+
+    def __init__(self, rule_count):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.evaluations = [0] * rule_count
+        self.fires = [0] * rule_count
+        self.seconds = [0.0] * rule_count
+
+    def add(self, index, fired, seconds):
+        with self._lock:
+            self.evaluations[index] += 1
+            self.fires[index] += fired
+            self.seconds[index] += seconds
+
+    def reset(self):
+        with self._lock:
+            for index in range(len(self.evaluations)):
+                self.evaluations[index] = 0
+                self.fires[index] = 0
+                self.seconds[index] = 0.0
+
+
+_rule_timings = RuleTimings(len(RISK_RULES))
+
+
+def enable_rule_timing(enabled=True):
+    """Turn per-rule timing of pet conditions on or off (off by default)"""
+    _rule_timings.enabled = enabled
+
+
+def get_rule_timings():
+    """
+    Per-rule timing collected while rule timing was enabled
+
+    Returns:
+        List of dicts with rule, evaluations, fire_rate and mean_us, in rule order
+    """
+    timings = []
+    for index, key in enumerate(RULE_KEYS):
+        evaluations = _rule_timings.evaluations[index]
+        timings.append({
+            'rule': key,
+            'evaluations': evaluations,
+            'fire_rate': _rule_timings.fires[index] / evaluations if evaluations else None,
+            'mean_us': _rule_timings.seconds[index] / evaluations * 1e6 if evaluations else None
         })
-        rule_trigger_log.append({'rule': _slugify_rule('Senior Pet + First-Time Owner'), 'timestamp': datetime.utcnow().isoformat()})
+    return timings
+
+
+def reset_rule_timings():
+    """Clear collected rule timings"""
+    _rule_timings.reset()
+
+
+def _order_rules(costs, fire_rates):
+    """Rule indexes ordered by expected points per unit of cost, highest first"""
+    return tuple(sorted(
+        range(len(RISK_RULES)),
+        key=lambda index: -RISK_RULES[index].weight * fire_rates[index] / costs[index]
+    ))
+
+
+# Until calibrated, assume every rule fires half the time at its declared cost
+_rule_order = _order_rules([rule.cost for rule in RISK_RULES], [0.5] * len(RISK_RULES))
+
+
+def calibrate_rule_order(sample_pets):
+    """
+    Measure each pet condition's cost and fire rate on sample pets and reorder rules
+
+    Args:
+        sample_pets: List of pet dicts representative of the inventory
+
+    Returns:
+        Tuple of rule indexes in the new evaluation order
+    """
+    global _rule_order
+
+    if not sample_pets:
+        return _rule_order
+
+    costs = []
+    fire_rates = []
+    for rule in RISK_RULES:
+        fires = 0
+        start = time.perf_counter()
+        for pet_data in sample_pets:
+            fires += bool(rule.pet_condition(PetTraits(pet_data)))
+        elapsed = time.perf_counter() - start
+        costs.append(max(elapsed / len(sample_pets), 1e-9))
+        fire_rates.append(fires / len(sample_pets))
+
+    _rule_order = _order_rules(costs, fire_rates)
+    return _rule_order
+
+
+class CompiledProfile:
+    """
+    Rules that can still fire for one adopter, precompiled before scanning any pets
+
+    Adopter conditions are evaluated once here, so a profile with no allergies
+    never runs the shedding check and one without toddlers never runs the
+    toddler check. The remaining pet conditions run in calibrated order.
+    """
+
+    def __init__(self, adopter_profile):
+        self.adopter_profile = adopter_profile
+        self.rules = tuple(
+            (1 << index, RISK_RULES[index].weight, RISK_RULES[index].pet_condition, index)
+            for index in _rule_order
+            if RISK_RULES[index].adopter_condition(adopter_profile)
+        )
+        self.max_score = sum(weight for _, weight, _, _ in self.rules)
+
+    def score(self, pet_data, stop_above=None):
+        """
+        Evaluate the active rules for one pet
+
+        Args:
+            pet_data: Pet dictionary or PetTraits
+            stop_above: Stop as soon as the score exceeds this value; the returned
+                        score and mask are then only a lower bound
+
+        Returns:
+            Tuple of (risk_score, rule_mask)
+        """
+        if not self.rules:
+            return 0, 0
+        if _rule_timings.enabled:
+            return self._score_timed(pet_data, stop_above)
+
+        pet = pet_data if isinstance(pet_data, PetTraits) else PetTraits(pet_data)
+        score = 0
+        mask = 0
+
+        for bit, weight, pet_condition, _ in self.rules:
+            if pet_condition(pet):
+                score += weight
+                mask |= bit
+                if stop_above is not None and score > stop_above:
+                    break
+
+        return score, mask
+
+    def _score_timed(self, pet_data, stop_above):
+        pet = pet_data if isinstance(pet_data, PetTraits) else PetTraits(pet_data)
+        score = 0
+        mask = 0
+
+        for bit, weight, pet_condition, index in self.rules:
+            start = time.perf_counter()
+            fired = bool(pet_condition(pet))
+            _rule_timings.add(index, fired, time.perf_counter() - start)
+            if fired:
+                score += weight
+                mask |= bit
+                if stop_above is not None and score > stop_above:
+                    break
+
+        return score, mask
+
+
+def compile_profile(adopter_profile):
+    """Precompile an adopter profile; passing a CompiledProfile returns it unchanged"""
+    if isinstance(adopter_profile, CompiledProfile):
+        return adopter_profile
+    return CompiledProfile(adopter_profile)
+
+
+def score_risk(adopter_profile, pet_data, stop_above=None):
+    """
+    Evaluate all rules for one adopter/pet pair without building explanations
+
+    Args:
+        adopter_profile: Adopter dictionary or CompiledProfile (compile once when
+                         scoring many pets for the same adopter)
+        pet_data: Pet dictionary
+        stop_above: See CompiledProfile.score
+
+    Returns:
+        Tuple of (risk_score, rule_mask) where bit i of rule_mask is set when
+        RISK_RULES[i] triggered
+    """
+    return compile_profile(adopter_profile).score(pet_data, stop_above)
+
+
+def explain_rules(rule_mask):
+    """
+    Expand a rule mask into explanation dicts, in rule order
+
+    The dicts are shared between all results; treat them as read-only.
+    """
+    return [
+        explanation for index, explanation in enumerate(_RULE_EXPLANATIONS)
+        if rule_mask >> index & 1
+    ]
+
+
+def record_rule_mask(rule_mask, db_path='db/app.db'):
+    """Count every rule in the mask for rule analytics on `db_path`"""
+    for index, key in enumerate(RULE_KEYS):
+        if rule_mask >> index & 1:
+            record_rule_trigger(key, db_path)
+
+
+def build_risk_result(pet_data, risk_score, rule_mask):
+    """
+    Build the full calculate_risk result from an already computed score and rule mask
+    
+    Lets callers that scored pets in bulk (e.g. via a risk lookup table) expand
+    explanations only for the pets they actually show.
+    """
+    triggered_rules = explain_rules(rule_mask)
     
     # Determine risk level based on score
-    if total_score < 20:
-        risk_level = "Low"
+    risk_level = get_risk_level(risk_score)
+    if risk_level == "Low":
         summary = f"{pet_data.get('name', 'This pet')} appears to be a good match for your household!"
-    elif total_score < 50:
-        risk_level = "Medium"
+    elif risk_level == "Medium":
         summary = f"{pet_data.get('name', 'This pet')} could work with preparation and commitment to the guidance below."
     else:
-        risk_level = "High"
         summary = f"{pet_data.get('name', 'This pet')} presents significant challenges for your situation. Carefully review concerns before proceeding."
     
     return {
         'pet_name': pet_data.get('name', 'Unknown'),
         'pet_breed': pet_data.get('breed', 'Unknown'),
-        'risk_score': total_score,
+        'risk_score': risk_score,
         'risk_level': risk_level,
         'summary': summary,
         'triggered_rules': triggered_rules,
+        'rule_mask': rule_mask,
         'total_rules_triggered': len(triggered_rules)
     }
 
 
+def calculate_risk(adopter_profile, pet_data, log_triggers=True):
+    """
+    Calculate adoption retention risk based on adopter profile and pet traits
+    
+    Args:
+        adopter_profile: Dictionary with adopter information (or a CompiledProfile)
+        pet_ Dictionary with pet information from database
+        log_triggers: Count triggered rules for rule analytics
+    
+    Returns:
+        Dictionary with:
+            - risk_score: Total risk points
+            - risk_level: 'Low', 'Medium', or 'High'
+            - triggered_rules: List of dicts with rule details
+            - rule_mask: Bitmask of triggered rules (see explain_rules)
+            - summary: Brief text summary
+    """
+    total_score, rule_mask = score_risk(adopter_profile, pet_data)
+    
+    if log_triggers and rule_mask:
+        record_rule_mask(rule_mask)
+    
+    return build_risk_result(pet_data, total_score, rule_mask)
+
+
 def get_pet_by_id(pet_id):
     """Fetch a pet from database by ID"""
     db = DatabaseHelper()
@@ -472,23 +799,19 @@ def print_risk_report(result):
     print("="*70 + "\n")
 
 
-def get_rule_trigger_stats():
-    """Return simple stats about rule triggers from the in-memory log."""
-    if not rule_trigger_log:
+def get_rule_trigger_stats(db_path='db/app.db'):
+    """Return simple stats about rule triggers from the shared trigger counters."""
+    counts = get_rule_trigger_counts(db_path=db_path)
+    if not counts:
         return {
             'total_triggers': 0,
             'unique_rules': 0,
             'most_triggered': None
         }
 
-    counts = {}
-    for entry in rule_trigger_log:
-        name = entry.get('rule')
-        counts[name] = counts.get(name, 0) + 1
-
     total = sum(counts.values())
     unique = len(counts)
-    most = max(counts.items(), key=lambda x: x[1]) if counts else None
+    most = max(counts.items(), key=lambda x: x[1])
 
     return {
         'total_triggers': total,
@@ -496,9 +819,45 @@ def get_rule_trigger_stats():
         'most_triggered': most
     }
 
+
+def print_rule_timings(sample_pets, adopter_profiles):
+    """Calibrate the rule order on sample pets, time every rule against them and print both"""
+    order = calibrate_rule_order(sample_pets)
+    
+    reset_rule_timings()
+    enable_rule_timing()
+    try:
+        for adopter_profile in adopter_profiles:
+            profile = compile_profile(adopter_profile)
+            for pet_data in sample_pets:
+                profile.score(pet_data)
+    finally:
+        enable_rule_timing(False)
+    
+    print(f"\n⏱️  Rule timings over {len(sample_pets)} pets x {len(adopter_profiles)} profiles\n")
+    print(f"{'Rule':<55} {'Evals':>7} {'Fire rate':>10} {'Mean us':>9}")
+    for timing in get_rule_timings():
+        fire_rate = '-' if timing['fire_rate'] is None else f"{timing['fire_rate']:.0%}"
+        mean_us = '-' if timing['mean_us'] is None else f"{timing['mean_us']:.2f}"
+        print(f"{timing['rule']:<55} {timing['evaluations']:>7} {fire_rate:>10} {mean_us:>9}")
+    
+    print("\n📋 Calibrated evaluation order:")
+    for position, index in enumerate(order, 1):
+        print(f"  {position:>2}. {RULE_KEYS[index]}")
+
+
 if __name__ == "__main__":
+    import sys
     from .adopter_profile import SAMPLE_PROFILES
     
+    if '--rule-timings' in sys.argv:
+        sample_pets = get_sample_pets(1000)
+        if not sample_pets:
+            print("❌ No pets found in database. Run ETL first: python etl/run_daily.py")
+            sys.exit(1)
+        print_rule_timings(sample_pets, list(SAMPLE_PROFILES.values()))
+        sys.exit(0)
+    
     print("RETENTION-RISK ENGINE TEST\n")
     
     # Get some real pets from database
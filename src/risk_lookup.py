@@ -0,0 +1,113 @@
+"""
+Risk Lookup
+Scores each distinct pet feature signature once per adopter profile and joins the results back to animals
+
+A pet's risk depends only on its trait flags, age and size, so an inventory of
+100k animals usually collapses to a few hundred signatures. Scoring cost scales
+with those signatures instead of with the number of animals.
+"""
+
+from .db_helper import DatabaseHelper
+from .migrations import register_trait_flags_function
+from .risk_engine import PetTraits, compile_profile, LOW_RISK_MAX_SCORE
+
+
+# Animals stored without trait_flags (e.g. while the version 5 backfill is
+# still running) get theirs computed on the fly by the SQL function
+SIGNATURE_FLAGS_SQL = 'COALESCE(a.trait_flags, pet_trait_flags(a.breed, a.age, a.size, a.description))'
+
+# NULL ages and sizes form their own signatures, so match them with IS
+LOOKUP_JOIN_SQL = f'''
+    JOIN risk_lookup l
+      ON l.trait_flags = {SIGNATURE_FLAGS_SQL}
+     AND l.age IS a.age
+     AND l.size IS a.size
+'''
+
+
+def build_risk_lookup(adopter_profile, conn, status='adoptable'):
+    """
+    Fill the connection's TEMP risk_lookup table for one adopter profile
+
+    Args:
+        adopter_profile: Adopter dictionary or CompiledProfile
+        conn: Open connection; the table lives as long as the connection
+        status: Only include signatures of animals with this status (None for all)
+
+    Returns:
+        Number of distinct signatures scored
+    """
+    profile = compile_profile(adopter_profile)
+    register_trait_flags_function(conn)
+
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS risk_lookup (
+            trait_flags INTEGER NOT NULL,
+            age TEXT,
+            size TEXT,
+            risk_score INTEGER NOT NULL,
+            rule_mask INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS temp.idx_risk_lookup ON risk_lookup(trait_flags, age, size)')
+    conn.execute('DELETE FROM risk_lookup')
+
+    query = f'SELECT DISTINCT {SIGNATURE_FLAGS_SQL}, a.age, a.size FROM animals a'
+    params = []
+    if status:
+        query += ' WHERE a.status = ?'
+        params.append(status)
+
+    rows = []
+    for trait_flags, age, size in conn.execute(query, params).fetchall():
+        score, mask = profile.score(PetTraits.from_signature(trait_flags, age, size))
+        rows.append((trait_flags, age, size, score, mask))
+
+    conn.executemany('INSERT INTO risk_lookup VALUES (?, ?, ?, ?, ?)', rows)
+    return len(rows)
+
+
+def get_risk_summary(adopter_profile, low_risk_below=LOW_RISK_MAX_SCORE,
+                     status='adoptable', db_path='db/app.db'):
+    """
+    Aggregate an inventory's risk for one adopter profile without scoring each animal
+
+    Returns:
+        Dictionary with total, low_risk_count and low_risk_by_species,
+        a list of (species, count) largest first
+    """
+    db = DatabaseHelper(db_path)
+    conn = db.get_connection()
+    build_risk_lookup(adopter_profile, conn, status)
+
+    where = ''
+    params = [low_risk_below]
+    if status:
+        where = 'WHERE a.status = ?'
+        params.append(status)
+
+    # One pass over animals: per-species totals and low-risk counts
+    cursor = conn.execute(f'''
+        SELECT a.species, COUNT(*), SUM(l.risk_score < ?)
+        FROM animals a {LOOKUP_JOIN_SQL}
+        {where}
+        GROUP BY a.species
+    ''', params)
+
+    total = 0
+    low_risk_count = 0
+    by_species = []
+    for species, count, low_risk in cursor.fetchall():
+        total += count
+        low_risk_count += low_risk
+        if species is not None and low_risk:
+            by_species.append((species, low_risk))
+    conn.close()
+
+    by_species.sort(key=lambda item: (-item[1], item[0]))
+
+    return {
+        'total': total,
+        'low_risk_count': low_risk_count,
+        'low_risk_by_species': by_species
+    }
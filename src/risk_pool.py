@@ -0,0 +1,254 @@
+"""
+Risk Scoring Pool
+Scores many adopter profiles against a whole inventory across worker processes
+
+The inventory is reduced to one byte per pet for each of trait flags, age and
+size, written once to a shared memory block that every worker reads at startup.
+Profiles are then partitioned across the workers in chunks and results are
+streamed back as each chunk finishes.
+
+Usage:
+    python src/risk_pool.py [--db db/app.db] [--processes N]
+    python src/risk_pool.py --benchmark [--profiles 200] [--processes N]
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from array import array
+from collections import Counter, namedtuple
+from itertools import islice
+from multiprocessing import Pool, shared_memory
+
+from src.db_helper import DatabaseHelper
+from src.migrations import migrate_database
+from src.adopter_profile import SAMPLE_PROFILES
+from src.saved_search_helper import get_all_active_searches
+from src.risk_engine import (
+    PetTraits, TRAIT_FLAGS, RISK_RULES, compile_profile, pet_trait_flags, LOW_RISK_MAX_SCORE
+)
+
+
+# One byte per pet and column: trait flag bits and indexes into the age/size vocabularies
+PetFeatures = namedtuple('PetFeatures', ['trait_flags', 'age_codes', 'size_codes', 'ages', 'sizes'])
+
+assert len(TRAIT_FLAGS) <= 8, "trait flags no longer fit in one byte per pet"
+
+
+def encode_pet_features(rows):
+    """
+    Pack (trait_flags, age, size) rows into PetFeatures
+
+    Args:
+        rows: Iterable of (trait_flags, age, size); trait_flags may be a pet dict
+              instead of an int, in which case the flags are computed from it
+    """
+    trait_flags = array('B')
+    age_codes = array('B')
+    size_codes = array('B')
+    ages = {}
+    sizes = {}
+
+    for flags, age, size in rows:
+        if isinstance(flags, dict):
+            flags = pet_trait_flags(flags)
+        trait_flags.append(flags)
+        age_codes.append(ages.setdefault(age, len(ages)))
+        size_codes.append(sizes.setdefault(size, len(sizes)))
+
+    return PetFeatures(trait_flags, age_codes, size_codes, tuple(ages), tuple(sizes))
+
+
+def load_pet_features(status='adoptable', db_path='db/app.db'):
+    """
+    Load the feature columns of every animal with the given status
+
+    Returns:
+        Tuple of (list of animal IDs, PetFeatures) in the same order
+    """
+    db = DatabaseHelper(db_path)
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, trait_flags, breed, age, size, description
+        FROM animals WHERE status = ?
+    ''', (status,))
+    rows = cursor.fetchall()
+    conn.close()
+
+    ids = [row[0] for row in rows]
+    features = encode_pet_features(
+        # Animals stored without trait_flags get them computed from their text
+        (flags if flags is not None else
+         {'breed': breed, 'age': age, 'size': size, 'description': description},
+         age, size)
+        for _, flags, breed, age, size, description in rows
+    )
+    return ids, features
+
+
+# Per-worker state filled in by _init_worker
+_worker_signatures = None
+_worker_signature_index = None
+
+
+def _init_worker(shm_name, count, ages, sizes):
+    """Read the shared feature block once and group pets by signature"""
+    global _worker_signatures, _worker_signature_index
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    view = shm.buf[:3 * count]
+    try:
+        signatures = {}
+        signature_index = array('I')
+        for i in range(count):
+            key = (view[i], view[count + i], view[2 * count + i])
+            signature_index.append(signatures.setdefault(key, len(signatures)))
+    finally:
+        view.release()
+        shm.close()
+
+    _worker_signatures = [
+        PetTraits.from_signature(flags, ages[age], sizes[size])
+        for flags, age, size in signatures
+    ]
+    _worker_signature_index = signature_index
+
+
+def _score_profile_chunk(chunk):
+    """Score a chunk of (profile_index, profile) pairs against the worker's pets"""
+    results = []
+    for profile_index, profile in chunk:
+        compiled = compile_profile(profile)
+        signature_results = [compiled.score(traits) for traits in _worker_signatures]
+        scores = array('H', [signature_results[s][0] for s in _worker_signature_index])
+        masks = array('I', [signature_results[s][1] for s in _worker_signature_index])
+        results.append((profile_index, scores, masks))
+    return results
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_profiles_parallel(profiles, features, processes=None, chunk_size=None):
+    """
+    Score every profile against every pet in a pool of worker processes
+
+    Args:
+        profiles: List of adopter profile dictionaries
+        features: PetFeatures of the pets, e.g. from load_pet_features()
+        processes: Number of workers (default: all cores)
+        chunk_size: Profiles per task (default: about four tasks per worker)
+
+    Yields:
+        (profile_index, scores, masks) as each profile finishes, in no particular
+        order; scores and masks are arrays aligned with the pets in `features`
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, len(profiles) // (processes * 4))
+
+    count = len(features.trait_flags)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 3 * count))
+    try:
+        shm.buf[0:count] = features.trait_flags.tobytes()
+        shm.buf[count:2 * count] = features.age_codes.tobytes()
+        shm.buf[2 * count:3 * count] = features.size_codes.tobytes()
+
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(shm.name, count, features.ages, features.sizes)) as pool:
+            tasks = _chunks(enumerate(profiles), chunk_size)
+            for results in pool.imap_unordered(_score_profile_chunk, tasks):
+                yield from results
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def rule_trigger_totals(masks):
+    """Count how often each rule fired in an array of rule masks"""
+    totals = Counter()
+    for mask, count in Counter(masks).items():
+        for index, rule in enumerate(RISK_RULES):
+            if mask >> index & 1:
+                totals[rule.name] += count
+    return totals
+
+
+def benchmark_scaling(profiles, features, max_processes=None):
+    """
+    Time a full scoring pass with 1..max_processes workers
+
+    Returns:
+        List of (processes, seconds) tuples
+    """
+    if max_processes is None:
+        max_processes = os.cpu_count() or 1
+
+    timings = []
+    for processes in range(1, max_processes + 1):
+        start = time.perf_counter()
+        for _ in score_profiles_parallel(profiles, features, processes=processes):
+            pass
+        timings.append((processes, time.perf_counter() - start))
+    return timings
+
+
+def _load_profiles(count=None, db_path='db/app.db'):
+    """Adopter profiles of active saved searches, padded with sample profiles up to `count`"""
+    profiles = [search['adopter_profile'] for search in get_all_active_searches(db_path)]
+    samples = list(SAMPLE_PROFILES.values())
+
+    if count is not None:
+        profiles = profiles[:count]
+        while len(profiles) < count:
+            profiles.append(samples[len(profiles) % len(samples)])
+    return profiles or samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score adopter profiles against all adoptable pets in parallel")
+    parser.add_argument('--db', default='db/app.db', help="Database to load pets and saved searches from")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--profiles', type=int, default=None,
+                        help="Number of profiles (saved searches padded with sample profiles)")
+    parser.add_argument('--benchmark', action='store_true', help="Time 1..N worker processes")
+    args = parser.parse_args()
+
+    # trait_flags and saved-search columns come from migrations
+    migrate_database(args.db)
+    ids, features = load_pet_features(db_path=args.db)
+    profiles = _load_profiles(args.profiles or (200 if args.benchmark else None), args.db)
+    print(f"🐾 {len(profiles)} profile(s) x {len(ids)} adoptable pet(s)")
+
+    if args.benchmark:
+        timings = benchmark_scaling(profiles, features, args.processes)
+        baseline = timings[0][1]
+        print(f"\n{'Processes':>10} {'Seconds':>10} {'Speedup':>8}")
+        for processes, seconds in timings:
+            print(f"{processes:>10} {seconds:>10.3f} {baseline / seconds:>7.2f}x")
+    else:
+        start = time.perf_counter()
+        totals = Counter()
+        low_risk = 0
+        for _, scores, masks in score_profiles_parallel(profiles, features, args.processes):
+            totals.update(rule_trigger_totals(masks))
+            low_risk += sum(1 for score in scores if score < LOW_RISK_MAX_SCORE)
+        elapsed = time.perf_counter() - start
+
+        print(f"✅ Scored {len(profiles) * len(ids)} pairs in {elapsed:.2f}s")
+        print(f"  Low-risk matches: {low_risk}")
+        print("\n📊 Rule triggers:")
+        for rule, count in totals.most_common():
+            print(f"  {rule}: {count}")
@@ -0,0 +1,174 @@
+"""
+Rule Trigger Telemetry
+Bounded, thread-safe counting of triggered risk rules
+
+Keeps per-rule totals plus a fixed-size ring of per-minute buckets in memory
+and periodically flushes hourly deltas to the rule_trigger_counts table, so
+stats survive restarts and are shared by every worker process. Each database
+gets its own counter, and counts still pending at exit are flushed once a
+counter has recorded any.
+"""
+
+import atexit
+import threading
+import time
+from collections import Counter
+
+from .db_helper import DatabaseHelper
+
+
+BUCKET_SECONDS = 60            # granularity of the in-memory ring
+RING_SIZE = 60                 # one hour of recent history per process
+PERSIST_BUCKET_SECONDS = 3600  # granularity of rows in rule_trigger_counts
+FLUSH_INTERVAL_SECONDS = 30
+
+
+class RuleTriggerCounter:
+    """Aggregating rule trigger counter with a time-bucketed ring buffer"""
+
+    def __init__(self, db_path='db/app.db', bucket_seconds=BUCKET_SECONDS,
+                 ring_size=RING_SIZE, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.bucket_seconds = bucket_seconds
+        self.ring_size = ring_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        self._ring = [None] * ring_size  # slots of (bucket_start, Counter)
+        self._pending = Counter()        # (rule, persist_bucket_start) -> unflushed count
+        self._last_flush = time.monotonic()
+        self._flushing = False
+        self._flush_at_exit = False
+
+    def record(self, rule, count=1, now=None):
+        """Count `count` triggers of `rule`"""
+        if now is None:
+            now = time.time()
+        bucket = int(now // self.bucket_seconds)
+        persist_bucket = int(now // PERSIST_BUCKET_SECONDS) * PERSIST_BUCKET_SECONDS
+
+        with self._lock:
+            if not self._flush_at_exit:
+                self._flush_at_exit = True
+                atexit.register(self.flush)
+
+            slot = bucket % self.ring_size
+            entry = self._ring[slot]
+            if entry is None or entry[0] != bucket:
+                entry = (bucket, Counter())
+                self._ring[slot] = entry
+            entry[1][rule] += count
+
+            self._totals[rule] += count
+            self._pending[(rule, persist_bucket)] += count
+
+            flush_due = (not self._flushing and
+                         time.monotonic() - self._last_flush >= self.flush_interval)
+            if flush_due:
+                self._flushing = True
+
+        if flush_due:
+            # Write in the background so scoring never waits on SQLite
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def recent_counts(self, window_seconds=BUCKET_SECONDS * RING_SIZE, now=None):
+        """Per-rule counts seen by this process in the last `window_seconds` (ring only)"""
+        if now is None:
+            now = time.time()
+        oldest = int((now - window_seconds) // self.bucket_seconds)
+
+        counts = Counter()
+        with self._lock:
+            for entry in self._ring:
+                if entry is not None and entry[0] > oldest:
+                    counts.update(entry[1])
+        return dict(counts)
+
+    def flush(self):
+        """Write unflushed counts to rule_trigger_counts; keeps them pending on failure"""
+        with self._lock:
+            pending = self._pending
+            self._pending = Counter()
+
+        try:
+            if pending:
+                db = DatabaseHelper(self.db_path)
+                conn = db.get_connection()
+                conn.executemany('''
+                    INSERT INTO rule_trigger_counts (rule, bucket_start, count)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (rule, bucket_start) DO UPDATE SET count = count + excluded.count
+                ''', [(rule, bucket, count) for (rule, bucket), count in pending.items()])
+                conn.commit()
+                conn.close()
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+        finally:
+            with self._lock:
+                self._last_flush = time.monotonic()
+                self._flushing = False
+
+    def get_counts(self, since=None):
+        """
+        Per-rule trigger counts across all processes and restarts
+
+        Args:
+            since: Only count triggers at or after this unix time (hour granularity)
+
+        Returns:
+            Dictionary of rule key -> count
+        """
+        with self._lock:
+            pending = Counter({
+                rule: count for (rule, bucket), count in self._pending.items()
+                if since is None or bucket + PERSIST_BUCKET_SECONDS > since
+            })
+            local_totals = Counter(self._totals)
+
+        try:
+            db = DatabaseHelper(self.db_path)
+            conn = db.get_connection()
+            query = 'SELECT rule, SUM(count) FROM rule_trigger_counts'
+            params = []
+            if since is not None:
+                query += ' WHERE bucket_start + ? > ?'
+                params = [PERSIST_BUCKET_SECONDS, since]
+            query += ' GROUP BY rule'
+            persisted = Counter(dict(conn.execute(query, params).fetchall()))
+            conn.close()
+        except Exception:
+            # Table not migrated yet or database unavailable: this process only
+            return dict(local_totals) if since is None else dict(pending)
+
+        persisted.update(pending)
+        return dict(persisted)
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def get_rule_trigger_counter(db_path='db/app.db'):
+    """The process-wide counter for `db_path`, created on first use"""
+    with _counters_lock:
+        counter = _counters.get(db_path)
+        if counter is None:
+            counter = _counters[db_path] = RuleTriggerCounter(db_path)
+        return counter
+
+
+def record_rule_trigger(rule, db_path='db/app.db'):
+    """Count one trigger of `rule` in the process-wide counter for `db_path`"""
+    get_rule_trigger_counter(db_path).record(rule)
+
+
+def get_rule_trigger_counts(since=None, db_path='db/app.db'):
+    """Per-rule trigger counts from the process-wide counter for `db_path`"""
+    return get_rule_trigger_counter(db_path).get_counts(since=since)
+
+
+def get_recent_rule_trigger_counts(window_seconds=BUCKET_SECONDS * RING_SIZE, db_path='db/app.db'):
+    """Per-rule trigger counts seen by this process in the last `window_seconds`"""
+    return get_rule_trigger_counter(db_path).recent_counts(window_seconds)
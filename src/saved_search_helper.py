@@ -12,6 +12,7 @@ import sqlite3
 import json
 from datetime import datetime
 from src.db_helper import DatabaseHelper
+from src.geo import normalize_zip
 
 
 import sqlite3
@@ -20,7 +21,7 @@ from datetime import datetime
 from src.db_helper import DatabaseHelper
 
 
-def save_search(email, name, adopter_profile, filters=None):
+def save_search(email, name, adopter_profile, filters=None, db_path='db/app.db'):
     """
     Save a user's search preferences
     
@@ -28,12 +29,13 @@ def save_search(email, name, adopter_profile, filters=None):
         email: User's email address
         name: Name for this saved search
         adopter_profile: Dictionary with adopter information
-        filters: Optional dict with species, age, size, gender filters
+        filters: Optional dict with species, age, size, gender filters, and
+                 zip_code with max_distance (miles) to only match nearby pets
     
     Returns:
         ID of saved search
     """
-    db = DatabaseHelper()
+    db = DatabaseHelper(db_path)
     conn = db.get_connection()
     cursor = conn.cursor()
     
@@ -49,8 +51,8 @@ def save_search(email, name, adopter_profile, filters=None):
         (email, name, experience_level, has_kids, kid_ages, has_other_pets, 
          other_pet_types, home_type, yard_size, daily_exercise_minutes, 
          work_schedule, allergies, noise_tolerance, training_commitment,
-         species, age, size, gender, max_distance)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         species, age, size, gender, max_distance, zip_code)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
         email,
         name,
@@ -70,7 +72,8 @@ def save_search(email, name, adopter_profile, filters=None):
         filters.get('age'),
         filters.get('size'),
         filters.get('gender'),
-        filters.get('max_distance')
+        filters.get('max_distance'),
+        normalize_zip(filters.get('zip_code'))
     ))
     
     search_id = cursor.lastrowid
@@ -80,9 +83,9 @@ def save_search(email, name, adopter_profile, filters=None):
     return search_id
 
 
-def get_saved_search(search_id):
+def get_saved_search(search_id, db_path='db/app.db'):
     """Retrieve a saved search by ID"""
-    db = DatabaseHelper()
+    db = DatabaseHelper(db_path)
     conn = db.get_connection()
     cursor = conn.cursor()
     
@@ -114,7 +117,8 @@ def get_saved_search(search_id):
         'age': row[16],
         'size': row[17],
         'gender': row[18],
-        'max_distance': row[19]
+        'max_distance': row[19],
+        'zip_code': row[23]
     }
     
     return {
@@ -129,9 +133,9 @@ def get_saved_search(search_id):
     }
 
 
-def get_all_active_searches():
+def get_all_active_searches(db_path='db/app.db'):
     """Get all active saved searches"""
-    db = DatabaseHelper()
+    db = DatabaseHelper(db_path)
     conn = db.get_connection()
     cursor = conn.cursor()
     
@@ -141,16 +145,16 @@ def get_all_active_searches():
     
     searches = []
     for row in rows:
-        search = get_saved_search(row[0])
+        search = get_saved_search(row[0], db_path)
         if search:
             searches.append(search)
     
     return searches
 
 
-def update_last_notified(search_id):
+def update_last_notified(search_id, db_path='db/app.db'):
     """Update the last notification timestamp"""
-    db = DatabaseHelper()
+    db = DatabaseHelper(db_path)
     conn = db.get_connection()
     cursor = conn.cursor()
     
@@ -163,9 +167,9 @@ def update_last_notified(search_id):
     conn.close()
 
 
-def delete_saved_search(search_id):
+def delete_saved_search(search_id, db_path='db/app.db'):
     """Delete a saved search"""
-    db = DatabaseHelper()
+    db = DatabaseHelper(db_path)
     conn = db.get_connection()
     cursor = conn.cursor()
     
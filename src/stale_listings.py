@@ -0,0 +1,110 @@
+"""
+Stale Listings
+Counts ETL runs that no longer return an animal and moves stale or no longer adoptable animals to animals_archive
+
+Petfinder only reports adoptions for animals it still returns, so listings
+that disappear would otherwise stay in animals forever. Every complete ETL run
+increments missed_runs of the animals it did not see (storing an animal resets
+it), and animals missed STALE_AFTER_RUNS times in a row are archived together
+with animals whose status is no longer adoptable. Archiving copies the row to
+animals_archive and deletes it along with its photos and distances, in short
+batches so the app keeps reading while it runs.
+
+Usage:
+    python src/stale_listings.py            # archive stale and non-adoptable animals
+"""
+
+import sys
+import os
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_helper import DatabaseHelper
+from src.migrations import run_backfill, BACKFILL_BATCH_SIZE, BACKFILL_PAUSE_SECONDS
+
+
+STALE_AFTER_RUNS = int(os.getenv('FURFINDR_STALE_AFTER_RUNS', '3'))
+
+ARCHIVED_COLUMNS = (
+    'id, name, type, species, breed, age, size, gender, status, distance, '
+    'description, organization_id, url, trait_flags, created_at'
+)
+
+# reason -> predicate on animals selecting the rows to archive for it
+ARCHIVE_REASONS = {
+    'not_adoptable': "status IS NOT 'adoptable'",
+    'stale': 'missed_runs >= ?',
+}
+
+
+def mark_unseen_animals(seen_ids, db_path='db/app.db'):
+    """
+    Count one more missed run for every stored animal not in seen_ids
+
+    Only call this after a run whose every query succeeded; otherwise animals
+    of the failed queries would be counted as gone.
+
+    Returns:
+        Number of animals marked
+    """
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen_animals (id TEXT PRIMARY KEY)')
+        conn.executemany(
+            'INSERT OR IGNORE INTO seen_animals (id) VALUES (?)', [(i,) for i in seen_ids]
+        )
+        marked = conn.execute('''
+            UPDATE animals SET missed_runs = missed_runs + 1
+            WHERE id NOT IN (SELECT id FROM seen_animals)
+        ''').rowcount
+        conn.commit()
+        return marked
+    finally:
+        conn.close()
+
+
+def _archive_step(reason, params):
+    """Backfill-style step that archives up to batch_size animals matching one reason"""
+    predicate = ARCHIVE_REASONS[reason]
+
+    def step(conn, batch_size):
+        ids = [row[0] for row in conn.execute(
+            f'SELECT id FROM animals WHERE {predicate} LIMIT ?', (*params, batch_size)
+        )]
+        if not ids:
+            return 0
+
+        placeholders = ', '.join('?' * len(ids))
+        conn.execute(f'''
+            INSERT OR REPLACE INTO animals_archive ({ARCHIVED_COLUMNS}, archive_reason)
+            SELECT {ARCHIVED_COLUMNS}, ? FROM animals WHERE id IN ({placeholders})
+        ''', (reason, *ids))
+        conn.execute(f'DELETE FROM photos WHERE animal_id IN ({placeholders})', ids)
+        conn.execute(f'DELETE FROM animal_distances WHERE animal_id IN ({placeholders})', ids)
+        conn.execute(f'DELETE FROM animals WHERE id IN ({placeholders})', ids)
+        return len(ids)
+
+    return step
+
+
+def archive_animals(stale_after_runs=STALE_AFTER_RUNS, db_path='db/app.db',
+                    batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE_SECONDS):
+    """
+    Move stale and no longer adoptable animals to animals_archive
+
+    Returns:
+        Dictionary of reason -> number of animals archived
+    """
+    conn = DatabaseHelper(db_path).get_connection()
+    try:
+        return {
+            'not_adoptable': run_backfill(conn, _archive_step('not_adoptable', ()), batch_size, pause),
+            'stale': run_backfill(conn, _archive_step('stale', (stale_after_runs,)), batch_size, pause),
+        }
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    archived = archive_animals()
+    print(f"🗄️  Archived {archived['stale']} stale and {archived['not_adoptable']} non-adoptable animal(s)")
@@ -0,0 +1,51 @@
+import pytest
+
+from src.migrations import migrate_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a fresh database migrated to the latest schema version"""
+    path = str(tmp_path / 'app.db')
+    migrate_database(path)
+    return path
+
+
+@pytest.fixture
+def make_animal():
+    """Factory of Petfinder-style animal records as accepted by DatabaseHelper.upsert_animal"""
+    def make(animal_id, **fields):
+        animal = {
+            'id': animal_id,
+            'name': f'Pet {animal_id}',
+            'type': 'Dog',
+            'species': 'Dog',
+            'breeds': {'primary': 'Labrador Retriever'},
+            'age': 'Adult',
+            'size': 'Medium',
+            'gender': 'Female',
+            'status': 'adoptable',
+            'distance': 5.0,
+            'description': 'Friendly and calm.',
+            'organization_id': 'MA01',
+            'url': f'https://example.org/{animal_id}',
+        }
+        animal.update(fields)
+        return animal
+
+    return make
+
+
+@pytest.fixture
+def make_organization():
+    """Factory of Petfinder-style organization records as accepted by DatabaseHelper.upsert_organization"""
+    def make(org_id, postcode):
+        return {
+            'id': org_id,
+            'name': f'Shelter {org_id}',
+            'contact': {'email': f'{org_id.lower()}@example.org', 'phone': None},
+            'address': {'address1': '1 Main St', 'city': 'Somewhere', 'state': 'MA', 'postcode': postcode},
+            'url': f'https://example.org/{org_id}',
+        }
+
+    return make
@@ -0,0 +1,21 @@
+"""Free-text search over the animals_fts index"""
+
+from src.animal_search import build_match_query, search_animal_ids
+from src.db_helper import DatabaseHelper
+
+
+def test_build_match_query_quotes_prefix_terms():
+    assert build_match_query('Lab "pupp') == '"lab"* "pupp"*'
+    assert build_match_query('!!! - ') == ''
+
+
+def test_text_without_words_does_not_filter(db_path, make_animal):
+    db = DatabaseHelper(db_path)
+    db.upsert_animal(make_animal('a1'))
+    db.upsert_animal(make_animal('a2', breeds={'primary': 'Beagle'}))
+
+    assert search_animal_ids('!!!', db_path=db_path) is None
+    assert search_animal_ids('-', db_path=db_path) is None
+    assert search_animal_ids('', db_path=db_path) is None
+    assert search_animal_ids('labrador', db_path=db_path) == {'a1'}
+    assert search_animal_ids('poodle', db_path=db_path) == set()
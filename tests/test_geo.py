@@ -0,0 +1,52 @@
+"""Geocoding organizations and radius searches over the organization_locations R*Tree"""
+
+import pytest
+
+from src.db_helper import DatabaseHelper
+from src.geo import find_animals_within, find_organizations_within, geocode_zip
+
+
+def _store_shelters(db_path, make_animal, make_organization):
+    db = DatabaseHelper(db_path)
+    db.upsert_organization(make_organization('CAMBRIDGE', '02139'))
+    db.upsert_organization(make_organization('ALLSTON', '02134-1234'))
+    db.upsert_organization(make_organization('WESTPORT', '02790'))
+    db.upsert_organization(make_organization('BEVERLY', '90210'))
+    db.upsert_organization(make_organization('NOWHERE', None))
+    db.upsert_animal(make_animal('a1', organization_id='ALLSTON'))
+    db.upsert_animal(make_animal('a2', organization_id='WESTPORT'))
+    db.upsert_animal(make_animal('a3', organization_id='CAMBRIDGE', status='adopted'))
+
+
+def test_geocode_zip(db_path):
+    assert geocode_zip('02139-4307', db_path=db_path) == (42.3647, -71.1042)
+    assert geocode_zip('00000', db_path=db_path) is None
+    assert geocode_zip('abc', db_path=db_path) is None
+
+
+def test_organizations_within_radius_nearest_first(db_path, make_animal, make_organization):
+    _store_shelters(db_path, make_animal, make_organization)
+
+    nearby = find_organizations_within('02139', 10, db_path=db_path)
+    wider = find_organizations_within('02139', 60, db_path=db_path)
+
+    assert [org_id for org_id, _, _ in nearby] == ['CAMBRIDGE', 'ALLSTON']
+    assert [org_id for org_id, _, _ in wider] == ['CAMBRIDGE', 'ALLSTON', 'WESTPORT']
+    assert wider[2][2] == pytest.approx(52.06, abs=0.01)
+    assert find_organizations_within('00000', 60, db_path=db_path) == []
+
+
+def test_animals_within_radius_are_adoptable_only(db_path, make_animal, make_organization):
+    _store_shelters(db_path, make_animal, make_organization)
+
+    assert [animal_id for animal_id, _ in find_animals_within('02139', 10, db_path=db_path)] == ['a1']
+    assert [animal_id for animal_id, _ in find_animals_within('02139', 60, db_path=db_path)] == ['a1', 'a2']
+
+
+def test_moved_organization_is_reindexed(db_path, make_animal, make_organization):
+    _store_shelters(db_path, make_animal, make_organization)
+
+    DatabaseHelper(db_path).upsert_organization(make_organization('WESTPORT', '02134'))
+
+    assert [org_id for org_id, _, _ in find_organizations_within('02790', 10, db_path=db_path)] == []
+    assert 'WESTPORT' in [org_id for org_id, _, _ in find_organizations_within('02139', 10, db_path=db_path)]
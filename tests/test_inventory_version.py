@@ -0,0 +1,58 @@
+"""Inventory version reads, bumps and change polling"""
+
+import sqlite3
+import threading
+
+from src.db_helper import DatabaseHelper
+from src.inventory_version import InventoryWatcher, current_inventory_version, watch_inventory
+
+
+def test_version_is_zero_before_migrations(tmp_path):
+    assert current_inventory_version(db_path=str(tmp_path / 'empty.db')) == 0
+
+
+def test_bump_inventory_version(db_path):
+    before = current_inventory_version(db_path=db_path)
+
+    DatabaseHelper(db_path).bump_inventory_version()
+
+    assert current_inventory_version(db_path=db_path) == before + 1
+
+
+def test_watcher_sees_commits_from_other_connections(db_path, make_animal):
+    watcher = InventoryWatcher(db_path)
+    try:
+        assert watcher.poll() is None
+
+        DatabaseHelper(db_path).upsert_animal(make_animal('a1'))
+        version = watcher.poll()
+        assert version == current_inventory_version(db_path=db_path)
+        assert watcher.poll() is None
+
+        # Writes to tables caches do not read change nothing
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO rule_trigger_counts (rule, bucket_start, count) VALUES ('a', 0, 1)")
+        conn.commit()
+        conn.close()
+        assert watcher.poll() is None
+        assert watcher.wait_for_change(timeout=0.05, interval=0.01) is None
+    finally:
+        watcher.close()
+
+
+def test_watch_inventory_calls_back(db_path):
+    changed = threading.Event()
+    versions = []
+
+    def on_change(version):
+        versions.append(version)
+        changed.set()
+
+    stop = watch_inventory(on_change, interval=0.01, db_path=db_path)
+    try:
+        DatabaseHelper(db_path).bump_inventory_version()
+        assert changed.wait(5)
+    finally:
+        stop.set()
+
+    assert versions == [current_inventory_version(db_path=db_path)]
@@ -0,0 +1,110 @@
+"""Schema migrations and the triggers that keep derived tables in sync with animals"""
+
+import sqlite3
+
+from src.db_helper import DatabaseHelper
+from src.migrations import MIGRATIONS, LATEST_VERSION, get_schema_version, migrate
+from src.animal_search import search_animal_ids
+from src.inventory_metrics import get_inventory_summary
+from src.inventory_version import current_inventory_version
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+
+def _metrics(conn):
+    return {
+        (dimension, value): count
+        for dimension, value, count in conn.execute(
+            'SELECT dimension, value, count FROM inventory_metrics WHERE count > 0'
+        )
+    }
+
+
+def test_migrate_empty_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'app.db')
+
+    applied = migrate(conn)
+
+    assert applied == [migration.version for migration in MIGRATIONS]
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert {'animals', 'animals_fts', 'inventory_metrics', 'meta', 'animals_archive'} <= _tables(conn)
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_migrate_baseline_database_backfills_existing_rows(tmp_path):
+    # A database created by the original init script: baseline tables, user_version 0
+    conn = sqlite3.connect(tmp_path / 'app.db')
+    MIGRATIONS[0].upgrade(conn)
+    conn.execute('''
+        INSERT INTO animals (id, name, species, breed, age, size, status, distance, description)
+        VALUES ('a1', 'Rex', 'Dog', 'Siberian Husky', 'Young', 'Large', 'adoptable', 3.0, 'Shy at first'),
+               ('a2', 'Tom', 'Cat', NULL, 'Senior', 'Small', 'adopted', NULL, NULL)
+    ''')
+    conn.commit()
+
+    migrate(conn)
+
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert conn.execute("SELECT rowid FROM animals_fts WHERE animals_fts MATCH 'husky'").fetchall() == \
+        conn.execute("SELECT rowid FROM animals WHERE id = 'a1'").fetchall()
+    assert conn.execute('SELECT COUNT(*) FROM animals WHERE trait_flags IS NULL').fetchone()[0] == 0
+    assert _metrics(conn)[('total', '')] == 1
+    assert _metrics(conn)[('species', 'Dog')] == 1
+    conn.close()
+
+
+def test_upsert_keeps_search_and_metrics_in_sync(db_path, make_animal):
+    db = DatabaseHelper(db_path)
+    db.upsert_animal(make_animal('a1', breeds={'primary': 'Beagle'}, age='Young'))
+    db.upsert_animal(make_animal('a2'))
+
+    # Updating a1 must drop its old breed from the index and move its counts
+    db.upsert_animal(make_animal('a1', breeds={'primary': 'Poodle'}, age='Senior'))
+    db.upsert_animal(make_animal('a2', status='adopted'))
+
+    assert search_animal_ids('beagle', db_path=db_path) == set()
+    assert search_animal_ids('poodle', db_path=db_path) == {'a1'}
+    assert search_animal_ids('labrador', db_path=db_path) == set()  # a2 is no longer adoptable
+    assert search_animal_ids('labrador', status=None, db_path=db_path) == {'a2'}
+
+    conn = db.get_connection()
+    counts = conn.execute('SELECT COUNT(*), (SELECT COUNT(*) FROM animals_fts) FROM animals').fetchone()
+    metrics = _metrics(conn)
+    conn.close()
+
+    assert counts == (2, 2)
+    assert metrics[('total', '')] == 1
+    assert metrics[('age', 'Senior')] == 1
+    assert ('age', 'Young') not in metrics
+    assert ('age', 'Adult') not in metrics
+
+    summary = get_inventory_summary(db_path=db_path)
+    assert summary['total'] == 1
+    assert summary['median_distance'] == 5.0
+
+
+def test_upserting_an_unchanged_animal_changes_nothing(db_path, make_animal):
+    db = DatabaseHelper(db_path)
+    db.upsert_animal(make_animal('a1'))
+    conn = db.get_connection()
+    conn.execute("UPDATE animals SET created_at = '2020-01-01 00:00:00', missed_runs = 2")
+    conn.commit()
+    version = current_inventory_version(conn)
+
+    db.upsert_animal(make_animal('a1'))
+
+    assert current_inventory_version(conn) == version
+    assert conn.execute('SELECT created_at, missed_runs FROM animals').fetchone() == ('2020-01-01 00:00:00', 0)
+    assert _metrics(conn)[('total', '')] == 1
+    assert conn.execute('SELECT COUNT(*) FROM animals_fts').fetchone()[0] == 1
+    assert search_animal_ids('labrador', db_path=db_path) == {'a1'}
+
+    db.upsert_animal(make_animal('a1', name='Biscuit'))
+
+    assert current_inventory_version(conn) == version + 1
+    assert conn.execute('SELECT created_at FROM animals').fetchone()[0] == '2020-01-01 00:00:00'
+    assert search_animal_ids('biscuit', db_path=db_path) == {'a1'}
+    conn.close()
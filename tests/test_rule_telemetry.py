@@ -0,0 +1,34 @@
+"""Rule trigger counting in the per-minute ring and the rule_trigger_counts table"""
+
+import sqlite3
+
+from src.rule_telemetry import RuleTriggerCounter, get_rule_trigger_counter
+
+
+def test_recent_counts_cover_the_window_only():
+    counter = RuleTriggerCounter(db_path=':memory:', bucket_seconds=60, ring_size=3)
+    counter.record('a', now=0)
+    counter.record('a', now=60)
+    counter.record('b', now=120, count=2)
+
+    assert counter.recent_counts(window_seconds=180, now=179) == {'a': 2, 'b': 2}
+    assert counter.recent_counts(window_seconds=60, now=179) == {'b': 2}
+
+    # The slot for minute 0 is reused by minute 3
+    counter.record('c', now=180)
+    assert counter.recent_counts(window_seconds=240, now=180) == {'a': 1, 'b': 2, 'c': 1}
+
+
+def test_flush_writes_to_its_own_database(db_path):
+    counter = get_rule_trigger_counter(db_path)
+    assert get_rule_trigger_counter(db_path) is counter
+    assert get_rule_trigger_counter('db/app.db') is not counter
+
+    counter.record('a', count=3, now=7200)
+    counter.flush()
+
+    assert counter.get_counts() == {'a': 3}
+    assert counter.get_counts(since=10800) == {}
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT rule, bucket_start, count FROM rule_trigger_counts').fetchall() == [('a', 7200, 3)]
+    conn.close()
@@ -0,0 +1,44 @@
+"""Counting missed ETL runs and archiving stale or no longer adoptable animals"""
+
+from src.db_helper import DatabaseHelper
+from src.stale_listings import archive_animals, mark_unseen_animals
+
+
+def _ids(conn, table):
+    return {row[0] for row in conn.execute(f'SELECT id FROM {table}')}
+
+
+def test_archive_moves_stale_and_non_adoptable_animals(db_path, make_animal):
+    db = DatabaseHelper(db_path)
+    for animal_id in ('seen', 'gone', 'adopted'):
+        db.upsert_animal(make_animal(animal_id, status='adopted' if animal_id == 'adopted' else 'adoptable'))
+        db.upsert_photos(animal_id, [{'medium': f'https://example.org/{animal_id}.jpg'}])
+        db.upsert_animal_distances(animal_id, {'02139': 5.0})
+
+    for _ in range(3):
+        assert mark_unseen_animals({'seen', 'adopted'}, db_path) == 1
+
+    archived = archive_animals(stale_after_runs=3, db_path=db_path, batch_size=1, pause=0)
+
+    assert archived == {'not_adoptable': 1, 'stale': 1}
+    conn = db.get_connection()
+    assert _ids(conn, 'animals') == {'seen'}
+    assert dict(conn.execute('SELECT id, archive_reason FROM animals_archive')) == {
+        'gone': 'stale', 'adopted': 'not_adoptable'
+    }
+    assert {row[0] for row in conn.execute('SELECT animal_id FROM photos')} == {'seen'}
+    assert {row[0] for row in conn.execute('SELECT animal_id FROM animal_distances')} == {'seen'}
+    assert conn.execute('SELECT COUNT(*) FROM animals_fts').fetchone()[0] == 1
+    conn.close()
+
+
+def test_storing_an_animal_resets_its_missed_runs(db_path, make_animal):
+    db = DatabaseHelper(db_path)
+    db.upsert_animal(make_animal('back'))
+    mark_unseen_animals(set(), db_path)
+    mark_unseen_animals(set(), db_path)
+
+    db.upsert_animal(make_animal('back'))
+    mark_unseen_animals(set(), db_path)
+
+    assert archive_animals(stale_after_runs=2, db_path=db_path, pause=0) == {'not_adoptable': 0, 'stale': 0}